@@ -1,6 +1,7 @@
-from flask import Flask
+from flask import Flask, jsonify
 from flask_cors import CORS
 from flasgger import Swagger
+from src.utils import model_load
 from api.routes_resume_parser import resume_parser_bp
 from api.routes_jd_parser import jd_parser_bp
 from api.routes_extract_resume import resume_extractor_bp
@@ -22,6 +23,12 @@ def create_app():
     def home():
         return "✅ ScoreIt.AI backend is running!"
 
+    @app.route("/ready")
+    def ready():
+        # Readiness of the matching models, they load on first use or on warmup()
+        modelsReady = model_load.isReady()
+        return jsonify({"models_ready": modelsReady}), 200 if modelsReady else 503
+
     app.register_blueprint(resume_parser_bp, url_prefix="/")
     app.register_blueprint(jd_parser_bp, url_prefix="/")
     app.register_blueprint(resume_extractor_bp, url_prefix="/")
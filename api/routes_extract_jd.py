@@ -1,12 +1,37 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flasgger.utils import swag_from
 import os
 from src.jd_extractor_agent.jd_agent import JobDescriptionAgent
+from src.utils import llm_cache
 import gc
+import json
 import time
 
 jd_extractor_bp = Blueprint("jd_extracter", __name__)
 
+def stream_extraction(text, modelID):
+    # One NDJSON line per entity as soon as the model has written it, then the whole output
+    start = time.time()
+    try:
+        jdAgent = JobDescriptionAgent(
+            apiKey=os.getenv('OPENROUTER_API_KEY'),
+            modelName=None,
+            systemPrompt=None,
+            useDefaultModelIfNone=True,
+            useDefaultSystemPromptIfNone=True,
+            modelID=modelID
+        )
+        jdAgent.setUserPrompt(text)
+        for entity, value in jdAgent.streamJsonOutput(cache=llm_cache.getCache()):
+            yield json.dumps({"entity": entity, "value": value}) + "\n"
+        yield json.dumps({'jd_entites': jdAgent.jsonOutput, 'prompt_stats': jdAgent.promptStats}) + "\n"
+        jdAgent.deleteAgent()
+    except Exception:
+        yield json.dumps({"error": "Internal error while processing the text"}) + "\n"
+    finally:
+        print(f"✅ JD extraction streamed in {time.time() - start:.2f}s")
+        gc.collect()
+
 @jd_extractor_bp.route("/extract_jd", methods=["POST"])
 @swag_from("docs/extract_jd.yml")
 def extract_jd():
@@ -16,6 +41,8 @@ def extract_jd():
     modelID = int(request.form.get("model_id"))
     if not text:
         return jsonify({"error": "Invalid input or missing text"}), 400
+    if request.form.get("stream", "").lower() in ("1", "true"):
+        return Response(stream_with_context(stream_extraction(text, modelID)), mimetype="application/x-ndjson")
     try:
         jdAgent = JobDescriptionAgent(
             apiKey=os.getenv('OPENROUTER_API_KEY'),
@@ -26,9 +53,10 @@ def extract_jd():
             modelID=modelID
         )
         jdAgent.setUserPrompt(text)
-        output = jdAgent.getJsonOutput()
+        output = jdAgent.getJsonOutput(cache=llm_cache.getCache())
+        promptStats = jdAgent.promptStats
         jdAgent.deleteAgent()
-        return jsonify({'jd_entites': output}), 200
+        return jsonify({'jd_entites': output, 'prompt_stats': promptStats}), 200
     except Exception:
         return jsonify({"error": "Internal error while processing the text"}), 500
     finally:
@@ -1,12 +1,37 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flasgger.utils import swag_from
 import os
 from src.resume_extractor_agent.resume_agent import ResumeAgent
+from src.utils import llm_cache
 import gc
+import json
 import time
 
 resume_extractor_bp = Blueprint("resume_extracter", __name__)
 
+def stream_extraction(text, modelID):
+    # One NDJSON line per entity as soon as the model has written it, then the whole output
+    start = time.time()
+    try:
+        resumeAgent = ResumeAgent(
+            apiKey=os.getenv('OPENROUTER_API_KEY'),
+            modelName=None,
+            systemPrompt=None,
+            useDefaultModelIfNone=True,
+            useDefaultSystemPromptIfNone=True,
+            modelID=modelID
+        )
+        resumeAgent.setUserPrompt(text)
+        for entity, value in resumeAgent.streamJsonOutput(cache=llm_cache.getCache()):
+            yield json.dumps({"entity": entity, "value": value}) + "\n"
+        yield json.dumps({'resume_entites': resumeAgent.jsonOutput, 'prompt_stats': resumeAgent.promptStats}) + "\n"
+        resumeAgent.deleteAgent()
+    except Exception:
+        yield json.dumps({"error": "Internal error while processing the text"}) + "\n"
+    finally:
+        print(f"✅ Resume extraction streamed in {time.time() - start:.2f}s")
+        gc.collect()
+
 @resume_extractor_bp.route("/extract_resume", methods=["POST"])
 @swag_from("docs/extract_resume.yml")
 def extract_resume():
@@ -16,6 +41,8 @@ def extract_resume():
     modelID = int(request.form.get("model_id"))
     if not text:
         return jsonify({"error": "Invalid input or missing text"}), 400
+    if request.form.get("stream", "").lower() in ("1", "true"):
+        return Response(stream_with_context(stream_extraction(text, modelID)), mimetype="application/x-ndjson")
     try:
         resumeAgent = ResumeAgent(
             apiKey=os.getenv('OPENROUTER_API_KEY'),
@@ -26,9 +53,10 @@ def extract_resume():
             modelID=modelID
         )
         resumeAgent.setUserPrompt(text)
-        output = resumeAgent.getJsonOutput()
+        output = resumeAgent.getJsonOutput(cache=llm_cache.getCache())
+        promptStats = resumeAgent.promptStats
         resumeAgent.deleteAgent()
-        return jsonify({'resume_entites': output}), 200
+        return jsonify({'resume_entites': output, 'prompt_stats': promptStats}), 200
     except Exception:
         return jsonify({"error": "Internal error while processing the text"}), 500
     finally:
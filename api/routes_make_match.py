@@ -1,11 +1,17 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flasgger.utils import swag_from
-from src.matchmaker_engine.matching_engine import MatchingEngine
+from src.matchmaker_engine.matching_engine import MatchingEngine, overallScore
+from src.matchmaker_engine.pipeline import ExtractAndMatchPipeline
+from src.utils import config
 import json
-import gc
 
 make_match_bp = Blueprint("make_match", __name__)
 
+# Built once per process, match() keeps no per-request state on the engine
+matchingEngine = MatchingEngine()
+extractAndMatchPipeline = ExtractAndMatchPipeline(matchingEngine)
+config = config.Config()
+
 @make_match_bp.route("/make_match", methods=["POST"])
 @swag_from("docs/make_match.yml")
 def make_match():
@@ -18,27 +24,102 @@ def make_match():
             jdJSON = json.loads(jdJSON)
         except Exception:
             return jsonify({"error": "Invalid input or missing input"}), 400
+    matchHandle = data.get("match_handle")
+    previousReport = data.get("previous_report")
     try:
-        matchMaker = MatchingEngine()
-        matchMaker.resume_json = resumeJSON
-        matchMaker.jd_json = jdJSON
-        matchReport = matchMaker.getMatch()
-        return jsonify({'match_report': matchReport}), 200
+        # Sending match_handle (null on the first match) or previous_report opts into re-matching
+        if "match_handle" not in data and "previous_report" not in data:
+            matchReport = matchingEngine.match(resumeJSON, jdJSON)
+            return jsonify({'match_report': matchReport}), 200
+        # Re-match: entities whose inputs did not change keep their previous scores
+        previousState = previousReport.get("entity_state") if isinstance(previousReport, dict) else None
+        matchReport, matchHandle, entityState = matchingEngine.rematch(
+            resumeJSON, jdJSON, matchHandle if isinstance(matchHandle, str) else None, previousState
+        )
+        return jsonify({'match_report': matchReport, 'match_handle': matchHandle, 'entity_state': entityState}), 200
     except Exception:
         return jsonify({"error": "Internal error while processing the input"}), 500
-    finally:
-        try:
-            if data: del data
-            if resumeJSON: del resumeJSON
-            if jdJSON: del jdJSON
-            if matchMaker: del matchMaker
-            if matchReport: del matchReport
-        except Exception:
-            pass
-        gc.collect()
 
-    
-    
+
+@make_match_bp.route("/extract_and_match", methods=["POST"])
+@swag_from("docs/extract_and_match.yml")
+def extract_and_match():
+    data = request.get_json(silent=True) or {}
+    resumeText = data.get("resume_text")
+    jdText = data.get("jd_text")
+    try:
+        modelID = int(data.get("model_id", 1))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid input or missing text"}), 400
+    if not resumeText or not jdText or not isinstance(resumeText, str) or not isinstance(jdText, str):
+        return jsonify({"error": "Invalid input or missing text"}), 400
+    matchHandle = data.get("match_handle")
+    previousReport = data.get("previous_report")
+    rematch = "match_handle" in data or "previous_report" in data
+    previousState = previousReport.get("entity_state") if isinstance(previousReport, dict) else None
+    try:
+        resumeJSON, jdJSON, matchReport, matchHandle, entityState = extractAndMatchPipeline.run(
+            resumeText, jdText, modelID, matchHandle if isinstance(matchHandle, str) else None, previousState, rematch
+        )
+    except Exception:
+        return jsonify({"error": "Internal error while processing the text"}), 500
+    response = {'resume_entites': resumeJSON, 'jd_entites': jdJSON, 'match_report': matchReport}
+    if rematch:
+        response.update({'match_handle': matchHandle, 'entity_state': entityState})
+    return jsonify(response), 200
+
+
+@make_match_bp.route("/make_match/cache_stats", methods=["GET"])
+@swag_from("docs/make_match_cache_stats.yml")
+def make_match_cache_stats():
+    return jsonify(matchingEngine.cacheStats()), 200
 
 
+def _load_json(value):
+    if isinstance(value, dict):
+        return value
+    try:
+        value = json.loads(value)
+    except Exception:
+        return None
+    return value if isinstance(value, dict) else None
+
+@make_match_bp.route("/make_match_batch", methods=["POST"])
+@swag_from("docs/make_match_batch.yml")
+def make_match_batch():
+    data = request.get_json(silent=True) or {}
+    resumeJSON = _load_json(data.get("resume_json"))
+    jdJSONs = data.get("jd_jsons")
+    topK = data.get("top_k")
+    stream = bool(data.get("stream", False))
+    if not resumeJSON or not isinstance(jdJSONs, list) or not jdJSONs:
+        return jsonify({"error": "Invalid input or missing input"}), 400
+    if len(jdJSONs) > config.MATCH_BATCH_MAX_JDS:
+        return jsonify({"error": f"At most {config.MATCH_BATCH_MAX_JDS} job descriptions per request"}), 400
+    jdJSONs = [_load_json(jdJSON) for jdJSON in jdJSONs]
+    if any(jdJSON is None for jdJSON in jdJSONs):
+        return jsonify({"error": "Invalid input or missing input"}), 400
+    if topK is not None and (not isinstance(topK, int) or isinstance(topK, bool) or topK < 1):
+        return jsonify({"error": "top_k must be a positive integer"}), 400
+
+    if not stream:
+        try:
+            results = matchingEngine.rank(resumeJSON, jdJSONs, topK)
+            return jsonify({"results": results}), 200
+        except Exception:
+            return jsonify({"error": "Internal error while processing the input"}), 500
+
+    def generate():
+        # One NDJSON line per job description as it finishes, then the final ranking
+        scores = []
+        try:
+            for index, matchReport in matchingEngine.iterRank(resumeJSON, jdJSONs):
+                score = overallScore(matchReport)
+                scores.append((score, -index))
+                yield json.dumps({"index": index, "overall_score": score, "match_report": matchReport}) + "\n"
+            ranking = [-negIndex for _, negIndex in sorted(scores, reverse=True)]
+            yield json.dumps({"ranking": ranking[:topK] if topK else ranking}) + "\n"
+        except Exception:
+            yield json.dumps({"error": "Internal error while processing the input"}) + "\n"
 
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
@@ -0,0 +1,84 @@
+# Accuracy versus throughput of cascade scoring on the bundled datasets.
+#
+# USAGE
+#   PYTHONPATH=. python benchmarks/cascade_report.py --low 0.3 --high 0.85
+#
+# Every matchmaker is run over its data/*_dataset.csv evaluation set with the full
+# two-model ensemble and with the cascade, where model2 finalizes clear pairs and
+# model1 only scores the ambiguous band. The report holds MAE and accuracy against the
+# labels, matches per second and the number of phrases model1 had to encode.
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+from src.utils import model_load
+from benchmarks.evaluate_modules import matchmaker_configs, matchmaker_dataset_columns, CustomAccuracy
+
+
+class CountingModel:
+    # Counts encoded phrases, has no modelKey so the embedding cache and store are bypassed
+    def __init__(self, model):
+        self.model = model
+        self.phrases = 0
+
+    def encode(self, phrases, **kwargs):
+        self.phrases += len(phrases)
+        return self.model.encode(phrases, **kwargs)
+
+
+def runMode(matcher, dataset, columns, cascade):
+    matcher.cascade = cascade
+    matcher.model1 = CountingModel(model_load.model1.load())
+    matcher.model2 = CountingModel(model_load.model2.load())
+    scores = []
+    start = time.perf_counter()
+    for i in tqdm(range(len(dataset))):
+        try:
+            resumeItems, jobItems = matcher.parseInputs(dataset[columns[0]].iloc[i], dataset[columns[1]].iloc[i])
+            scores.append(matcher.matchItems(resumeItems, jobItems))
+        except Exception:
+            scores.append(0.0)
+    elapsed = time.perf_counter() - start
+    return np.array(scores), elapsed, matcher.model1.phrases
+
+
+def runReport(low, high, sampleFactor=1.0):
+    accuracy = CustomAccuracy()
+    modes = {
+        "Full": {"ENABLED": False, "LOW": low, "HIGH": high},
+        "Cascade": {"ENABLED": True, "LOW": low, "HIGH": high},
+    }
+    results = {}
+    for moduleName, moduleConfig in matchmaker_configs.items():
+        print(f"Running cascade report for {moduleName}...")
+        columns = matchmaker_dataset_columns[moduleName]
+        dataset = pd.read_csv(moduleConfig["dataset_path"])
+        dataset = dataset.sample(frac=sampleFactor, random_state=1).reset_index(drop=True)
+        labels = dataset[columns[2]].to_numpy(dtype=float)
+        matcher = moduleConfig["matcher_class"]()
+        for modeName, cascade in modes.items():
+            scores, elapsed, model1Phrases = runMode(matcher, dataset, columns, cascade)
+            results[f"{moduleName} ({modeName})"] = {
+                "MAE": round(float(np.abs(scores - labels).mean()), 4),
+                "Accuracy": round(float(accuracy(labels, scores)), 2),
+                "Matches/s": round(len(dataset) / elapsed, 2) if elapsed else None,
+                "Model1 Phrases": model1Phrases,
+                "Support": len(dataset),
+            }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare cascade scoring against the full ensemble.")
+    parser.add_argument("--low", type=float, default=0.3)
+    parser.add_argument("--high", type=float, default=0.85)
+    parser.add_argument("--sample", type=float, default=1.0)
+    parser.add_argument("--output", default="benchmarks/results/cascade_report.csv")
+    args = parser.parse_args()
+
+    report = pd.DataFrame(runReport(args.low, args.high, args.sample)).T
+    print(report.to_string())
+    report.to_csv(args.output, index=True)
+    print(f"Results saved to {args.output}")
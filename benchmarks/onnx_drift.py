@@ -0,0 +1,85 @@
+# Score drift of the ONNX Runtime backend against the PyTorch encoders.
+#
+# USAGE (after python -m src.utils.onnx_backend)
+#   PYTHONPATH=. python benchmarks/onnx_drift.py --quantization avx2
+#
+# Every matchmaker is run over its data/*_dataset.csv evaluation set once with the
+# fine-tuned PyTorch models and once with the exported ONNX models. The report holds
+# the mean and max absolute score difference, the MAE of both backends against the
+# labels and the time spent per backend.
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+from src.utils import config
+from src.utils import onnx_backend
+from benchmarks.evaluate_modules import matchmaker_configs, matchmaker_dataset_columns
+
+config = config.Config()
+
+
+def scoreDataset(matcher, dataset, columns):
+    scores = []
+    start = time.perf_counter()
+    for i in tqdm(range(len(dataset))):
+        try:
+            resumeItems, jobItems = matcher.parseInputs(dataset[columns[0]].iloc[i], dataset[columns[1]].iloc[i])
+            scores.append(matcher.matchItems(resumeItems, jobItems))
+        except Exception:
+            scores.append(0.0)
+    return np.array(scores), time.perf_counter() - start
+
+
+def runDrift(backends, sampleFactor=1.0):
+    results = {}
+    for moduleName, moduleConfig in matchmaker_configs.items():
+        print(f"Running drift check for {moduleName}...")
+        columns = matchmaker_dataset_columns[moduleName]
+        dataset = pd.read_csv(moduleConfig["dataset_path"])
+        dataset = dataset.sample(frac=sampleFactor, random_state=1).reset_index(drop=True)
+        labels = dataset[columns[2]].to_numpy(dtype=float)
+        matcher = moduleConfig["matcher_class"]()
+        scores = {}
+        timings = {}
+        for backend, (model1, model2) in backends.items():
+            matcher.model1, matcher.model2 = model1, model2
+            scores[backend], timings[backend] = scoreDataset(matcher, dataset, columns)
+        drift = np.abs(scores["onnx"] - scores["torch"])
+        results[moduleName] = {
+            "Mean Drift": round(float(drift.mean()), 4),
+            "Max Drift": round(float(drift.max()), 4),
+            "Torch MAE": round(float(np.abs(scores["torch"] - labels).mean()), 4),
+            "ONNX MAE": round(float(np.abs(scores["onnx"] - labels).mean()), 4),
+            "Torch Time (s)": round(timings["torch"], 2),
+            "ONNX Time (s)": round(timings["onnx"], 2),
+            "Support": len(dataset),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare ONNX and PyTorch matchmaker scores.")
+    parser.add_argument("--quantization", default=config.ONNX_QUANTIZATION or "none", choices=list(onnx_backend.QUANTIZATION_CONFIGS) + ["none"])
+    parser.add_argument("--sample", type=float, default=1.0)
+    parser.add_argument("--output", default="benchmarks/results/onnx_drift.csv")
+    args = parser.parse_args()
+    quantization = None if args.quantization == "none" else args.quantization
+
+    # Models without a modelKey bypass the embedding store and cache, so both backends really encode
+    backends = {
+        "torch": (
+            onnx_backend.loadFineTunedModel(config.MODEL_NAME_1, config.MODEL_1_WEIGHTS),
+            onnx_backend.loadFineTunedModel(config.MODEL_NAME_2, config.MODEL_2_WEIGHTS),
+        ),
+        "onnx": (
+            onnx_backend.loadOnnxModel(onnx_backend.exportPath(1), quantization),
+            onnx_backend.loadOnnxModel(onnx_backend.exportPath(2), quantization),
+        ),
+    }
+    results = runDrift(backends, args.sample)
+    report = pd.DataFrame(results).T
+    print(report.to_string())
+    report.to_csv(args.output, index=True)
+    print(f"Results saved to {args.output}")
@@ -0,0 +1,68 @@
+# Recall versus latency of the IVF candidate index against a brute force scan.
+#
+# USAGE
+#   PYTHONPATH=. python benchmarks/vector_index_recall.py --size 50000 --candidates 300
+#
+# The corpus is synthetic: unit vectors drawn around random topic centres, which is
+# how pooled resume embeddings cluster by field. For every nprobe the report holds
+# recall@candidates against the exact top candidates and the mean query latency, next
+# to the brute force baseline.
+
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from src.utils.vector_index import IVFIndex
+
+
+def syntheticCorpus(size, dim, topics, spread, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((topics, dim)).astype(np.float32)
+    centres /= np.linalg.norm(centres, axis=1, keepdims=True)
+    vectors = centres[rng.integers(0, topics, size)] + spread * rng.standard_normal((size, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def timeQueries(search, queries):
+    start = time.perf_counter()
+    results = [set(documentId for documentId, _ in search(query)) for query in queries]
+    return results, (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def runReport(size, dim, queries, candidates, nlist, probes, topics=200, spread=0.08):
+    vectors = syntheticCorpus(size + queries, dim, topics, spread)
+    corpus, queryVectors = vectors[:size], vectors[size:]
+    start = time.perf_counter()
+    index = IVFIndex.build(range(size), corpus, nlist=nlist)
+    print(f"Built index over {size} vectors in {time.perf_counter() - start:.2f}s")
+
+    exact, bruteMs = timeQueries(lambda query: index.bruteForce(query, candidates), queryVectors)
+    rows = [{"Method": "Brute force", "nprobe": "-", "Recall": 1.0, "Latency (ms)": round(bruteMs, 3), "Speedup": 1.0}]
+    for nprobe in probes:
+        found, latencyMs = timeQueries(lambda query: index.search(query, candidates, nprobe=nprobe), queryVectors)
+        recall = np.mean([len(approx & truth) / len(truth) for approx, truth in zip(found, exact)])
+        rows.append({
+            "Method": "IVF",
+            "nprobe": nprobe,
+            "Recall": round(float(recall), 4),
+            "Latency (ms)": round(latencyMs, 3),
+            "Speedup": round(bruteMs / latencyMs, 1),
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall versus latency of the IVF index.")
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--candidates", type=int, default=300)
+    parser.add_argument("--nlist", type=int, default=256)
+    parser.add_argument("--probes", default="1,2,4,8,16,32,64")
+    parser.add_argument("--output", default="benchmarks/results/vector_index_recall.csv")
+    args = parser.parse_args()
+
+    report = runReport(args.size, args.dim, args.queries, args.candidates, args.nlist, [int(p) for p in args.probes.split(",")])
+    print(report.to_string(index=False))
+    report.to_csv(args.output, index=False)
+    print(f"Results saved to {args.output}")
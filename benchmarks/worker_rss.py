@@ -0,0 +1,63 @@
+# Per-worker memory with and without the pre-fork model load.
+#
+# USAGE
+#   PYTHONPATH=. python benchmarks/worker_rss.py --workers 4
+#
+# "per-worker" forks the workers first and lets each one load both models, which is
+# what happens without gunicorn's preload_app. "preload" loads the models once in the
+# parent, calls gc.freeze() and then forks, as gunicorn.conf.py does. Every worker
+# encodes a few phrases and reports its RSS, PSS (shared pages split between the
+# processes sharing them) and USS (pages only this worker holds).
+
+import os
+import gc
+import argparse
+import multiprocessing as mp
+import pandas as pd
+import psutil
+
+PHRASES = ["Python", "Machine Learning", "Bachelor of Technology in Computer Science", "Docker"]
+
+
+def _worker(results, name, preloaded):
+    from src.utils import model_load
+    if not preloaded:
+        model_load.warmup()
+    model_load.model1.load().encode(PHRASES)
+    model_load.model2.load().encode(PHRASES)
+    memory = psutil.Process().memory_full_info()
+    results.put((name, memory.rss, memory.pss, memory.uss))
+
+
+def measure(mode, workers):
+    context = mp.get_context("fork")
+    results = context.Queue()
+    if mode == "preload":
+        from src.utils import model_load
+        model_load.warmup()
+        gc.freeze()
+    processes = [context.Process(target=_worker, args=(results, f"{mode}-{i}", mode == "preload")) for i in range(workers)]
+    for process in processes:
+        process.start()
+    rows = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return [
+        {"Mode": mode, "Worker": name, "RSS (MB)": round(rss / 2**20, 1), "PSS (MB)": round(pss / 2**20, 1), "USS (MB)": round(uss / 2**20, 1)}
+        for name, rss, pss, uss in rows
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure per-worker memory of the model pre-fork path.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--output", default="benchmarks/results/worker_rss.csv")
+    args = parser.parse_args()
+
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    rows = measure("per-worker", args.workers) + measure("preload", args.workers)
+    report = pd.DataFrame(rows)
+    print(report.to_string(index=False))
+    print(report.groupby("Mode")[["RSS (MB)", "PSS (MB)", "USS (MB)"]].mean().round(1).to_string())
+    report.to_csv(args.output, index=False)
+    print(f"Results saved to {args.output}")
@@ -2,13 +2,26 @@ import axios from 'axios';
 
 const BASE_URL = process.env.REACT_APP_BACKEND_URL || 'http://localhost:5001'; // Flask backend port
 
-export const makeMatch = async (resume_json, jd_json) => {
+export const makeMatch = async (resume_json, jd_json, previous_report = null) => {
+  // previous_report lets the backend reuse the scores of entities that did not change
   return axios.post(`${BASE_URL}/make_match`, 
-    { resume_json, jd_json },
+    { resume_json, jd_json, match_handle: previous_report?.match_handle ?? null, previous_report },
     {
       headers: {
         'Content-Type': 'application/json'
       }
     }
   );
-};
\ No newline at end of file
+};
+
+export const extractAndMatch = async (resume_text, jd_text, model_id, previous_report = null) => {
+  // Both extractions run concurrently on the backend, then the pair is matched
+  return axios.post(`${BASE_URL}/extract_and_match`,
+    { resume_text, jd_text, model_id, match_handle: previous_report?.match_handle ?? null, previous_report },
+    {
+      headers: {
+        'Content-Type': 'application/json'
+      }
+    }
+  );
+};
@@ -1,8 +1,7 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { parseResume, parseJD } from '../api/parse';
-import { extractResume, extractJD } from '../api/extract';
-import { makeMatch } from '../api/match';
+import { extractAndMatch } from '../api/match';
 import { addHistory, deleteAll } from '../api/history';
 import { deleteUser } from '../api/auth';
 import ScoreReport from '../components/ScoreReport';
@@ -27,6 +26,7 @@ const Dashboard = () => {
   const [resumeFile, setResumeFile] = useState(null);
   const [jobLink, setJobLink] = useState('');
   const [matchReport, setMatchReport] = useState(null);
+  const [lastMatchResponse, setLastMatchResponse] = useState(null);
   const [resumeMethod, setResumeMethod] = useState('none');
   const [jobMethod, setJobMethod] = useState('none');
   const [loadingMessage, setLoadingMessage] = useState('');
@@ -258,58 +258,22 @@ const Dashboard = () => {
         return;
       }
 
-      // Extract JSON from resume text
-      setLoadingMessage('Extracting Resume Entities...');
-      const resumeFormData = new FormData();
-      resumeFormData.append('resume_text', finalResumeText);
-      resumeFormData.append('model_id', selectedModel);
-      let resumeExtractResponse;
+      // Extract both sides concurrently and match them in one request
+      setLoadingMessage('Extracting Entities and Analyzing Match...');
+      let matchResponse;
       try {
-        resumeExtractResponse = await extractResume(resumeFormData);
-        if (!resumeExtractResponse.data || !resumeExtractResponse.data.resume_entites) {
+        matchResponse = await extractAndMatch(finalResumeText, finalJobDescription, selectedModel, lastMatchResponse);
+        if (!matchResponse.data || !matchResponse.data.match_report) {
           // First attempt failed, try once more
-          resumeExtractResponse = await extractResume(resumeFormData);
-          if (!resumeExtractResponse.data || !resumeExtractResponse.data.resume_entites) {
-            throw new Error('Failed to extract resume entities');
+          matchResponse = await extractAndMatch(finalResumeText, finalJobDescription, selectedModel, lastMatchResponse);
+          if (!matchResponse.data || !matchResponse.data.match_report) {
+            throw new Error(matchResponse.data?.error || 'Failed to generate match report');
           }
         }
-        finalResumeJSON = resumeExtractResponse.data.resume_entites;
+        finalResumeJSON = matchResponse.data.resume_entites;
+        finalJobJSON = matchResponse.data.jd_entites;
       } catch (error) {
-        alert('Failed to extract resume entities: ' + (error.message || 'Unknown error'));
-        setIsProcessing(false);
-        setLoadingMessage('');
-        return;
-      }
-
-      // Extract JSON from job description text
-      setLoadingMessage('Extracting Job Description Entities...');
-      const jdFormData = new FormData();
-      jdFormData.append('jd_text', finalJobDescription);
-      jdFormData.append('model_id', selectedModel);
-      
-      let jdExtractResponse;
-      try {
-        jdExtractResponse = await extractJD(jdFormData);
-        if (!jdExtractResponse.data || !jdExtractResponse.data.jd_entites) {
-          // First attempt failed, try once more
-          jdExtractResponse = await extractJD(jdFormData);
-          if (!jdExtractResponse.data || !jdExtractResponse.data.jd_entites) {
-            throw new Error('Failed to extract job description entities');
-          }
-        }
-        finalJobJSON = jdExtractResponse.data.jd_entites;
-      } catch (error) {
-        alert('Failed to extract job description entities: ' + (error.message || 'Unknown error'));
-        setIsProcessing(false);
-        setLoadingMessage('');
-        return;
-      }
-
-      // Make the match using the extracted JSONs
-      setLoadingMessage('Analyzing Match...');
-      const matchResponse = await makeMatch(finalResumeJSON, finalJobJSON);
-      if (!matchResponse.data || !matchResponse.data.match_report) {
-        alert('Failed to generate match report: ' + (matchResponse.data?.error || 'Unknown error'));
+        alert('Failed to generate match report: ' + (error.response?.data?.error || error.message || 'Unknown error'));
         setIsProcessing(false);
         setLoadingMessage('');
         return;
@@ -322,6 +286,7 @@ const Dashboard = () => {
 
       // Store the match report and show the modal
       setMatchReport(matchResponse.data.match_report);
+      setLastMatchResponse(matchResponse.data);
       setShowScoreReport(true);
       try{
         const token = localStorage.getItem('token') || sessionStorage.getItem('token');
@@ -0,0 +1,19 @@
+# gunicorn -c gunicorn.conf.py run:app
+#
+# preload_app imports run.py once in the master, which loads both models and freezes the
+# heap before forking. Workers then share the model pages copy-on-write instead of each
+# loading their own copy. Convert the weights first for a faster, pickle-free load:
+#   PYTHONPATH=. python src/utils/model_load.py --safetensors
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from src.utils import concurrency
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", concurrency.defaultWorkerCount()))
+# Workers size their torch threads and executors from WEB_CONCURRENCY
+os.environ["WEB_CONCURRENCY"] = str(workers)
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+preload_app = True
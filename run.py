@@ -1,6 +1,7 @@
 from api.app import create_app
 from src.utils import model_load
 
+import os
 import sys
 import signal
 import gc
@@ -17,4 +18,11 @@ def handle_exit(sig, frame):
 
 signal.signal(signal.SIGINT, handle_exit)
 
-app = create_app()
\ No newline at end of file
+app = create_app()
+
+# Workers that only serve the lightweight blueprints can skip loading the encoders with WARMUP_MODELS=0
+if os.getenv("WARMUP_MODELS", "1") == "1":
+    model_load.warmup()
+    # With gunicorn's preload_app this runs once in the master. Freezing moves the loaded
+    # objects out of the collector's reach, so forked workers keep sharing their pages.
+    gc.freeze()
@@ -22,6 +22,7 @@ setup(
     "dotenv==0.9.9",
     "python-dotenv==1.1.0",
     "openai==1.77.0",
+    "httpx==0.28.1",
     "cryptography==44.0.3",
     "typing==3.7.4.3",
     "pyyaml",
@@ -32,6 +33,7 @@ setup(
     "pytest-rerunfailures==15.1",
     "flaky==3.8.1",
     "sentence-transformers==4.1.0",
+    "optimum[onnxruntime]==1.24.0",
     "scikit-learn==1.6.1",
     "pandas==2.2.3",
     "numpy==2.2.5",
@@ -27,7 +27,7 @@ import gc
 import numpy as np
 from src.certification_matchmaker import config
 from src.utils import security
-from sklearn.metrics.pairwise import cosine_similarity
+from src.utils import embedding
 from src.utils.model_load import model1, model2
 
 config = config.Config()
@@ -83,6 +83,8 @@ class CertificationSimilarity:
 
 class CertificationMatching:
     def __init__(self, maxInputLength=None):
+        self.assignmentStrategy = embedding.checkAssignmentStrategy(config.ASSIGNMENT_STRATEGY)
+        self.cascade = config.CASCADE
         self.maxInputLength = maxInputLength
         self.model1 = model1
         self.model2 = model2
@@ -90,69 +92,59 @@ class CertificationMatching:
         self.jobCertification = None
         self.similarity = CertificationSimilarity()
     
-    def setInputs(self, resumeCertification, jobCertification):
+    def parseInputs(self, resumeCertification, jobCertification):
+        """Validates and sanitizes raw inputs without storing them on the matcher."""
         if resumeCertification is None or jobCertification is None:
             raise ValueError("Resume certification and job certification cannot be empty.")
         if not isinstance(resumeCertification,str):
             raise ValueError("Resume certification must be a string.")
         if not isinstance(jobCertification, str):
             raise ValueError("Job certification must be a string.")
-        self.resumeCertification = security.sanitizeInput(resumeCertification, self.maxInputLength).split(',')
-        self.jobCertification = security.sanitizeInput(jobCertification, self.maxInputLength).split(',')
+        return security.sanitizeInput(resumeCertification, self.maxInputLength).split(','), security.sanitizeInput(jobCertification, self.maxInputLength).split(',')
+
+    def setInputs(self, resumeCertification, jobCertification):
+        self.resumeCertification, self.jobCertification = self.parseInputs(resumeCertification, jobCertification)
     
-    def makeMatch(self):
-        if not self.model1 or not self.model2:
-            raise RuntimeError(f"Failed to load models")
-        if not self.resumeCertification or not self.jobCertification:
-            raise ValueError("Inputs are not set")
-        
+    def computeScores(self, resumeItems, jobItems, embeddings1=None, embeddings2=None):
+        """Scores parsed inputs into a new CertificationSimilarity without touching the matcher's state."""
+        similarity = CertificationSimilarity()
         try:
-            model1Scores = []
-            model2Scores = []
-            matchedCertifications = {}
-            ResumeEmbeddings1 = []
-            ResumeEmbeddings2 = []
-            for resumeCertification in self.resumeCertification:
-                resumeCertification = resumeCertification.strip()
-                resumeEmbeddings1 = self.model1.encode([resumeCertification])
-                resumeEmbeddings2 = self.model2.encode([resumeCertification])
-                ResumeEmbeddings1.append(resumeEmbeddings1)
-                ResumeEmbeddings2.append(resumeEmbeddings2)
-            for jobCertification in self.jobCertification:
-                maxModel1Score = 0
-                maxModel2Score = 1
-                jobCertification = jobCertification.strip()
-                jobEmbeddings1 = self.model1.encode([jobCertification])
-                jobEmbeddings2 = self.model2.encode([jobCertification])
-                currBest = None
-                for i, resumeCertification in enumerate(self.resumeCertification):
-                    if resumeCertification in matchedCertifications:
-                        continue
-                    if not jobCertification or not resumeCertification:
-                        continue
-                    resumeEmbeddings1 = ResumeEmbeddings1[i]
-                    resumeEmbeddings2 = ResumeEmbeddings2[i]
-                    similarity1 = max(float(cosine_similarity(jobEmbeddings1, resumeEmbeddings1)[0][0]), 0)
-                    similarity2 = max(float(cosine_similarity(jobEmbeddings2, resumeEmbeddings2)[0][0]), 0)
-                    if similarity1>maxModel1Score:
-                        maxModel1Score = similarity1
-                        maxModel2Score = similarity2
-                        currBest = resumeCertification
-                model1Scores.append(maxModel1Score)
-                model2Scores.append(maxModel2Score)
-                if currBest:
-                    matchedCertifications[currBest] = jobCertification
+            resumeItems = [item.strip() for item in resumeItems]
+            jobItems = [item.strip() for item in jobItems]
+            model1Matrix, model2Matrix = embedding.scoreMatrices(
+                self.model1, self.model2, jobItems, resumeItems, embeddings1, embeddings2, self.cascade
+            )
+            model1Scores, model2Scores = embedding.assignMatch(model1Matrix, model2Matrix, self.assignmentStrategy)
             
-            self.similarity.setModel1Score(model1Scores)
-            self.similarity.setModel2Score(model2Scores)
-            self.similarity.hardEnsemble()
+            similarity.setModel1Score(model1Scores)
+            similarity.setModel2Score(model2Scores)
+            similarity.hardEnsemble()
 
         except Exception as e:
             raise RuntimeError(f"Failed to make match: {e}")
-        scores = self.similarity.getEnsembleScore()
+        return similarity
+
+    def aggregateScores(self, scores):
+        """Combines the per-item ensemble scores into the entity score."""
         if not scores:
             return 0.0
         return min(1.0, np.mean(scores))
+
+    def matchItems(self, resumeItems, jobItems, embeddings1=None, embeddings2=None):
+        """Stateless counterpart of makeMatch for parsed inputs, safe to share between threads."""
+        if not self.model1 or not self.model2:
+            raise RuntimeError(f"Failed to load models")
+        if not resumeItems or not jobItems:
+            raise ValueError("Inputs are not set")
+        return self.aggregateScores(self.computeScores(resumeItems, jobItems, embeddings1, embeddings2).getEnsembleScore())
+
+    def makeMatch(self, embeddings1=None, embeddings2=None):
+        if not self.model1 or not self.model2:
+            raise RuntimeError(f"Failed to load models")
+        if not self.resumeCertification or not self.jobCertification:
+            raise ValueError("Inputs are not set")
+        self.similarity = self.computeScores(self.resumeCertification, self.jobCertification, embeddings1, embeddings2)
+        return self.aggregateScores(self.similarity.getEnsembleScore())
     
     def getSimilarityScore(self):
         if self.similarity.ensembleScore == []:
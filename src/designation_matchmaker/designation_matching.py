@@ -25,7 +25,7 @@ import gc
 import numpy as np
 from src.designation_matchmaker import config
 from src.utils import security
-from sklearn.metrics.pairwise import cosine_similarity
+from src.utils import embedding
 from src.utils.model_load import model1, model2
 config = config.Config()
 
@@ -80,6 +80,8 @@ class DesignationSimilarity:
 
 class DesignationMatching:
     def __init__(self, maxInputLength=None):
+        self.assignmentStrategy = embedding.checkAssignmentStrategy(config.ASSIGNMENT_STRATEGY)
+        self.cascade = config.CASCADE
         self.maxInputLength = maxInputLength
         self.model1 = model1
         self.model2 = model2
@@ -87,70 +89,59 @@ class DesignationMatching:
         self.jobDesignation = None
         self.similarity = DesignationSimilarity()
     
-    def setInputs(self, resumeDesignation, jobDesignation):
+    def parseInputs(self, resumeDesignation, jobDesignation):
+        """Validates and sanitizes raw inputs without storing them on the matcher."""
         if resumeDesignation is None or jobDesignation is None:
             raise ValueError("Resume designation and job designation cannot be empty.")
         if not isinstance(resumeDesignation,str):
             raise ValueError("Resume designation must be a string.")
         if not isinstance(jobDesignation, str):
             raise ValueError("Job designation must be a string.")
-        self.resumeDesignation = security.sanitizeInput(resumeDesignation, self.maxInputLength).split(',')
-        self.jobDesignation = security.sanitizeInput(jobDesignation, self.maxInputLength).split(',')
+        return security.sanitizeInput(resumeDesignation, self.maxInputLength).split(','), security.sanitizeInput(jobDesignation, self.maxInputLength).split(',')
+
+    def setInputs(self, resumeDesignation, jobDesignation):
+        self.resumeDesignation, self.jobDesignation = self.parseInputs(resumeDesignation, jobDesignation)
     
-    def makeMatch(self):
-        if not self.model1 or not self.model2:
-            raise RuntimeError(f"Failed to load models")
-        if not self.resumeDesignation or not self.jobDesignation:
-            raise ValueError("Inputs are not set")
-        
+    def computeScores(self, resumeItems, jobItems, embeddings1=None, embeddings2=None):
+        """Scores parsed inputs into a new DesignationSimilarity without touching the matcher's state."""
+        similarity = DesignationSimilarity()
         try:
-            model1Scores = []
-            model2Scores = []
-            matchedDesignations = {}
-            ResumeEmbeddings1 = []
-            ResumeEmbeddings2 = []
-            for resumeDesignation in self.resumeDesignation:
-                resumeDesignation = resumeDesignation.strip()
-                resumeEmbeddings1 = self.model1.encode([resumeDesignation])
-                resumeEmbeddings2 = self.model2.encode([resumeDesignation])
-                ResumeEmbeddings1.append(resumeEmbeddings1)
-                ResumeEmbeddings2.append(resumeEmbeddings2)
-            for jobDesignation in self.jobDesignation:
-                maxModel1Score = 0
-                maxModel2Score = 1
-                jobDesignation = jobDesignation.strip()
-                jobEmbeddings1 = self.model1.encode([jobDesignation])
-                jobEmbeddings2 = self.model2.encode([jobDesignation])
-                currBest = None
-                for i, resumeDesignation in enumerate(self.resumeDesignation):
-                    if resumeDesignation in matchedDesignations:
-                        continue
-                    resumeDesignation = resumeDesignation.strip()
-                    if not jobDesignation or not resumeDesignation:
-                        continue
-                    resumeEmbeddings1 = ResumeEmbeddings1[i]
-                    resumeEmbeddings2 = ResumeEmbeddings2[i]
-                    similarity1 = max(float(cosine_similarity(jobEmbeddings1, resumeEmbeddings1)[0][0]), 0)
-                    similarity2 = max(float(cosine_similarity(jobEmbeddings2, resumeEmbeddings2)[0][0]), 0)
-                    if similarity1>maxModel1Score:
-                        maxModel1Score = similarity1
-                        maxModel2Score = similarity2
-                        currBest = resumeDesignation
-                model1Scores.append(maxModel1Score)
-                model2Scores.append(maxModel2Score)
-                if currBest:
-                    matchedDesignations[currBest] = jobDesignation
+            resumeItems = [item.strip() for item in resumeItems]
+            jobItems = [item.strip() for item in jobItems]
+            model1Matrix, model2Matrix = embedding.scoreMatrices(
+                self.model1, self.model2, jobItems, resumeItems, embeddings1, embeddings2, self.cascade
+            )
+            model1Scores, model2Scores = embedding.assignMatch(model1Matrix, model2Matrix, self.assignmentStrategy)
             
-            self.similarity.setModel1Score(model1Scores)
-            self.similarity.setModel2Score(model2Scores)
-            self.similarity.hardEnsemble()
+            similarity.setModel1Score(model1Scores)
+            similarity.setModel2Score(model2Scores)
+            similarity.hardEnsemble()
 
         except Exception as e:
             raise RuntimeError(f"Failed to make match: {e}")
-        scores = self.similarity.getEnsembleScore()
+        return similarity
+
+    def aggregateScores(self, scores):
+        """Combines the per-item ensemble scores into the entity score."""
         if not scores:
             return 0.0
         return min(1.0, np.max(scores))
+
+    def matchItems(self, resumeItems, jobItems, embeddings1=None, embeddings2=None):
+        """Stateless counterpart of makeMatch for parsed inputs, safe to share between threads."""
+        if not self.model1 or not self.model2:
+            raise RuntimeError(f"Failed to load models")
+        if not resumeItems or not jobItems:
+            raise ValueError("Inputs are not set")
+        return self.aggregateScores(self.computeScores(resumeItems, jobItems, embeddings1, embeddings2).getEnsembleScore())
+
+    def makeMatch(self, embeddings1=None, embeddings2=None):
+        if not self.model1 or not self.model2:
+            raise RuntimeError(f"Failed to load models")
+        if not self.resumeDesignation or not self.jobDesignation:
+            raise ValueError("Inputs are not set")
+        self.similarity = self.computeScores(self.resumeDesignation, self.jobDesignation, embeddings1, embeddings2)
+        return self.aggregateScores(self.similarity.getEnsembleScore())
     
     def getSimilarityScore(self):
         if self.similarity.ensembleScore == []:
@@ -17,4 +17,6 @@ class Config:
             raise RuntimeError(f"Failed to load config.yml: {e}")
 
         # Set class attributes from config keys
-        self.MAX_INPUT_LENGTH = config.get("MAX_INPUT_LENGTH")
\ No newline at end of file
+        self.MAX_INPUT_LENGTH = config.get("MAX_INPUT_LENGTH")
+        self.ASSIGNMENT_STRATEGY = config.get("ASSIGNMENT_STRATEGY", "greedy")
+        self.CASCADE = config.get("CASCADE")
@@ -27,7 +27,7 @@
 import gc
 from src.education_matchmaker import config
 from src.utils import security
-from sklearn.metrics.pairwise import cosine_similarity
+from src.utils import embedding
 from src.utils.model_load import model1, model2
 import numpy as np
 
@@ -87,76 +87,67 @@ class EducationSimilarity:
 
 class EducationMatching:
     def __init__(self):
+        self.assignmentStrategy = embedding.checkAssignmentStrategy(config.ASSIGNMENT_STRATEGY)
+        self.cascade = config.CASCADE
         self.model1 = model1
         self.model2 = model2
         self.resumeEducation = None
         self.jobEducation = None
         self.similarity = EducationSimilarity()
     
-    def setInputs(self, resumeEducation, jobEducation):
+    def parseInputs(self, resumeEducation, jobEducation):
+        """Validates and sanitizes raw inputs without storing them on the matcher."""
         if resumeEducation is None or jobEducation is None:
             raise ValueError("Resume education and job education cannot be empty.")
         if not isinstance(resumeEducation, str):
             raise ValueError("Resume education must be a string.")
         if not isinstance(jobEducation, str):
             raise ValueError("Job education must be a string.")
-        self.resumeEducation = security.sanitizeInput(resumeEducation, config.MAX_INPUT_LENGTH).split(',')
-        self.jobEducation = security.sanitizeInput(jobEducation, config.MAX_INPUT_LENGTH).split(',')
+        return security.sanitizeInput(resumeEducation, config.MAX_INPUT_LENGTH).split(','), security.sanitizeInput(jobEducation, config.MAX_INPUT_LENGTH).split(',')
+
+    def setInputs(self, resumeEducation, jobEducation):
+        self.resumeEducation, self.jobEducation = self.parseInputs(resumeEducation, jobEducation)
     
-    def makeMatch(self):
-        if not self.model1 or not self.model2:
-            raise RuntimeError(f"Failed to load models")
-        if not self.resumeEducation or not self.jobEducation:
-            raise ValueError("Inputs are not set")
-        
+    def computeScores(self, resumeItems, jobItems, embeddings1=None, embeddings2=None):
+        """Scores parsed inputs into a new EducationSimilarity without touching the matcher's state."""
+        similarity = EducationSimilarity()
         try:
-            model1Scores = []
-            model2Scores = []
-            matchedEducations = {}
-            ResumeEmbeddings1 = []
-            ResumeEmbeddings2 = []
-            for resumeEducation in self.resumeEducation:
-                resumeEducation = resumeEducation.strip()
-                resumeEmbeddings1 = self.model1.encode([resumeEducation])
-                resumeEmbeddings2 = self.model2.encode([resumeEducation])
-                ResumeEmbeddings1.append(resumeEmbeddings1)
-                ResumeEmbeddings2.append(resumeEmbeddings2)
-            for jobEducation in self.jobEducation:
-                maxModel1Score = 0.0
-                maxModel2Score = 0.0
-                jobEducation = jobEducation.strip()
-                jobEmbeddings1 = self.model1.encode([jobEducation])
-                jobEmbeddings2 = self.model2.encode([jobEducation])
-                currBest = None
-                for i, resumeEducation in enumerate(self.resumeEducation):
-                    if resumeEducation in matchedEducations:
-                        continue
-                    resumeEducation = resumeEducation.strip()
-                    if not jobEducation or not resumeEducation:
-                        continue
-                    resumeEmbeddings1 = ResumeEmbeddings1[i]
-                    resumeEmbeddings2 = ResumeEmbeddings2[i]
-                    similarity1 = max(float(cosine_similarity(jobEmbeddings1, resumeEmbeddings1)[0][0]), 0.0)
-                    similarity2 = max(float(cosine_similarity(jobEmbeddings2, resumeEmbeddings2)[0][0]), 0.0)
-                    if similarity1>maxModel1Score:
-                        maxModel1Score = similarity1
-                        maxModel2Score = similarity2
-                        currBest = resumeEducation
-                model1Scores.append(maxModel1Score)
-                model2Scores.append(maxModel2Score)
-                if currBest:
-                    matchedEducations[currBest] = jobEducation
+            resumeItems = [item.strip() for item in resumeItems]
+            jobItems = [item.strip() for item in jobItems]
+            model1Matrix, model2Matrix = embedding.scoreMatrices(
+                self.model1, self.model2, jobItems, resumeItems, embeddings1, embeddings2, self.cascade
+            )
+            model1Scores, model2Scores = embedding.assignMatch(model1Matrix, model2Matrix, self.assignmentStrategy)
             
-            self.similarity.setModel1Score(model1Scores)
-            self.similarity.setModel2Score(model2Scores)
-            self.similarity.hardEnsemble()
+            similarity.setModel1Score(model1Scores)
+            similarity.setModel2Score(model2Scores)
+            similarity.hardEnsemble()
 
         except Exception as e:
             raise RuntimeError(f"Failed to make match: {e}")
-        scores = self.similarity.getEnsembleScore()
+        return similarity
+
+    def aggregateScores(self, scores):
+        """Combines the per-item ensemble scores into the entity score."""
         if not scores:
             return 0.0
         return min(1.0, max(scores))
+
+    def matchItems(self, resumeItems, jobItems, embeddings1=None, embeddings2=None):
+        """Stateless counterpart of makeMatch for parsed inputs, safe to share between threads."""
+        if not self.model1 or not self.model2:
+            raise RuntimeError(f"Failed to load models")
+        if not resumeItems or not jobItems:
+            raise ValueError("Inputs are not set")
+        return self.aggregateScores(self.computeScores(resumeItems, jobItems, embeddings1, embeddings2).getEnsembleScore())
+
+    def makeMatch(self, embeddings1=None, embeddings2=None):
+        if not self.model1 or not self.model2:
+            raise RuntimeError(f"Failed to load models")
+        if not self.resumeEducation or not self.jobEducation:
+            raise ValueError("Inputs are not set")
+        self.similarity = self.computeScores(self.resumeEducation, self.jobEducation, embeddings1, embeddings2)
+        return self.aggregateScores(self.similarity.getEnsembleScore())
     
     def getSimilarityScore(self):
         if self.similarity.ensembleScore is None:
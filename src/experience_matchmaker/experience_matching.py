@@ -29,7 +29,7 @@ import gc
 import numpy as np
 from src.experience_matchmaker import config
 from src.utils import security
-from sklearn.metrics.pairwise import cosine_similarity
+from src.utils import embedding
 from src.utils.model_load import model1, model2
 import regex as re
 
@@ -145,6 +145,8 @@ class ExperienceNumeralizer:
 
 class ExperienceMatching:
     def __init__(self):
+        self.assignmentStrategy = embedding.checkAssignmentStrategy(config.ASSIGNMENT_STRATEGY)
+        self.cascade = config.CASCADE
         self.model1 = model1
         self.model2 = model2
         self.resumeExperience = None
@@ -155,75 +157,72 @@ class ExperienceMatching:
         self.factor = 1
 
     
-    def setInputs(self, resumeExperience, jobExperience):
+    def parseInputs(self, resumeExperience, jobExperience):
+        """Validates and sanitizes raw inputs without storing them on the matcher."""
         if resumeExperience is None or jobExperience is None:
             raise ValueError("Resume Experience and job Experience cannot be empty.")
         if not isinstance(resumeExperience, str):
             raise ValueError("Resume Experience must be a string.")
         if not isinstance(jobExperience, str):
             raise ValueError("Job Experience must be a string.")
-        self.resumeExperience = security.sanitizeInput(resumeExperience, config.MAX_INPUT_LENGTH).split(',')
-        self.jobExperience = security.sanitizeInput(jobExperience, config.MAX_INPUT_LENGTH).split(',')
+        return security.sanitizeInput(resumeExperience, config.MAX_INPUT_LENGTH).split(','), security.sanitizeInput(jobExperience, config.MAX_INPUT_LENGTH).split(',')
+
+    def setInputs(self, resumeExperience, jobExperience):
+        self.resumeExperience, self.jobExperience = self.parseInputs(resumeExperience, jobExperience)
     
-    def makeMatch(self):
-        if not self.model1 or not self.model2:
-            raise RuntimeError(f"Failed to load models")
-        if not self.resumeExperience or not self.jobExperience:
-            raise ValueError("Inputs are not set")
+    def pairFactors(self, resumeItems, jobItems, resumeNumeralizer=None, jobNumeralizer=None):
+        """Years ratio for every (job, resume) pair, pairs without usable numerals keep the default factor."""
+        # Fresh numeralizers keep repeated calls independent of each other
+        resumeNumeralizer = resumeNumeralizer or ExperienceNumeralizer(mode="sum")
+        jobNumeralizer = jobNumeralizer or ExperienceNumeralizer(mode="sum")
+        resumeNumerals = np.array([resumeNumeralizer.extractYears(item) for item in resumeItems], dtype=np.float32)
+        jobNumerals = np.array([jobNumeralizer.extractYears(item) for item in jobItems], dtype=np.float32)
+        hasNumerals = (jobNumerals[:, None] != 0) & (resumeNumerals[None, :] != 0)
+        return np.where(hasNumerals, resumeNumerals[None, :] / np.where(jobNumerals == 0, 1, jobNumerals)[:, None], self.factor)
+
+    def computeScores(self, resumeItems, jobItems, embeddings1=None, embeddings2=None, resumeNumeralizer=None, jobNumeralizer=None):
+        """Scores parsed inputs into a new ExperienceSimilarity without touching the matcher's state."""
+        similarity = ExperienceSimilarity()
         try:
-            model1Scores = []
-            model2Scores = []
-            matchedExperiences = {}
-            ResumeEmbeddings1 = []
-            ResumeEmbeddings2 = []
-            ResumeNumerals = []
-            for resumeExperience in self.resumeExperience:
-                resumeExperience = resumeExperience.strip()
-                resumeEmbeddings1 = self.model1.encode([resumeExperience])
-                resumeEmbeddings2 = self.model2.encode([resumeExperience])
-                resumeNumeral = self.resumeNumeralizer.extractYears(resumeExperience)
-                ResumeEmbeddings1.append(resumeEmbeddings1)
-                ResumeEmbeddings2.append(resumeEmbeddings2)
-                ResumeNumerals.append(resumeNumeral)
-            for jobExperience in self.jobExperience:
-                maxModel1Score = 0
-                maxModel2Score = 1
-                jobExperience = jobExperience.strip()
-                jobNumeral = self.jobNumeralizer.extractYears(jobExperience)
-                jobEmbeddings1 = self.model1.encode([jobExperience])
-                jobEmbeddings2 = self.model2.encode([jobExperience])
-                currBest = None
-                for i, resumeExperience in enumerate(self.resumeExperience):
-                    if resumeExperience in matchedExperiences:
-                        continue
-                    resumeNumeral = ResumeNumerals[i]
-                    if resumeNumeral and jobNumeral:
-                        self.factor = resumeNumeral / jobNumeral
-                    if not jobExperience or not resumeExperience:
-                        continue
-                    resumeEmbeddings1 = ResumeEmbeddings1[i]
-                    resumeEmbeddings2 = ResumeEmbeddings2[i]
-                    similarity1 = min(1.0, max(float(cosine_similarity(jobEmbeddings1, resumeEmbeddings1)[0][0]), 0) * self.factor)
-                    similarity2 = min(1.0, max(float(cosine_similarity(jobEmbeddings2, resumeEmbeddings2)[0][0]), 0) * self.factor)
-                    if similarity1>maxModel1Score:
-                        maxModel1Score = similarity1
-                        maxModel2Score = similarity2
-                        currBest = resumeExperience
-                model1Scores.append(maxModel1Score)
-                model2Scores.append(maxModel2Score)
-                if currBest:
-                    matchedExperiences[currBest] = jobExperience
+            resumeItems = [item.strip() for item in resumeItems]
+            jobItems = [item.strip() for item in jobItems]
+            factors = self.pairFactors(resumeItems, jobItems, resumeNumeralizer, jobNumeralizer)
+            model1Matrix, model2Matrix = embedding.scoreMatrices(
+                self.model1, self.model2, jobItems, resumeItems, embeddings1, embeddings2, self.cascade
+            )
+            model1Matrix = np.minimum(1.0, model1Matrix * factors)
+            model2Matrix = np.minimum(1.0, model2Matrix * factors)
+            model1Scores, model2Scores = embedding.assignMatch(model1Matrix, model2Matrix, self.assignmentStrategy)
             
-            self.similarity.setModel1Score(model1Scores)
-            self.similarity.setModel2Score(model2Scores)
-            self.similarity.hardEnsemble()
+            similarity.setModel1Score(model1Scores)
+            similarity.setModel2Score(model2Scores)
+            similarity.hardEnsemble()
 
         except Exception as e:
             raise RuntimeError(f"Failed to make match: {e}")
-        scores = self.similarity.getEnsembleScore()
+        return similarity
+
+    def aggregateScores(self, scores):
+        """Combines the per-item ensemble scores into the entity score."""
         if not scores:
             return 0.0
         return min(1.0, np.mean(scores))
+
+    def matchItems(self, resumeItems, jobItems, embeddings1=None, embeddings2=None):
+        """Stateless counterpart of makeMatch for parsed inputs, safe to share between threads."""
+        if not self.model1 or not self.model2:
+            raise RuntimeError(f"Failed to load models")
+        if not resumeItems or not jobItems:
+            raise ValueError("Inputs are not set")
+        return self.aggregateScores(self.computeScores(resumeItems, jobItems, embeddings1, embeddings2).getEnsembleScore())
+
+    def makeMatch(self, embeddings1=None, embeddings2=None):
+        if not self.model1 or not self.model2:
+            raise RuntimeError(f"Failed to load models")
+        if not self.resumeExperience or not self.jobExperience:
+            raise ValueError("Inputs are not set")
+        self.similarity = self.computeScores(self.resumeExperience, self.jobExperience, embeddings1, embeddings2, self.resumeNumeralizer, self.jobNumeralizer)
+        return self.aggregateScores(self.similarity.getEnsembleScore())
     
     def getSimilarityScore(self):
         if self.similarity.ensembleScore is None:
@@ -97,19 +97,130 @@ from src.certification_matchmaker.certification_matching import CertificationMat
 from src.designation_matchmaker.designation_matching import DesignationMatching
 from dotenv import load_dotenv
 from src.utils.model_load import model1, model2
+from src.utils import embedding
+from src.utils import concurrency
+from src.utils import config
+from src.utils.report_cache import ReportCache, canonicalHash
 import time
+import heapq
+import json
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict
 import numpy as np
 load_dotenv()
-import torch
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
 import multiprocessing as mp
 import atexit
 import os
 import glob
 
+config = config.Config()
+
+ENTITIES = ["EDUCATION", "EXPERIENCE", "TECHNICAL_SKILL", "SOFT_SKILL", "TOOL", "CERTIFICATION", "DESIGNATION"]
+
+class MatchContext:
+    """Request-local state of a single match, never shared between calls."""
+    def __init__(self, resume_json, jd_json):
+        self.resume_json = resume_json
+        self.jd_json = jd_json
+        self.matchReport = {entity: 0.0 for entity in ENTITIES}
+        self.totalEntitiesWithScore = 0
+        self.totalScore = 0.0
+        # Raw per-entity scores (None when unscored) and input fingerprints, before fillMissing
+        self.entityScores = {}
+        self.fingerprints = {}
+        self.reused = set()
+        # Entities with inputs on both sides whose matcher failed, never reused or cached
+        self.failed = set()
+
+    def addScore(self, entity, score):
+        self.entityScores[entity] = score
+        self.matchReport[entity] = score
+        self.totalEntitiesWithScore += 1
+        self.totalScore += score
+
+    def addFailure(self, entity):
+        self.failed.add(entity)
+
+    def entityState(self):
+        """Fingerprint and raw score of every scored or input-less entity, what a later re-match can reuse."""
+        return {
+            entity: {"fingerprint": self.fingerprints[entity], "score": self.entityScores.get(entity)}
+            for entity in self.fingerprints if entity not in self.failed
+        }
+
+    def fillMissing(self):
+        # Entities without a score take the average of the scored ones
+        if not self.totalEntitiesWithScore:
+            return self.matchReport
+        avgScore = self.totalScore / self.totalEntitiesWithScore
+        for entity in self.matchReport:
+            if self.matchReport[entity] == 0.0:
+                self.matchReport[entity] = avgScore
+        return self.matchReport
+
+def overallScore(matchReport):
+    return sum(matchReport.values()) / len(matchReport) if matchReport else 0.0
+
+def entityFingerprint(entity, inputs, matcher):
+    # Hash of the normalized input pair and everything else that decides the entity score
+    resumeItems, jobItems = inputs if inputs is not None else (None, None)
+    payload = {
+        "entity": entity,
+        "resume": [item.strip() for item in resumeItems] if resumeItems is not None else None,
+        "job": [item.strip() for item in jobItems] if jobItems is not None else None,
+        "models": [embedding._modelKey(model1), embedding._modelKey(model2)],
+        "weights": [embedding._weightsHash(model1), embedding._weightsHash(model2)],
+        "strategy": getattr(matcher, "assignmentStrategy", None),
+        "cascade": getattr(matcher, "cascade", None),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def validEntityState(state):
+    """Keeps the well-formed entries of a client supplied entity state, drops the rest."""
+    if not isinstance(state, dict):
+        return {}
+    valid = {}
+    for entity, entry in state.items():
+        if entity not in ENTITIES or not isinstance(entry, dict) or not isinstance(entry.get("fingerprint"), str):
+            continue
+        score = entry.get("score")
+        if score is not None and (isinstance(score, bool) or not isinstance(score, (int, float)) or not 0.0 <= score <= 1.0):
+            continue
+        valid[entity] = {"fingerprint": entry["fingerprint"], "score": score}
+    return valid
+
+class MatchStateStore:
+    # Bounded LRU of entity states by match handle. Handles are per process, a handle
+    # minted by another worker simply misses and the match is computed in full.
+    def __init__(self, maxEntries):
+        self.maxEntries = maxEntries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, state):
+        handle = uuid.uuid4().hex
+        with self._lock:
+            self._entries[handle] = state
+            while len(self._entries) > self.maxEntries:
+                self._entries.popitem(last=False)
+        return handle
+
+    def get(self, handle):
+        with self._lock:
+            state = self._entries.get(handle)
+            if state is not None:
+                self._entries.move_to_end(handle)
+            return state
+
 class MatchingEngine:
+    # The matchers only hold models and configuration, every call to match() keeps its
+    # inputs and scores in a MatchContext, so one engine can serve concurrent requests.
+    # Matcher tasks run on the process-wide executor of src.utils.concurrency.
     def __init__(self):
         self.education_matcher = EducationMatching()
         self.experience_matcher = ExperienceMatching()
@@ -120,72 +231,215 @@ class MatchingEngine:
         self.designation_matcher = DesignationMatching()
         self.resume_json = None
         self.jd_json = None
-        self.matchReport = {
-            "EDUCATION": 0.0,
-            "EXPERIENCE": 0.0,
-            "TECHNICAL_SKILL": 0.0,
-            "SOFT_SKILL": 0.0,
-            "TOOL": 0.0,
-            "CERTIFICATION": 0.0,
-            "DESIGNATION": 0.0
-        }
+        self.matchReport = {entity: 0.0 for entity in ENTITIES}
+        self.matchStates = MatchStateStore(config.MATCH_HANDLE_CACHE_SIZE)
+        self.reportCache = ReportCache.fromConfig()
         self.matcher_map = {
-            "EDUCATION": EducationMatching(),
-            "EXPERIENCE": ExperienceMatching(),
-            "TECHNICAL_SKILL": TechnicalSkillMatching(),
-            "SOFT_SKILL": SoftSkillMatching(),
-            "TOOL": ToolMatching(),
-            "CERTIFICATION": CertificationMatching(),
-            "DESIGNATION": DesignationMatching()
+            "EDUCATION": self.education_matcher,
+            "EXPERIENCE": self.experience_matcher,
+            "TECHNICAL_SKILL": self.technical_skill_matcher,
+            "SOFT_SKILL": self.soft_skill_matcher,
+            "TOOL": self.tool_matcher,
+            "CERTIFICATION": self.certification_matcher,
+            "DESIGNATION": self.designation_matcher
         }
-        self.totalEntitiesWithScore = 0
-        self.totalScore = 0.0
     
-    def _run_matcher(self, entity):
+    def configVersion(self):
+        """Hash of the models, their weights and the matcher settings, part of every report cache key."""
+        return canonicalHash(
+            [embedding._modelKey(model1), embedding._modelKey(model2)],
+            # Retrained weights under the same model name must not serve reports of the old ones
+            [embedding._weightsHash(model1), embedding._weightsHash(model2)],
+            {entity: [getattr(matcher, "assignmentStrategy", None), getattr(matcher, "cascade", None)] for entity, matcher in self.matcher_map.items()},
+        )
+
+    def _is_cascaded(self, entity):
+        cascade = getattr(self.matcher_map[entity], "cascade", None)
+        return isinstance(cascade, dict) and bool(cascade.get("ENABLED"))
+
+    def _parse_inputs(self, entity, context):
         try:
-            resume_data = self.resume_json.get(entity, "")
-            jd_data = self.jd_json.get(entity, "")
+            resume_data = context.resume_json.get(entity, "")
+            jd_data = context.jd_json.get(entity, "")
             if not resume_data or not jd_data:
-                return (entity, 0.0)
-            matcher = self.matcher_map[entity]
-            matcher.setInputs(resume_data, jd_data)
-            score = matcher.makeMatch()
-            self.totalEntitiesWithScore += 1
-            self.totalScore += score
-            return (entity, score)
+                return None
+            return self.matcher_map[entity].parseInputs(resume_data, jd_data)
         except Exception as e:
-            return (entity, 0.0)
+            return None
 
-    def getMatch(self):
-        if not self.resume_json or not self.jd_json:
-            return self.matchReport
-        
-        total_start = time.time()
+    def _run_matcher(self, entity, inputs, embeddings1, embeddings2):
+        try:
+            if inputs is None:
+                return (entity, None)
+            resumeItems, jobItems = inputs
+            return (entity, self.matcher_map[entity].matchItems(resumeItems, jobItems, embeddings1, embeddings2))
+        except Exception as e:
+            return (entity, None)
+
+    def _build_tables(self, inputsList):
+        # Encode the phrases of every entity of every pair in one pass per model,
+        # the matchers then only slice the precomputed embeddings.
+        phrases1 = set()
+        phrases2 = set()
+        for inputs in inputsList:
+            for entity, entityInputs in inputs.items():
+                if entityInputs is None:
+                    continue
+                entityPhrases = {item.strip() for items in entityInputs for item in items if item.strip()}
+                phrases2.update(entityPhrases)
+                # Cascaded entities only encode their ambiguous pairs with model1
+                if not self._is_cascaded(entity):
+                    phrases1.update(entityPhrases)
+        try:
+            return embedding.buildTable(model1, phrases1), embedding.buildTable(model2, phrases2)
+        except Exception as e:
+            # Fall back to per-matcher encoding
+            return None, None
 
-        with ThreadPoolExecutor(max_workers=len(self.matchReport)) as executor:
-            futures = [executor.submit(self._run_matcher, entity) for entity in self.matchReport]
-            for future in as_completed(futures):
-                entity, score = future.result()
-                self.matchReport[entity] = score
+    def _reuse(self, context, inputs, previous):
+        # Entities whose fingerprint matches the previous state keep its score and are not run
+        pending = {}
+        for entity in ENTITIES:
+            context.fingerprints[entity] = entityFingerprint(entity, inputs[entity], self.matcher_map[entity])
+            entry = previous.get(entity) if previous else None
+            # An entity with inputs but no score failed before and is computed again
+            if entry is not None and entry["fingerprint"] == context.fingerprints[entity] and (entry["score"] is not None or inputs[entity] is None):
+                context.reused.add(entity)
+                if entry["score"] is not None:
+                    context.addScore(entity, entry["score"])
+                continue
+            pending[entity] = inputs[entity]
+        return pending
+
+    def prewarm(self, entity_json):
+        """Encodes the entity phrases of one side into the embedding cache before the match runs."""
+        if not isinstance(entity_json, dict):
+            return 0
+        phrases1 = set()
+        phrases2 = set()
+        for entity, matcher in self.matcher_map.items():
+            value = entity_json.get(entity, "")
+            if not value:
+                continue
+            try:
+                items = {item.strip() for item in matcher.parseInputs(value, value)[0] if item.strip()}
+            except Exception:
+                continue
+            phrases2.update(items)
+            if not self._is_cascaded(entity):
+                phrases1.update(items)
+        embedding.buildTable(model1, phrases1)
+        embedding.buildTable(model2, phrases2)
+        return len(phrases2)
+
+    def iterContexts(self, resume_json, jd_jsons, previousStates=None):
+        """Yields (index, MatchContext) for every job description as soon as all of its entities are scored."""
+        contexts = [MatchContext(resume_json, jd_json) for jd_json in jd_jsons]
+        inputsList = [
+            {entity: self._parse_inputs(entity, context) for entity in ENTITIES}
+            if isinstance(resume_json, dict) and resume_json and isinstance(context.jd_json, dict) and context.jd_json else None
+            for context in contexts
+        ]
+        previousStates = previousStates or [None] * len(contexts)
+        pendingList = [
+            self._reuse(context, inputs, validEntityState(previous)) if inputs is not None else None
+            for context, inputs, previous in zip(contexts, inputsList, previousStates)
+        ]
+        # The resume phrases are shared by every pair, so they are encoded once
+        embeddings1, embeddings2 = self._build_tables([pending for pending in pendingList if pending])
+
+        futures = {}
+        remaining = {}
+        for index, pending in enumerate(pendingList):
+            if not pending:
+                yield index, contexts[index]
+                continue
+            remaining[index] = len(pending)
+            for entity, inputs in pending.items():
+                future = concurrency.getExecutor().submit(self._run_matcher, entity, inputs, embeddings1, embeddings2)
+                futures[future] = index
+        for future in as_completed(futures):
+            index = futures[future]
+            entity, score = future.result()
+            if score is not None:
+                contexts[index].addScore(entity, score)
+            elif pendingList[index][entity] is not None:
+                contexts[index].addFailure(entity)
+            remaining[index] -= 1
+            if not remaining[index]:
+                yield index, contexts[index]
+
+    def iterRank(self, resume_json, jd_jsons):
+        """Yields (index, match report) for every job description as soon as all of its entities are scored."""
+        for index, context in self.iterContexts(resume_json, jd_jsons):
+            yield index, context.fillMissing()
+
+    def rank(self, resume_json, jd_jsons, topK=None):
+        """Scores one resume against many job descriptions, best overall score first."""
+        results = (
+            {"index": index, "overall_score": overallScore(report), "match_report": report}
+            for index, report in self.iterRank(resume_json, jd_jsons)
+        )
+        order = lambda result: (result["overall_score"], -result["index"])
+        if topK:
+            return heapq.nlargest(topK, results, key=order)
+        return sorted(results, key=order, reverse=True)
+
+    def match(self, resume_json, jd_json):
+        if not resume_json or not jd_json:
+            return MatchContext(resume_json, jd_json).matchReport
+        
+        cacheKey = None
+        if self.reportCache is not None:
+            cacheKey = self.reportCache.key(resume_json, jd_json, self.configVersion())
+            cached = self.reportCache.get(cacheKey)
+            if cached is not None:
+                return cached
 
+        total_start = time.time()
+        _, context = next(self.iterContexts(resume_json, [jd_json]))
+        matchReport = context.fillMissing()
         total_end = time.time()
         print(f"🚀 Total matching completed in {total_end - total_start:.2f}s")
 
-        avgScore = self.totalScore / self.totalEntitiesWithScore
-        for entity in self.matchReport:
-            if self.matchReport[entity] == 0.0:
-                self.matchReport[entity] = avgScore
-
-        return self.matchReport
+        # A report with failed entities is not cached, the next request computes it again
+        if context.failed:
+            print(f"⚠️ Match report not cached, failed entities: {', '.join(sorted(context.failed))}")
+        elif cacheKey is not None:
+            self.reportCache.put(cacheKey, matchReport)
+        return matchReport
 
-    
+    def cacheStats(self):
+        if self.reportCache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.reportCache.stats()}
 
+    def rematch(self, resume_json, jd_json, matchHandle=None, previousState=None):
+        """
+        Matches a pair and only recomputes the entities whose inputs changed since a previous match.
 
+        Args:
+            matchHandle (str): Handle returned by an earlier rematch() in this process
+            previousState (dict): entity_state of an earlier match, used when the handle is unknown
 
+        Returns:
+            tuple: (match report, new match handle, entity state)
+        """
+        previous = self.matchStates.get(matchHandle) if matchHandle else None
+        if previous is None:
+            previous = previousState
+        if not resume_json or not jd_json:
+            return MatchContext(resume_json, jd_json).matchReport, None, {}
 
-        
-            
+        total_start = time.time()
+        _, context = next(self.iterContexts(resume_json, [jd_json], [previous]))
+        matchReport = context.fillMissing()
+        total_end = time.time()
+        print(f"🚀 Total matching completed in {total_end - total_start:.2f}s ({len(context.reused)} entities reused)")
 
-    
+        state = context.entityState()
+        return matchReport, self.matchStates.put(state), state
 
-    
\ No newline at end of file
+    def getMatch(self):
+        self.matchReport = self.match(self.resume_json, self.jd_json)
+        return self.matchReport
@@ -0,0 +1,84 @@
+# Extract and match in one request.
+#
+# The resume and JD extractions are independent LLM calls, so they run concurrently on
+# the shared IO executor instead of one after the other. As soon as either side's JSON
+# arrives its entity phrases are encoded into the embedding cache on the matcher executor
+# while the other call is still in flight, and the final match only scores the pairs.
+
+import os
+import time
+from concurrent.futures import as_completed
+from src.resume_extractor_agent.resume_agent import ResumeAgent
+from src.jd_extractor_agent.jd_agent import JobDescriptionAgent
+from src.utils import concurrency
+from src.utils import llm_cache
+
+
+def extractEntities(agentClass, text, modelID, cache=None):
+    """Runs one extraction agent on the text and returns its JSON output."""
+    agent = agentClass(
+        apiKey=os.getenv('OPENROUTER_API_KEY'),
+        modelName=None,
+        systemPrompt=None,
+        useDefaultModelIfNone=True,
+        useDefaultSystemPromptIfNone=True,
+        modelID=modelID
+    )
+    try:
+        agent.setUserPrompt(text)
+        return agent.getJsonOutput(cache=cache)
+    finally:
+        agent.deleteAgent()
+
+
+class ExtractAndMatchPipeline:
+    def __init__(self, engine, executor=None, cpuExecutor=None):
+        """
+        Args:
+            engine (MatchingEngine): Engine used to prewarm the embeddings and score the pair
+            executor (Executor): Runs the extractions, the shared IO executor by default
+            cpuExecutor (Executor): Runs the prewarms, the shared matcher executor by default
+        """
+        self.engine = engine
+        self.executor = executor
+        self.cpuExecutor = cpuExecutor
+
+    def run(self, resumeText, jdText, modelID, matchHandle=None, previousState=None, rematch=False):
+        """
+        Returns (resume_json, jd_json, match_report, match_handle, entity_state). The handle
+        and state are None unless rematch is set.
+        """
+        if not resumeText or not jdText:
+            raise ValueError("Resume text and job description text cannot be empty.")
+        executor = self.executor or concurrency.getIOExecutor()
+        cpuExecutor = self.cpuExecutor or concurrency.getExecutor()
+        cache = llm_cache.getCache()
+        start = time.time()
+        extractions = {
+            executor.submit(extractEntities, ResumeAgent, resumeText, modelID, cache): "resume",
+            executor.submit(extractEntities, JobDescriptionAgent, jdText, modelID, cache): "jd",
+        }
+        outputs = {}
+        prewarms = []
+        for future in as_completed(extractions):
+            side = extractions[future]
+            try:
+                outputs[side] = future.result()
+            except Exception as e:
+                for pending in extractions:
+                    pending.cancel()
+                raise RuntimeError(f"Failed to extract the {side} entities: {e}") from e
+            print(f"⚙️  {side} extraction done in {time.time() - start:.2f}s, prewarming its embeddings...")
+            prewarms.append(cpuExecutor.submit(self.engine.prewarm, outputs[side]))
+        for future in prewarms:
+            try:
+                future.result()
+            except Exception as e:
+                # The match encodes whatever the prewarm missed
+                print(f"⚠️ Embedding prewarm failed: {e}")
+
+        resumeJSON, jdJSON = outputs["resume"], outputs["jd"]
+        if not rematch:
+            return resumeJSON, jdJSON, self.engine.match(resumeJSON, jdJSON), None, None
+        matchReport, matchHandle, entityState = self.engine.rematch(resumeJSON, jdJSON, matchHandle, previousState)
+        return resumeJSON, jdJSON, matchReport, matchHandle, entityState
@@ -0,0 +1,304 @@
+# Recruiter screening: one job description against every stored resume.
+#
+# USAGE
+#   PYTHONPATH=. python -m src.matchmaker_engine.screening --jd-json jd.json --collection match_history --top-k 20
+#
+# Resume JSONs are streamed from Mongo in batches. Each batch encodes its unique phrases
+# once per model (embedding store -> cache -> model), stacks the item embeddings of
+# every resume per entity and scores the whole batch against the job description with
+# one matrix multiply per entity and model. The per-resume assignment and ensemble run
+# on a process pool, and only a bounded top-k heap of reports is kept in memory.
+#
+# Only documents that carry a resume_json dict are screened: match_history stores one
+# per match, profiles only store resume_text and are skipped unless a resume_json was
+# added to them.
+#
+# The model1 cascade of the single-match path is not applied here, every batch is
+# already encoded with both models in one call each.
+#
+# With a vector index (src.utils.vector_index) only the SCREENING_CANDIDATES resumes
+# whose pooled model2 embedding is closest to the job description's are read and
+# scored. Build or refresh it with --build-index.
+
+import os
+import json
+import time
+import heapq
+import argparse
+import numpy as np
+from bson.objectid import ObjectId
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from src.matchmaker_engine.matching_engine import MatchingEngine, MatchContext, ENTITIES, overallScore
+from src.utils.model_load import model1, model2
+from src.utils import embedding
+from src.utils import concurrency
+from src.utils import config
+from src.utils.vector_index import IVFIndex, META_FILE
+
+config = config.Config()
+
+_workerEngine = None
+
+
+def _getWorkerEngine():
+    # Matchers only contribute configuration in the workers, the models are never loaded there
+    global _workerEngine
+    if _workerEngine is None:
+        _workerEngine = MatchingEngine()
+    return _workerEngine
+
+
+def _scoreEntity(matcher, jobItems, resumeItems, model1Matrix, model2Matrix):
+    if hasattr(matcher, "pairFactors"):
+        factors = matcher.pairFactors(resumeItems, jobItems)
+        model1Matrix = np.minimum(1.0, model1Matrix * factors)
+        model2Matrix = np.minimum(1.0, model2Matrix * factors)
+    model1Scores, model2Scores = embedding.assignMatch(model1Matrix, model2Matrix, matcher.assignmentStrategy)
+    similarity = type(matcher.similarity)()
+    similarity.setModel1Score(model1Scores)
+    similarity.setModel2Score(model2Scores)
+    similarity.hardEnsemble()
+    return matcher.aggregateScores(similarity.getEnsembleScore())
+
+
+def scoreBatch(jobSide, batchSide, size, engine=None):
+    """
+    Scores a batch of resumes against one job description.
+
+    Args:
+        jobSide (dict): entity -> (jobItems, model1 embeddings, model2 embeddings)
+        batchSide (dict): entity -> (per-resume item lists or None, stacked model1
+            embeddings, stacked model2 embeddings, row offset of every resume)
+        size (int): Number of resumes in the batch
+        engine (MatchingEngine): Supplies the matchers, a per-process engine by default
+
+    Returns:
+        list: (overall score, match report) for every resume of the batch, in order
+    """
+    engine = engine or _getWorkerEngine()
+    contexts = [MatchContext(None, None) for _ in range(size)]
+    for entity, (resumeItemsList, resume1, resume2, offsets) in batchSide.items():
+        if entity not in jobSide:
+            continue
+        jobItems, job1, job2 = jobSide[entity]
+        # One multiply per model scores the job items against every resume item of the batch
+        model1Matrix = embedding.similarityMatrix(job1, resume1)
+        model2Matrix = embedding.similarityMatrix(job2, resume2)
+        for position, resumeItems in enumerate(resumeItemsList):
+            if not resumeItems:
+                continue
+            columns = slice(offsets[position], offsets[position] + len(resumeItems))
+            try:
+                score = _scoreEntity(engine.matcher_map[entity], jobItems, resumeItems, model1Matrix[:, columns], model2Matrix[:, columns])
+            except Exception as e:
+                continue
+            contexts[position].addScore(entity, score)
+    results = []
+    for context in contexts:
+        report = context.fillMissing()
+        results.append((overallScore(report), report))
+    return results
+
+
+class ScreeningPipeline:
+    def __init__(self, engine=None, batchSize=256, topK=50, processes=None):
+        """
+        Args:
+            engine (MatchingEngine): Parses the inputs, a new engine by default
+            batchSize (int): Resumes read from Mongo and scored per task
+            topK (int): Size of the result heap
+            processes (int): Scoring processes, 0 scores in this process.
+                Defaults to the executor budget of src.utils.concurrency.
+        """
+        if batchSize <= 0:
+            raise ValueError("Batch size must be a positive integer.")
+        if topK < 1:
+            raise ValueError("Top K must be a positive integer.")
+        self.engine = engine or MatchingEngine()
+        self.batchSize = batchSize
+        self.topK = topK
+        self.processes = concurrency.executorWorkers() if processes is None else processes
+
+    def iterResumes(self, collection, query=None):
+        """Yields lists of (document id, resume_json) with at most batchSize entries."""
+        cursor = collection.find(query or {}, {"resume_json": 1}).batch_size(self.batchSize)
+        batch = []
+        for document in cursor:
+            resume_json = document.get("resume_json")
+            if not isinstance(resume_json, dict) or not resume_json:
+                continue
+            batch.append((str(document["_id"]), resume_json))
+            if len(batch) == self.batchSize:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _parseItems(self, entity, value):
+        # Both sides are sanitized the same way, so one side of parseInputs is enough
+        if not value:
+            return None
+        try:
+            return [item.strip() for item in self.engine.matcher_map[entity].parseInputs(value, value)[0]]
+        except Exception as e:
+            return None
+
+    def prepareJob(self, jd_json):
+        """Encodes the job description items once for the whole screening run."""
+        jobSide = {}
+        for entity in ENTITIES:
+            jobItems = self._parseItems(entity, jd_json.get(entity, ""))
+            if jobItems is None:
+                continue
+            jobSide[entity] = (jobItems, embedding.encodePhrases(model1, jobItems), embedding.encodePhrases(model2, jobItems))
+        return jobSide
+
+    def prepareBatch(self, jobSide, batch):
+        """Parses a batch of resumes and stacks their item embeddings per entity."""
+        parsed = {
+            entity: [self._parseItems(entity, resume_json.get(entity, "")) for _, resume_json in batch]
+            for entity in jobSide
+        }
+        phrases = {item for resumeItemsList in parsed.values() for resumeItems in resumeItemsList if resumeItems for item in resumeItems}
+        table1 = embedding.buildTable(model1, phrases)
+        table2 = embedding.buildTable(model2, phrases)
+        batchSide = {}
+        for entity, resumeItemsList in parsed.items():
+            offsets = []
+            stacked = []
+            for resumeItems in resumeItemsList:
+                offsets.append(len(stacked))
+                stacked.extend(resumeItems or [])
+            batchSide[entity] = (
+                resumeItemsList,
+                embedding.encodePhrases(model1, stacked, table1),
+                embedding.encodePhrases(model2, stacked, table2),
+                offsets,
+            )
+        return batchSide
+
+    def _pooledPhrases(self, json_data):
+        return [item for entity in ENTITIES for item in (self._parseItems(entity, json_data.get(entity, "")) or []) if item]
+
+    def pooledVectors(self, batch):
+        """Pooled model2 embedding of every resume of a batch, resumes without any item are left out."""
+        phraseLists = [self._pooledPhrases(resume_json) for _, resume_json in batch]
+        table = embedding.buildTable(model2, {phrase for phrases in phraseLists for phrase in phrases})
+        ids = []
+        vectors = []
+        for (documentId, _), phrases in zip(batch, phraseLists):
+            vector = embedding.pooledEmbedding(model2, phrases, table)
+            if vector is not None:
+                ids.append(documentId)
+                vectors.append(vector)
+        return ids, vectors
+
+    def buildIndex(self, collection, query=None, nlist=None, nprobe=None):
+        """Trains a vector index over the pooled embeddings of every resume in the collection."""
+        ids = []
+        vectors = []
+        for batch in self.iterResumes(collection, query):
+            batchIds, batchVectors = self.pooledVectors(batch)
+            ids.extend(batchIds)
+            vectors.extend(batchVectors)
+        if not ids:
+            raise ValueError("No resumes to index.")
+        return IVFIndex.build(ids, np.stack(vectors), nlist or config.VECTOR_INDEX_NLIST, nprobe or config.VECTOR_INDEX_NPROBE)
+
+    def indexResumes(self, index, batch):
+        """Inserts or refreshes a batch of (document id, resume_json) in an existing index."""
+        ids, vectors = self.pooledVectors(batch)
+        if ids:
+            index.add(ids, np.stack(vectors))
+        return len(ids)
+
+    def retrieve(self, jd_json, index, candidates=None):
+        """Ids of the resumes closest to the job description in the vector index."""
+        vector = embedding.pooledEmbedding(model2, self._pooledPhrases(jd_json))
+        if vector is None:
+            return []
+        return [documentId for documentId, _ in index.search(vector, candidates or config.SCREENING_CANDIDATES)]
+
+    def screen(self, jd_json, collection, query=None, topK=None, index=None, candidates=None):
+        """Scores the job description against every resume in the collection, best overall score first."""
+        if not isinstance(jd_json, dict) or not jd_json:
+            raise ValueError("Job description JSON cannot be empty.")
+        topK = self.topK if topK is None else topK
+        if topK < 1:
+            raise ValueError("Top K must be a positive integer.")
+        start = time.time()
+        if index is not None:
+            # Only the retrieved candidates go through the full entity scoring
+            query = dict(query or {})
+            query["_id"] = {"$in": [ObjectId(documentId) if ObjectId.is_valid(documentId) else documentId for documentId in self.retrieve(jd_json, index, candidates)]}
+        jobSide = self.prepareJob(jd_json)
+        heap = []
+        screened = 0
+
+        def collect(ids, results):
+            nonlocal screened
+            for documentId, (score, report) in zip(ids, results):
+                screened += 1
+                # Ties keep the earlier resume, the sequence number never compares two reports
+                entry = (score, -screened, documentId, report)
+                if len(heap) < topK:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+
+        if not self.processes:
+            for batch in self.iterResumes(collection, query):
+                collect([documentId for documentId, _ in batch], scoreBatch(jobSide, self.prepareBatch(jobSide, batch), len(batch), self.engine))
+        else:
+            with ProcessPoolExecutor(max_workers=self.processes) as pool:
+                pending = {}
+                for batch in self.iterResumes(collection, query):
+                    # Bounded in-flight work keeps memory flat however large the collection is
+                    while len(pending) >= 2 * self.processes:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            collect(pending.pop(future), future.result())
+                    future = pool.submit(scoreBatch, jobSide, self.prepareBatch(jobSide, batch), len(batch))
+                    pending[future] = [documentId for documentId, _ in batch]
+                for future in list(pending):
+                    collect(pending.pop(future), future.result())
+
+        print(f"🚀 Screened {screened} resumes in {time.time() - start:.2f}s")
+        return [
+            {"id": documentId, "overall_score": score, "match_report": report}
+            for score, _, documentId, report in sorted(heap, reverse=True)
+        ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Screen one job description against the stored resumes.")
+    parser.add_argument("--jd-json", required=True, help="File with the extracted job description JSON")
+    parser.add_argument("--collection", default="match_history", choices=["match_history", "profiles"])
+    parser.add_argument("--top-k", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--build-index", action="store_true", help="Rebuild the vector index of the collection first")
+    parser.add_argument("--no-index", action="store_true", help="Score every resume instead of the index candidates")
+    args = parser.parse_args()
+    if args.top_k < 1:
+        parser.error("--top-k must be a positive integer.")
+
+    from db import mongo_connector
+
+    with open(args.jd_json) as f:
+        jd_json = json.load(f)
+    collection = mongo_connector.db[args.collection]
+    pipeline = ScreeningPipeline(batchSize=args.batch_size, topK=args.top_k, processes=args.processes)
+    indexPath = str(config.VECTOR_INDEX_PATH)
+    index = None
+    if args.build_index:
+        print("⏳ Building the vector index...")
+        index = pipeline.buildIndex(collection)
+        index.save(indexPath)
+        print(f"✅ Indexed {len(index)} resumes to {indexPath}")
+    elif not args.no_index and os.path.exists(os.path.join(indexPath, META_FILE)):
+        index = IVFIndex.load(indexPath)
+    if args.no_index:
+        index = None
+    for rank, result in enumerate(pipeline.screen(jd_json, collection, index=index), start=1):
+        print(f"{rank}. {result['id']}: {result['overall_score']:.3f}")
@@ -24,14 +24,22 @@ import importlib.resources
 from src.utils import security
 from src.resume_extractor_agent import config
 from src.utils import llm_config_loader
+from src.utils import config as utils_config
+from src.utils import llm_client
+from src.utils import llm_policy
+from src.utils import llm_extraction
+from src.utils import prompt_compactor
 # Load configuration
 config = config.Config()
 llm_config = llm_config_loader.Config()
+utilsConfig = utils_config.Config()
     
-class ResumeAgent:
+class ResumeAgent(llm_extraction.ExtractionMixin):
     def __init__(self, apiKey, modelName, systemPrompt, useDefaultModelIfNone=True, useDefaultSystemPromptIfNone=True, modelID=1):
         if useDefaultModelIfNone and modelName is None:
             modelName = llm_config.MODEL_NAMES[modelID]["MODEL_NAME"]
+        # Only the default system prompt is known to produce the entity schema
+        self.validateSchema = useDefaultSystemPromptIfNone and systemPrompt is None
         if useDefaultSystemPromptIfNone and systemPrompt is None:
             systemPromptPath = config.DEFAULT_SYSTEM_PROMPT_PATH
             try:
@@ -49,20 +57,21 @@ class ResumeAgent:
         self.SCM = security.SecureKeyManager()
         self.SCM.store_key(apiKey)
         self.modelName = modelName
+        # Models tried after this one when it fails or stalls, see src/utils/llm_policy.py
+        self.failoverModels = llm_policy.failoverChain(modelName, llm_config.MODEL_NAMES or {}, utilsConfig.LLM_FAILOVER_TO_PAID)
         self.systemPrompt = systemPrompt
         self.response = None
         self.jsonOutput = None
         self.userPrompt = None
+        self.promptStats = None
         self.client = None
     
-    def getClient(self):
+    def getClient(self, maxRetries=None):
         if not self.client:
             try:
                 decryptedKey = self.SCM.get_key()
-                self.client = OpenAI(
-                    base_url="https://openrouter.ai/api/v1",
-                    api_key=decryptedKey,
-                )
+                # Borrowed from the process-wide pool, connections stay open between calls
+                self.client = llm_client.getClient(decryptedKey, clientClass=OpenAI, maxRetries=maxRetries)
                 decryptedKey = 'x' * len(decryptedKey)  # Clear the decrypted key from memory
                 del decryptedKey
                 gc.collect()  # Force garbage collection
@@ -72,7 +81,7 @@ class ResumeAgent:
     def deleteClient(self):
         if not self.client:
             raise ValueError("Client not initialized.")
-        self.client.close()
+        # The pooled client is shared with other agents, only the reference is dropped
         self.client = None
 
     def getAgentInfo(self):
@@ -93,16 +102,22 @@ class ResumeAgent:
     def setUserPrompt(self, userPrompt):
         if not userPrompt:
             raise ValueError("User prompt cannot be empty.")
+        if utilsConfig.PROMPT_COMPACTION_ENABLED and isinstance(userPrompt, (str, bytes)):
+            userPrompt, self.promptStats = prompt_compactor.compactPrompt(userPrompt, self.failoverModels, llm_config.MODEL_NAMES)
+            print(f"✂️  Prompt compacted from {self.promptStats['tokens_before']} to {self.promptStats['tokens_after']} tokens ({self.promptStats['tokens_saved']} saved)")
+            if not userPrompt:
+                raise ValueError("User prompt cannot be empty.")
         userPrompt = security.sanitizeInput(userPrompt, config.MAX_INPUT_LENGTH)
         self.userPrompt = userPrompt
     
-    def parseRespone(self):
-        if not self.response:
+    def parseRespone(self, response=None):
+        response = self.response if response is None else response
+        if not response:
             raise ValueError("No response found.")
         try:
-            startIndex = self.response.index('{')
-            endIndex = self.response.rindex('}') + 1
-            jsonString = self.response[startIndex:endIndex]
+            startIndex = response.index('{')
+            endIndex = response.rindex('}') + 1
+            jsonString = response[startIndex:endIndex]
             jsonOutput = json.loads(jsonString)
         except (ValueError, json.JSONDecodeError) as e:
             raise ValueError(f"Failed to parse JSON response: {e}")
@@ -147,19 +162,6 @@ class ResumeAgent:
         print(self.response)
         self.jsonOutput = self.parseRespone()
 
-    def getJsonOutput(self):
-        if not self.jsonOutput:
-            for _ in range(3):
-                try:
-                    self.getResponse()
-                    if self.jsonOutput:
-                        break
-                except ValueError:
-                    continue
-            if not self.jsonOutput:
-                raise ValueError("No JSON output found.")
-        return self.jsonOutput
-
     def getResponseText(self):
         if not self.response:
             try:
@@ -184,8 +186,6 @@ class ResumeAgent:
         return self.systemPrompt
 
     def resetAgent(self):
-        if self.client:
-            self.client.close()
         self.client = None
         self.response = None
         self.jsonOutput = None
@@ -18,4 +18,8 @@ class Config:
 
         # Set class attributes from config keys
         self.TECHNICAL_MAX_INPUT_LENGTH = config.get("TECHNICAL_MAX_INPUT_LENGTH")
-        self.SOFT_MAX_INPUT_LENGTH = config.get("SOFT_MAX_INPUT_LENGTH")
\ No newline at end of file
+        self.SOFT_MAX_INPUT_LENGTH = config.get("SOFT_MAX_INPUT_LENGTH")
+        self.TECHNICAL_ASSIGNMENT_STRATEGY = config.get("TECHNICAL_ASSIGNMENT_STRATEGY", "greedy")
+        self.SOFT_ASSIGNMENT_STRATEGY = config.get("SOFT_ASSIGNMENT_STRATEGY", "greedy")
+        self.TECHNICAL_CASCADE = config.get("TECHNICAL_CASCADE")
+        self.SOFT_CASCADE = config.get("SOFT_CASCADE")
@@ -5,7 +5,7 @@ import gc
 import numpy as np
 from src.skill_matchmaker import config
 from src.utils import security
-from sklearn.metrics.pairwise import cosine_similarity
+from src.utils import embedding
 from src.utils.model_load import model1, model2
 
 config = config.Config()
@@ -60,78 +60,69 @@ class SkillSimilarity:
         self.ensembleScore = []
 
 class SkillMatching:
-    def __init__(self, maxInputLength=None):
+    def __init__(self, maxInputLength=None, assignmentStrategy="greedy", cascade=None):
         self.maxInputLength = maxInputLength
+        self.assignmentStrategy = embedding.checkAssignmentStrategy(assignmentStrategy)
+        self.cascade = cascade
         self.model1 = model1
         self.model2 = model2
         self.resumeSkill = None
         self.jobSkill = None
         self.similarity = SkillSimilarity()
     
-    def setInputs(self, resumeSkill, jobSkill):
+    def parseInputs(self, resumeSkill, jobSkill):
+        """Validates and sanitizes raw inputs without storing them on the matcher."""
         if resumeSkill is None or jobSkill is None:
             raise ValueError("Resume skill and job skill cannot be empty.")
         if not isinstance(resumeSkill,str):
             raise ValueError("Resume skill must be a string.")
         if not isinstance(jobSkill, str):
             raise ValueError("Job skill must be a string.")
-        self.resumeSkill = security.sanitizeInput(resumeSkill, self.maxInputLength).split(',')
-        self.jobSkill = security.sanitizeInput(jobSkill, self.maxInputLength).split(',')
+        return security.sanitizeInput(resumeSkill, self.maxInputLength).split(','), security.sanitizeInput(jobSkill, self.maxInputLength).split(',')
+
+    def setInputs(self, resumeSkill, jobSkill):
+        self.resumeSkill, self.jobSkill = self.parseInputs(resumeSkill, jobSkill)
     
-    def makeMatch(self):
-        if not self.model1 or not self.model2:
-            raise RuntimeError(f"Failed to load models")
-        if not self.resumeSkill or not self.jobSkill:
-            raise ValueError("Inputs are not set")
-        
+    def computeScores(self, resumeItems, jobItems, embeddings1=None, embeddings2=None):
+        """Scores parsed inputs into a new SkillSimilarity without touching the matcher's state."""
+        similarity = SkillSimilarity()
         try:
-            model1Scores = []
-            model2Scores = []
-            matchedSkills = {}
-            ResumeEmbeddings1 = []
-            ResumeEmbeddings2 = []
-            for resumeSkill in self.resumeSkill:
-                resumeSkill = resumeSkill.strip()
-                resumeEmbeddings1 = self.model1.encode([resumeSkill])
-                resumeEmbeddings2 = self.model2.encode([resumeSkill])
-                ResumeEmbeddings1.append(resumeEmbeddings1)
-                ResumeEmbeddings2.append(resumeEmbeddings2)
-            for jobSkill in self.jobSkill:
-                maxModel1Score = 0
-                maxModel2Score = 1
-                jobSkill = jobSkill.strip()
-                jobEmbeddings1 = self.model1.encode([jobSkill])
-                jobEmbeddings2 = self.model2.encode([jobSkill])
-                currBest = None
-                for i, resumeSkill in enumerate(self.resumeSkill):
-                    if resumeSkill in matchedSkills:
-                        continue
-                    resumeSkill = resumeSkill.strip()
-                    if not jobSkill or not resumeSkill:
-                        continue
-                    resumeEmbeddings1 = ResumeEmbeddings1[i]
-                    resumeEmbeddings2 = ResumeEmbeddings2[i]
-                    similarity1 = max(float(cosine_similarity(jobEmbeddings1, resumeEmbeddings1)[0][0]), 0)
-                    similarity2 = max(float(cosine_similarity(jobEmbeddings2, resumeEmbeddings2)[0][0]), 0)
-                    if similarity1>maxModel1Score:
-                        maxModel1Score = similarity1
-                        maxModel2Score = similarity2
-                        currBest = resumeSkill
-                model1Scores.append(maxModel1Score)
-                model2Scores.append(maxModel2Score)
-                if currBest:
-                    matchedSkills[currBest] = jobSkill
+            resumeItems = [item.strip() for item in resumeItems]
+            jobItems = [item.strip() for item in jobItems]
+            model1Matrix, model2Matrix = embedding.scoreMatrices(
+                self.model1, self.model2, jobItems, resumeItems, embeddings1, embeddings2, self.cascade
+            )
+            model1Scores, model2Scores = embedding.assignMatch(model1Matrix, model2Matrix, self.assignmentStrategy)
             
-            self.similarity.setModel1Score(model1Scores)
-            self.similarity.setModel2Score(model2Scores)
-            self.similarity.hardEnsemble()
+            similarity.setModel1Score(model1Scores)
+            similarity.setModel2Score(model2Scores)
+            similarity.hardEnsemble()
 
         except Exception as e:
             raise RuntimeError(f"Failed to make match: {e}")
-        scores = self.similarity.getEnsembleScore()
+        return similarity
+
+    def aggregateScores(self, scores):
+        """Combines the per-item ensemble scores into the entity score."""
         if not scores:
             return 0.0
         return min(1.0, np.mean(scores))
+
+    def matchItems(self, resumeItems, jobItems, embeddings1=None, embeddings2=None):
+        """Stateless counterpart of makeMatch for parsed inputs, safe to share between threads."""
+        if not self.model1 or not self.model2:
+            raise RuntimeError(f"Failed to load models")
+        if not resumeItems or not jobItems:
+            raise ValueError("Inputs are not set")
+        return self.aggregateScores(self.computeScores(resumeItems, jobItems, embeddings1, embeddings2).getEnsembleScore())
+
+    def makeMatch(self, embeddings1=None, embeddings2=None):
+        if not self.model1 or not self.model2:
+            raise RuntimeError(f"Failed to load models")
+        if not self.resumeSkill or not self.jobSkill:
+            raise ValueError("Inputs are not set")
+        self.similarity = self.computeScores(self.resumeSkill, self.jobSkill, embeddings1, embeddings2)
+        return self.aggregateScores(self.similarity.getEnsembleScore())
     
     def getSimilarityScore(self):
         if self.similarity.ensembleScore == []:
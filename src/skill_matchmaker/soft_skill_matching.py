@@ -34,5 +34,7 @@ class SoftSkillMatching(SkillMatching):
     def __init__(self, maxInputLength=None):
         super().__init__(
             maxInputLength=config.SOFT_MAX_INPUT_LENGTH if maxInputLength is None else maxInputLength,
+            assignmentStrategy=config.SOFT_ASSIGNMENT_STRATEGY,
+            cascade=config.SOFT_CASCADE,
         )
 
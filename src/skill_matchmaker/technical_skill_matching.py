@@ -35,4 +35,6 @@ class TechnicalSkillMatching(SkillMatching):
     def __init__(self, maxInputLength=None):
         super().__init__(
             maxInputLength=config.TECHNICAL_MAX_INPUT_LENGTH if maxInputLength is None else maxInputLength,
+            assignmentStrategy=config.TECHNICAL_ASSIGNMENT_STRATEGY,
+            cascade=config.TECHNICAL_CASCADE,
         )
\ No newline at end of file
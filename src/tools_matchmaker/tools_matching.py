@@ -27,7 +27,7 @@ import gc
 import numpy as np
 from src.tools_matchmaker import config
 from src.utils import security
-from sklearn.metrics.pairwise import cosine_similarity
+from src.utils import embedding
 from src.utils.model_load import model1, model2
 
 config = config.Config()
@@ -83,6 +83,8 @@ class ToolSimilarity:
 
 class ToolMatching:
     def __init__(self, maxInputLength=None):
+        self.assignmentStrategy = embedding.checkAssignmentStrategy(config.ASSIGNMENT_STRATEGY)
+        self.cascade = config.CASCADE
         self.maxInputLength = maxInputLength
         self.model1 = model1
         self.model2 = model2
@@ -90,70 +92,59 @@ class ToolMatching:
         self.jobTool = None
         self.similarity = ToolSimilarity()
     
-    def setInputs(self, resumeTool, jobTool):
+    def parseInputs(self, resumeTool, jobTool):
+        """Validates and sanitizes raw inputs without storing them on the matcher."""
         if resumeTool is None or jobTool is None:
             raise ValueError("Resume tools and job tools cannot be empty.")
         if not isinstance(resumeTool,str):
             raise ValueError("Resume tools must be a string.")
         if not isinstance(jobTool, str):
             raise ValueError("Job tools must be a string.")
-        self.resumeTool = security.sanitizeInput(resumeTool, self.maxInputLength).split(',')
-        self.jobTool = security.sanitizeInput(jobTool, self.maxInputLength).split(',')
+        return security.sanitizeInput(resumeTool, self.maxInputLength).split(','), security.sanitizeInput(jobTool, self.maxInputLength).split(',')
+
+    def setInputs(self, resumeTool, jobTool):
+        self.resumeTool, self.jobTool = self.parseInputs(resumeTool, jobTool)
     
-    def makeMatch(self):
-        if not self.model1 or not self.model2:
-            raise RuntimeError(f"Failed to load models")
-        if not self.resumeTool or not self.jobTool:
-            raise ValueError("Inputs are not set")
-        
+    def computeScores(self, resumeItems, jobItems, embeddings1=None, embeddings2=None):
+        """Scores parsed inputs into a new ToolSimilarity without touching the matcher's state."""
+        similarity = ToolSimilarity()
         try:
-            model1Scores = []
-            model2Scores = []
-            matchedTools = {}
-            ResumeEmbeddings1 = []
-            ResumeEmbeddings2 = []
-            for resumeTool in self.resumeTool:
-                resumeTool = resumeTool.strip()
-                resumeEmbeddings1 = self.model1.encode([resumeTool])
-                resumeEmbeddings2 = self.model2.encode([resumeTool])
-                ResumeEmbeddings1.append(resumeEmbeddings1)
-                ResumeEmbeddings2.append(resumeEmbeddings2)
-            for jobTool in self.jobTool:
-                maxModel1Score = 0
-                maxModel2Score = 1
-                jobTool = jobTool.strip()
-                jobEmbeddings1 = self.model1.encode([jobTool])
-                jobEmbeddings2 = self.model2.encode([jobTool])  
-                currBest = None
-                for i, resumeTool in enumerate(self.resumeTool):
-                    if resumeTool in matchedTools:
-                        continue
-                    resumeTool = resumeTool.strip()
-                    if not jobTool or not resumeTool:
-                        continue
-                    resumeEmbeddings1 = ResumeEmbeddings1[i]
-                    resumeEmbeddings2 = ResumeEmbeddings2[i]
-                    similarity1 = max(float(cosine_similarity(jobEmbeddings1, resumeEmbeddings1)[0][0]), 0)
-                    similarity2 = max(float(cosine_similarity(jobEmbeddings2, resumeEmbeddings2)[0][0]), 0)
-                    if similarity1>maxModel1Score:
-                        maxModel1Score = similarity1
-                        maxModel2Score = similarity2
-                        currBest = resumeTool
-                model1Scores.append(maxModel1Score)
-                model2Scores.append(maxModel2Score)
-                if currBest:
-                    matchedTools[currBest] = jobTool
+            resumeItems = [item.strip() for item in resumeItems]
+            jobItems = [item.strip() for item in jobItems]
+            model1Matrix, model2Matrix = embedding.scoreMatrices(
+                self.model1, self.model2, jobItems, resumeItems, embeddings1, embeddings2, self.cascade
+            )
+            model1Scores, model2Scores = embedding.assignMatch(model1Matrix, model2Matrix, self.assignmentStrategy)
             
-            self.similarity.setModel1Score(model1Scores)
-            self.similarity.setModel2Score(model2Scores)
-            self.similarity.hardEnsemble()
+            similarity.setModel1Score(model1Scores)
+            similarity.setModel2Score(model2Scores)
+            similarity.hardEnsemble()
 
         except Exception as e:
             raise RuntimeError(f"Failed to make match: {e}")
-        scores = self.similarity.getEnsembleScore()
+        return similarity
+
+    def aggregateScores(self, scores):
+        """Combines the per-item ensemble scores into the entity score."""
         if not scores:
             return 0.0
         return min(1.0, np.mean(scores))
+
+    def matchItems(self, resumeItems, jobItems, embeddings1=None, embeddings2=None):
+        """Stateless counterpart of makeMatch for parsed inputs, safe to share between threads."""
+        if not self.model1 or not self.model2:
+            raise RuntimeError(f"Failed to load models")
+        if not resumeItems or not jobItems:
+            raise ValueError("Inputs are not set")
+        return self.aggregateScores(self.computeScores(resumeItems, jobItems, embeddings1, embeddings2).getEnsembleScore())
+
+    def makeMatch(self, embeddings1=None, embeddings2=None):
+        if not self.model1 or not self.model2:
+            raise RuntimeError(f"Failed to load models")
+        if not self.resumeTool or not self.jobTool:
+            raise ValueError("Inputs are not set")
+        self.similarity = self.computeScores(self.resumeTool, self.jobTool, embeddings1, embeddings2)
+        return self.aggregateScores(self.similarity.getEnsembleScore())
     
     def getSimilarityScore(self):
         if self.similarity.ensembleScore == []:
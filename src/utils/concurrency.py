@@ -0,0 +1,80 @@
+# Process-wide concurrency budget for the matching work.
+#
+# Every gunicorn worker gets cpu_count / WEB_CONCURRENCY cores. PyTorch's intra-op pool
+# is capped at that share, inter-op parallelism is kept small, and all matcher tasks of
+# all requests in the process run on one long-lived executor instead of per-request
+# pools, so concurrent requests queue for CPU instead of oversubscribing it.
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.utils import config
+
+config = config.Config()
+
+_executor = None
+_executorPid = None
+_ioExecutor = None
+_ioExecutorPid = None
+_lock = threading.Lock()
+_torchConfigured = False
+
+
+def defaultWorkerCount():
+    """gunicorn workers when WEB_CONCURRENCY is unset, gunicorn.conf.py exports the result."""
+    return max(2, (os.cpu_count() or 1) // 2)
+
+
+def workerCount():
+    # gunicorn.conf.py sets WEB_CONCURRENCY before forking, a process started without it serves alone
+    try:
+        return max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+    except ValueError:
+        return 1
+
+
+def torchThreads():
+    if config.TORCH_THREADS:
+        return int(config.TORCH_THREADS)
+    return max(1, (os.cpu_count() or 1) // workerCount())
+
+
+def executorWorkers():
+    if config.MATCH_EXECUTOR_WORKERS:
+        return int(config.MATCH_EXECUTOR_WORKERS)
+    return max(2, torchThreads())
+
+
+def configureTorch(torch):
+    """Applies the thread budget once per process, before the first forward pass."""
+    global _torchConfigured
+    with _lock:
+        if _torchConfigured:
+            return
+        torch.set_num_threads(torchThreads())
+        try:
+            torch.set_num_interop_threads(int(config.TORCH_INTEROP_THREADS or 1))
+        except RuntimeError:
+            # Only allowed before any inter-op work has started in this process
+            pass
+        _torchConfigured = True
+
+
+def getExecutor():
+    # Threads do not survive a fork, so a forked worker builds its own executor
+    global _executor, _executorPid
+    with _lock:
+        if _executor is None or _executorPid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=executorWorkers(), thread_name_prefix="matcher")
+            _executorPid = os.getpid()
+        return _executor
+
+
+def getIOExecutor():
+    # Separate pool for calls that wait on the network (LLM extraction), they never take CPU slots from the matchers
+    global _ioExecutor, _ioExecutorPid
+    with _lock:
+        if _ioExecutor is None or _ioExecutorPid != os.getpid():
+            _ioExecutor = ThreadPoolExecutor(max_workers=int(config.IO_EXECUTOR_WORKERS or 16), thread_name_prefix="io")
+            _ioExecutorPid = os.getpid()
+        return _ioExecutor
@@ -10,8 +10,14 @@ class Config:
             configPath = importlib.resources.files('src.utils').joinpath('config.yml')
             model1_weights_path = importlib.resources.files('src.utils').joinpath('models/model1.pt')
             model2_weights_path = importlib.resources.files('src.utils').joinpath('models/model2.pt')
+            model1_safetensors_path = importlib.resources.files('src.utils').joinpath('models/model1.safetensors')
+            model2_safetensors_path = importlib.resources.files('src.utils').joinpath('models/model2.safetensors')
             with configPath.open('r') as file:
                 config = yaml.safe_load(file)
+            embedding_store_path = importlib.resources.files('src.utils').joinpath(config.get("EMBEDDING_STORE_DIR"))
+            onnx_path = importlib.resources.files('src.utils').joinpath(config.get("ONNX_DIR"))
+            vector_index_path = importlib.resources.files('src.utils').joinpath(config.get("VECTOR_INDEX_DIR"))
+            llm_cache_path = importlib.resources.files('src.utils').joinpath(config.get("LLM_CACHE_PATH"))
         except Exception as e:
             raise RuntimeError(f"Failed to load config.yml: {e}")
 
@@ -19,4 +25,54 @@ class Config:
         self.MODEL_NAME_1 = config.get("MODEL_NAME_1")
         self.MODEL_NAME_2 = config.get("MODEL_NAME_2")
         self.MODEL_1_WEIGHTS = model1_weights_path
-        self.MODEL_2_WEIGHTS = model2_weights_path
\ No newline at end of file
+        self.MODEL_2_WEIGHTS = model2_weights_path
+        self.MODEL_1_SAFETENSORS = model1_safetensors_path
+        self.MODEL_2_SAFETENSORS = model2_safetensors_path
+        self.EMBEDDING_CACHE_MAX_MB = config.get("EMBEDDING_CACHE_MAX_MB")
+        self.EMBEDDING_STORE_PATH = embedding_store_path
+        self.MODEL_BACKEND = config.get("MODEL_BACKEND", "torch")
+        self.ONNX_DIR = onnx_path
+        self.ONNX_QUANTIZATION = config.get("ONNX_QUANTIZATION")
+        self.MICRO_BATCH_ENABLED = config.get("MICRO_BATCH_ENABLED", False)
+        self.MICRO_BATCH_MAX_WAIT_MS = config.get("MICRO_BATCH_MAX_WAIT_MS", 5)
+        self.MICRO_BATCH_MAX_SIZE = config.get("MICRO_BATCH_MAX_SIZE", 256)
+        self.EMBEDDING_SERVER_SOCKET = config.get("EMBEDDING_SERVER_SOCKET")
+        self.EMBEDDING_SERVER_SHM_MB = config.get("EMBEDDING_SERVER_SHM_MB", 4)
+        self.TORCH_THREADS = config.get("TORCH_THREADS")
+        self.TORCH_INTEROP_THREADS = config.get("TORCH_INTEROP_THREADS", 1)
+        self.MATCH_EXECUTOR_WORKERS = config.get("MATCH_EXECUTOR_WORKERS")
+        self.VECTOR_INDEX_PATH = vector_index_path
+        self.VECTOR_INDEX_NLIST = config.get("VECTOR_INDEX_NLIST", 256)
+        self.VECTOR_INDEX_NPROBE = config.get("VECTOR_INDEX_NPROBE", 32)
+        self.SCREENING_CANDIDATES = config.get("SCREENING_CANDIDATES", 300)
+        self.MATCH_BATCH_MAX_JDS = config.get("MATCH_BATCH_MAX_JDS", 200)
+        self.MATCH_HANDLE_CACHE_SIZE = config.get("MATCH_HANDLE_CACHE_SIZE", 1024)
+        self.MATCH_CACHE_ENABLED = config.get("MATCH_CACHE_ENABLED", False)
+        self.MATCH_CACHE_MAX_ENTRIES = config.get("MATCH_CACHE_MAX_ENTRIES", 4096)
+        self.MATCH_CACHE_TTL_SECONDS = config.get("MATCH_CACHE_TTL_SECONDS", 86400)
+        self.MATCH_CACHE_DISK_PATH = config.get("MATCH_CACHE_DISK_PATH")
+        self.MATCH_CACHE_DISK_MAX_ENTRIES = config.get("MATCH_CACHE_DISK_MAX_ENTRIES", 100000)
+        self.LLM_CACHE_ENABLED = config.get("LLM_CACHE_ENABLED", False)
+        self.LLM_CACHE_PATH = llm_cache_path
+        self.LLM_CACHE_TTL_SECONDS = config.get("LLM_CACHE_TTL_SECONDS", 604800)
+        self.LLM_CACHE_MAX_ENTRIES = config.get("LLM_CACHE_MAX_ENTRIES", 50000)
+        self.LLM_BASE_URL = config.get("LLM_BASE_URL", "https://openrouter.ai/api/v1")
+        self.LLM_POOL_MAX_CONNECTIONS = config.get("LLM_POOL_MAX_CONNECTIONS", 20)
+        self.LLM_POOL_MAX_KEEPALIVE = config.get("LLM_POOL_MAX_KEEPALIVE", 10)
+        self.LLM_KEEPALIVE_EXPIRY_SECONDS = config.get("LLM_KEEPALIVE_EXPIRY_SECONDS", 120)
+        self.LLM_CONNECT_TIMEOUT_SECONDS = config.get("LLM_CONNECT_TIMEOUT_SECONDS", 5)
+        self.LLM_READ_TIMEOUT_SECONDS = config.get("LLM_READ_TIMEOUT_SECONDS", 60)
+        self.LLM_MAX_RETRIES = config.get("LLM_MAX_RETRIES", 2)
+        self.LLM_MAX_ATTEMPTS = config.get("LLM_MAX_ATTEMPTS", 4)
+        self.LLM_MAX_IN_FLIGHT = config.get("LLM_MAX_IN_FLIGHT", 2)
+        self.LLM_HEDGE_PERCENTILE = config.get("LLM_HEDGE_PERCENTILE", 90)
+        self.LLM_HEDGE_DELAY_SECONDS = config.get("LLM_HEDGE_DELAY_SECONDS", 12)
+        self.LLM_HEDGE_MIN_SAMPLES = config.get("LLM_HEDGE_MIN_SAMPLES", 20)
+        self.LLM_LATENCY_WINDOW = config.get("LLM_LATENCY_WINDOW", 200)
+        self.LLM_BACKOFF_BASE_SECONDS = config.get("LLM_BACKOFF_BASE_SECONDS", 0.5)
+        self.LLM_BACKOFF_MAX_SECONDS = config.get("LLM_BACKOFF_MAX_SECONDS", 8)
+        self.LLM_FAILOVER_TO_PAID = config.get("LLM_FAILOVER_TO_PAID", True)
+        self.EXTRACTION_REPAIR_ATTEMPTS = config.get("EXTRACTION_REPAIR_ATTEMPTS", 1)
+        self.PROMPT_COMPACTION_ENABLED = config.get("PROMPT_COMPACTION_ENABLED", True)
+        self.LLM_INPUT_TOKEN_BUDGET = config.get("LLM_INPUT_TOKEN_BUDGET", 6000)
+        self.IO_EXECUTOR_WORKERS = config.get("IO_EXECUTOR_WORKERS", 16)
@@ -0,0 +1,195 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from src.utils.embedding_cache import embeddingCache
+from src.utils.embedding_store import embeddingStore
+
+# Shared embedding helpers for the entity matchers.
+# Each side of a match is encoded with a single batched model call, the rows are
+# L2-normalised float32 vectors, and every (job, resume) pair is scored with one
+# matrix multiply instead of a per-pair cosine similarity call.
+# Models that carry a string `modelKey` attribute are served from the precomputed
+# dataset store first, then the process-wide embedding cache, and only the phrases
+# both miss reach model.encode().
+
+
+class EmbeddingTable:
+    # Precomputed, normalised embeddings of a set of unique phrases for one model.
+    def __init__(self, phrases, embeddings):
+        self.index = {phrase: row for row, phrase in enumerate(phrases)}
+        self.embeddings = embeddings
+
+    def __contains__(self, phrase):
+        return phrase in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def lookup(self, phrases):
+        rows = [self.index[phrase] for phrase in phrases]
+        return self.embeddings[rows]
+
+
+def _normalize(encoded):
+    encoded = np.asarray(encoded, dtype=np.float32)
+    norms = np.linalg.norm(encoded, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return encoded / norms
+
+
+def _modelKey(model):
+    modelKey = getattr(model, "modelKey", None)
+    return modelKey if isinstance(modelKey, str) else None
+
+
+def _weightsHash(model):
+    weightsHash = getattr(model, "weightsHash", None)
+    return weightsHash if isinstance(weightsHash, str) else None
+
+
+def _encode(model, phrases, **kwargs):
+    # Normalised embeddings for a list of unique, non-empty phrases.
+    modelKey = _modelKey(model)
+    if modelKey is None:
+        encoded = np.asarray(model.encode(phrases, **kwargs))
+        return _normalize(encoded.reshape(len(phrases), -1))
+    found, missing = embeddingStore.getMany(modelKey, phrases, _weightsHash(model))
+    if missing:
+        cached, missing = embeddingCache.getMany(modelKey, missing)
+        found.update(cached)
+    if missing:
+        encoded = np.asarray(model.encode(missing, **kwargs))
+        encoded = _normalize(encoded.reshape(len(missing), -1))
+        embeddingCache.putMany(modelKey, missing, encoded)
+        found.update(zip(missing, encoded))
+    return np.stack([found[phrase] for phrase in phrases])
+
+
+def buildTable(model, phrases, batchSize=64):
+    # Deduplicates the phrases and encodes them in one model call. Phrases are sorted
+    # by length first so every internal batch pads to similar lengths.
+    uniquePhrases = sorted({phrase for phrase in phrases if phrase}, key=lambda phrase: (len(phrase), phrase))
+    if not uniquePhrases:
+        return EmbeddingTable([], np.zeros((0, 0), dtype=np.float32))
+    return EmbeddingTable(uniquePhrases, _encode(model, uniquePhrases, batch_size=batchSize))
+
+
+def encodePhrases(model, phrases, table=None):
+    # Empty phrases are never sent to the model, their rows stay all-zero so
+    # every similarity involving them is 0 and they can never be matched.
+    # Phrases found in the precomputed table are not encoded again.
+    indices = [i for i, phrase in enumerate(phrases) if phrase]
+    if not indices:
+        return np.zeros((len(phrases), 0), dtype=np.float32)
+    known = [i for i in indices if table is not None and phrases[i] in table]
+    missing = [i for i in indices if table is None or phrases[i] not in table]
+    parts = []
+    if known:
+        parts.append((known, table.lookup([phrases[i] for i in known])))
+    if missing:
+        uniquePhrases = list(dict.fromkeys(phrases[i] for i in missing))
+        encoded = dict(zip(uniquePhrases, _encode(model, uniquePhrases)))
+        parts.append((missing, np.stack([encoded[phrases[i]] for i in missing])))
+    embeddings = np.zeros((len(phrases), parts[0][1].shape[1]), dtype=np.float32)
+    for rows, values in parts:
+        embeddings[rows] = values
+    return embeddings
+
+
+def pooledEmbedding(model, phrases, table=None):
+    # Unit-length mean of the phrase embeddings, None when there is no phrase to pool.
+    phrases = [phrase for phrase in phrases if phrase]
+    if not phrases:
+        return None
+    return _normalize(encodePhrases(model, phrases, table).mean(axis=0, keepdims=True))[0]
+
+
+def similarityMatrix(jobEmbeddings, resumeEmbeddings):
+    # Rows are job phrases, columns are resume phrases, negative scores are clipped to 0.
+    if jobEmbeddings.shape[1] != resumeEmbeddings.shape[1]:
+        return np.zeros((jobEmbeddings.shape[0], resumeEmbeddings.shape[0]), dtype=np.float32)
+    return np.maximum(jobEmbeddings @ resumeEmbeddings.T, 0.0)
+
+
+def cascadeMatrix(model1, jobItems, resumeItems, model2Matrix, low, high, table=None):
+    # Pairs the cheap model2 scores at or below `low`, or at or above `high`, are final and
+    # keep their model2 score. model1 only encodes the job and resume items of the
+    # ambiguous pairs in between, and only those cells get a model1 score.
+    if low > high:
+        raise ValueError("Cascade LOW threshold must not exceed HIGH.")
+    model1Matrix = np.array(model2Matrix, dtype=np.float32, copy=True)
+    ambiguous = (model2Matrix > low) & (model2Matrix < high)
+    if not ambiguous.any():
+        return model1Matrix
+    rows = np.flatnonzero(ambiguous.any(axis=1))
+    cols = np.flatnonzero(ambiguous.any(axis=0))
+    block = np.ix_(rows, cols)
+    model1Block = similarityMatrix(
+        encodePhrases(model1, [jobItems[i] for i in rows], table),
+        encodePhrases(model1, [resumeItems[j] for j in cols], table)
+    )
+    model1Matrix[block] = np.where(ambiguous[block], model1Block, model1Matrix[block])
+    return model1Matrix
+
+
+def scoreMatrices(model1, model2, jobItems, resumeItems, embeddings1=None, embeddings2=None, cascade=None):
+    # Similarity matrices of both models for every (job, resume) pair. With an enabled
+    # cascade ({"ENABLED", "LOW", "HIGH"}) model1 only runs on the ambiguous band.
+    if cascade and cascade.get("ENABLED"):
+        model2Matrix = similarityMatrix(encodePhrases(model2, jobItems, embeddings2), encodePhrases(model2, resumeItems, embeddings2))
+        model1Matrix = cascadeMatrix(model1, jobItems, resumeItems, model2Matrix, cascade["LOW"], cascade["HIGH"], embeddings1)
+        return model1Matrix, model2Matrix
+    model1Matrix = similarityMatrix(encodePhrases(model1, jobItems, embeddings1), encodePhrases(model1, resumeItems, embeddings1))
+    model2Matrix = similarityMatrix(encodePhrases(model2, jobItems, embeddings2), encodePhrases(model2, resumeItems, embeddings2))
+    return model1Matrix, model2Matrix
+
+
+def greedyMatch(model1Matrix, model2Matrix):
+    # Walks the job phrases in order and gives each one the unmatched resume phrase
+    # with the highest model1 score, a resume phrase is used at most once.
+    # Returns the per-job model1 and model2 scores (0.0 when nothing matched).
+    model1Scores = []
+    model2Scores = []
+    available = np.ones(model1Matrix.shape[1], dtype=bool)
+    for row in range(model1Matrix.shape[0]):
+        candidates = np.where(available, model1Matrix[row], 0.0)
+        best = int(np.argmax(candidates)) if candidates.size else 0
+        if not candidates.size or candidates[best] <= 0:
+            model1Scores.append(0.0)
+            model2Scores.append(0.0)
+            continue
+        available[best] = False
+        model1Scores.append(float(model1Matrix[row, best]))
+        model2Scores.append(float(model2Matrix[row, best]))
+    return model1Scores, model2Scores
+
+
+def hungarianMatch(model1Matrix, model2Matrix):
+    # Optimal one-to-one assignment that maximises the total model1 score over the whole
+    # matrix, so the result does not depend on the order of the input phrases.
+    # Returns the per-job model1 and model2 scores (0.0 when nothing matched).
+    model1Scores = np.zeros(model1Matrix.shape[0])
+    model2Scores = np.zeros(model1Matrix.shape[0])
+    if model1Matrix.size:
+        rows, cols = linear_sum_assignment(model1Matrix, maximize=True)
+        matched = model1Matrix[rows, cols] > 0
+        rows, cols = rows[matched], cols[matched]
+        model1Scores[rows] = model1Matrix[rows, cols]
+        model2Scores[rows] = model2Matrix[rows, cols]
+    return model1Scores.tolist(), model2Scores.tolist()
+
+
+ASSIGNMENT_STRATEGIES = {
+    "greedy": greedyMatch,
+    "hungarian": hungarianMatch,
+}
+
+
+def checkAssignmentStrategy(strategy):
+    """Returns the strategy, matchers call it when they load their config so a typo fails at startup."""
+    if strategy not in ASSIGNMENT_STRATEGIES:
+        raise ValueError(f"Unknown assignment strategy: {strategy}")
+    return strategy
+
+
+def assignMatch(model1Matrix, model2Matrix, strategy="greedy"):
+    return ASSIGNMENT_STRATEGIES[checkAssignmentStrategy(strategy)](model1Matrix, model2Matrix)
@@ -0,0 +1,105 @@
+import sys
+import threading
+from collections import OrderedDict
+from src.utils import config
+
+config = config.Config()
+
+# Process-wide LRU cache of normalised phrase embeddings.
+# Entries are keyed by (model key, normalised phrase) and the cache is bounded by
+# a memory budget rather than an entry count, least recently used entries are
+# evicted first. Shared by every matcher thread, so all access goes through a lock.
+
+
+class EmbeddingCache:
+    def __init__(self, maxBytes):
+        if maxBytes is None or maxBytes < 0:
+            raise ValueError("Cache budget must be a non-negative number of bytes.")
+        self.maxBytes = maxBytes
+        self.currentBytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _entrySize(key, vector):
+        return vector.nbytes + sys.getsizeof(key[1])
+
+    def get(self, modelKey, phrase):
+        key = (modelKey, phrase)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def getMany(self, modelKey, phrases):
+        """Returns the cached vectors by phrase and the list of phrases that missed."""
+        found = {}
+        missing = []
+        with self._lock:
+            for phrase in phrases:
+                key = (modelKey, phrase)
+                vector = self._entries.get(key)
+                if vector is None:
+                    self.misses += 1
+                    missing.append(phrase)
+                    continue
+                self._entries.move_to_end(key)
+                self.hits += 1
+                found[phrase] = vector
+        return found, missing
+
+    def put(self, modelKey, phrase, vector):
+        key = (modelKey, phrase)
+        # Copy so a cached row never keeps a whole batch matrix alive
+        vector = vector.copy()
+        size = self._entrySize(key, vector)
+        if size > self.maxBytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.currentBytes -= self._entrySize(key, previous)
+            self._entries[key] = vector
+            self.currentBytes += size
+            while self.currentBytes > self.maxBytes:
+                evictedKey, evicted = self._entries.popitem(last=False)
+                self.currentBytes -= self._entrySize(evictedKey, evicted)
+                self.evictions += 1
+
+    def putMany(self, modelKey, phrases, vectors):
+        for phrase, vector in zip(phrases, vectors):
+            self.put(modelKey, phrase, vector)
+
+    def getStats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.currentBytes,
+                "maxBytes": self.maxBytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRatio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.currentBytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+embeddingCache = EmbeddingCache(int(config.EMBEDDING_CACHE_MAX_MB * 1024 * 1024))
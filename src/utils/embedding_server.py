@@ -0,0 +1,194 @@
+# Local embedding sidecar: one process owns model1/model2, workers encode through it.
+#
+# RUN (one per node, before the gunicorn workers)
+#   PYTHONPATH=. python -m src.utils.embedding_server --socket /run/scoreit/embed.sock
+#
+# and set EMBEDDING_SERVER_SOCKET to the same path in src/utils/config.yml. The socket
+# belongs in a directory only the service user can write, never a shared /tmp. Workers
+# then never load torch: model_load hands out RemoteEncoder instances instead.
+#
+# Every client owns a shared-memory buffer and sends its name with each request over
+# the Unix socket. The server writes the float32 embeddings straight into that
+# buffer and only replies with the shape, so vectors are never serialized. When the
+# buffer is too small the server allocates a larger one and hands it to the client.
+
+import os
+import json
+import socket
+import struct
+import argparse
+import threading
+import socketserver
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from src.utils import config
+
+config = config.Config()
+
+HEADER = struct.Struct("!I")
+
+
+def sendMessage(connection, message):
+    payload = json.dumps(message).encode("utf-8")
+    connection.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def _recvExact(connection, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+        if not chunk:
+            return None
+        data.extend(chunk)
+    return bytes(data)
+
+
+def recvMessage(connection):
+    header = _recvExact(connection, HEADER.size)
+    if header is None:
+        return None
+    payload = _recvExact(connection, HEADER.unpack(header)[0])
+    if payload is None:
+        return None
+    return json.loads(payload.decode("utf-8"))
+
+
+def _untrack(block):
+    # Python 3.11 registers attached blocks too, the owning client alone must unlink them
+    try:
+        resource_tracker.unregister(block._name, "shared_memory")
+    except Exception:
+        pass
+    return block
+
+
+class _EncodeHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        blocks = {}
+        try:
+            while True:
+                request = recvMessage(self.request)
+                if request is None:
+                    break
+                try:
+                    sendMessage(self.request, self.server.encodeInto(request, blocks))
+                except Exception as e:
+                    sendMessage(self.request, {"error": str(e)})
+        finally:
+            for block in blocks.values():
+                block.close()
+
+
+class EmbeddingServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socketPath, models):
+        """
+        Args:
+            socketPath (str): Unix socket the server listens on
+            models (dict): model name -> object exposing encode()
+        """
+        if os.path.exists(socketPath):
+            os.unlink(socketPath)
+        self.models = models
+        super().__init__(socketPath, _EncodeHandler)
+
+    def encodeInto(self, request, blocks):
+        model = self.models.get(request.get("model"))
+        if model is None:
+            raise ValueError(f"Unknown model: {request.get('model')}")
+        phrases = request.get("phrases") or []
+        if not phrases:
+            return {"shape": [0, 0], "shm": request["shm"]}
+        encoded = np.ascontiguousarray(np.asarray(model.encode(phrases), dtype=np.float32).reshape(len(phrases), -1))
+        name = request["shm"]
+        if name not in blocks:
+            blocks[name] = _untrack(shared_memory.SharedMemory(name=name))
+        if encoded.nbytes > blocks[name].size:
+            # The client adopts the larger block and unlinks it when done
+            block = _untrack(shared_memory.SharedMemory(create=True, size=encoded.nbytes))
+            blocks[block.name] = block
+            name = block.name
+        np.ndarray(encoded.shape, dtype=np.float32, buffer=blocks[name].buf)[:] = encoded
+        return {"shape": list(encoded.shape), "shm": name}
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+class RemoteEncoder:
+    # Drop-in for a SentenceTransformer in the workers, encode() is served by the sidecar.
+    def __init__(self, socketPath, modelName, bufferBytes=None):
+        self.socketPath = socketPath
+        self.modelName = modelName
+        self.bufferBytes = bufferBytes or int(config.EMBEDDING_SERVER_SHM_MB * 1024 * 1024)
+        self._connection = None
+        self._block = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # Sockets and buffers are per process, a forked worker opens its own
+        if self._connection is None or self._pid != os.getpid():
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            connection.connect(self.socketPath)
+            self._connection = connection
+            self._block = shared_memory.SharedMemory(create=True, size=self.bufferBytes)
+            self._pid = os.getpid()
+        return self._connection
+
+    def _adopt(self, name):
+        if name == self._block.name:
+            return
+        self._block.close()
+        self._block.unlink()
+        self._block = shared_memory.SharedMemory(name=name)
+
+    def encode(self, sentences, **kwargs):
+        single = isinstance(sentences, str)
+        phrases = [sentences] if single else list(sentences)
+        with self._lock:
+            try:
+                connection = self._connect()
+                sendMessage(connection, {"model": self.modelName, "phrases": phrases, "shm": self._block.name})
+                response = recvMessage(connection)
+            except OSError as e:
+                self.close()
+                raise RuntimeError(f"Embedding server unavailable at {self.socketPath}: {e}")
+            if response is None:
+                self.close()
+                raise RuntimeError(f"Embedding server at {self.socketPath} closed the connection")
+            if "error" in response:
+                raise RuntimeError(f"Embedding server error: {response['error']}")
+            self._adopt(response["shm"])
+            # The buffer is reused by the next call, so hand out a plain array
+            encoded = np.ndarray(tuple(response["shape"]), dtype=np.float32, buffer=self._block.buf).copy()
+        return encoded[0] if single else encoded
+
+    def close(self):
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+            self._block.close()
+            self._block.unlink()
+        self._connection = None
+        self._block = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve model1/model2 encode requests over a Unix socket.")
+    parser.add_argument("--socket", default=config.EMBEDDING_SERVER_SOCKET, help="Defaults to EMBEDDING_SERVER_SOCKET of src/utils/config.yml")
+    args = parser.parse_args()
+    if not args.socket:
+        parser.error("Set --socket or EMBEDDING_SERVER_SOCKET in src/utils/config.yml.")
+
+    from src.utils import model_load
+
+    models = model_load.local_models()
+    print("⏳ Loading models for the embedding server...")
+    for model in models.values():
+        model.load()
+    with EmbeddingServer(args.socket, models) as server:
+        print(f"✅ Embedding server listening on {args.socket}")
+        server.serve_forever()
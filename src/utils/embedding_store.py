@@ -0,0 +1,196 @@
+# Persistent, read-only store of phrase embeddings precomputed from the bundled datasets.
+#
+# BUILD (offline, once per model update)
+#   PYTHONPATH=. python -m src.utils.embedding_store --data-dir data --dtype float16
+#
+# The store is a directory holding one .npy matrix per model plus index.json, which
+# maps every normalised phrase to its row and records the hash of the weights each
+# matrix was encoded with. A model whose weights changed since is not served from the
+# store. Matrices are opened with mmap_mode='r', so all gunicorn workers on a node
+# share the same pages through the OS page cache and resident memory does not grow per
+# worker. A rebuild writes a new directory and swaps it in, files that workers still
+# map are never rewritten in place.
+
+import os
+import csv
+import json
+import shutil
+import argparse
+import tempfile
+import threading
+import numpy as np
+from src.utils import config
+from src.utils import security
+
+config = config.Config()
+
+INDEX_FILE = "index.json"
+STORE_VERSION = 2
+
+# Dataset file -> columns holding comma separated entity phrases
+DATASET_COLUMNS = {
+    "technical_skills_dataset.csv": ["resume_skills", "jd_skills"],
+    "soft_skills_dataset.csv": ["resume_skills", "jd_skills"],
+    "tools_dataset.csv": ["resume_tools", "jd_tools"],
+    "certification_dataset.csv": ["resume_certs", "jd_certs"],
+    "designation_dataset.csv": ["resume_title", "jd_title"],
+    "education_dataset.csv": ["resume_edu", "jd_edu"],
+    "experience_dataset.csv": ["resume_exp", "jd_exp"],
+}
+
+
+def normalizePhrases(text):
+    # Same normalisation the matchers apply in setInputs
+    if not isinstance(text, str) or not text:
+        return []
+    return [item.strip() for item in security.sanitizeInput(text, None).split(',') if item.strip()]
+
+
+def collectDatasetPhrases(dataDir):
+    phrases = set()
+    for fileName, columns in DATASET_COLUMNS.items():
+        path = os.path.join(dataDir, fileName)
+        if not os.path.exists(path):
+            print(f"⚠️ Dataset not found, skipping: {path}")
+            continue
+        with open(path, "r", newline="", encoding="utf-8") as file:
+            for row in csv.DictReader(file):
+                for column in columns:
+                    phrases.update(normalizePhrases(row.get(column)))
+    return sorted(phrases, key=lambda phrase: (len(phrase), phrase))
+
+
+class EmbeddingStore:
+    def __init__(self, path):
+        self.path = str(path)
+        self.index = {}
+        self.matrices = {}
+        self.weights = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self._loaded:
+                return self
+            indexPath = os.path.join(self.path, INDEX_FILE)
+            if os.path.exists(indexPath):
+                try:
+                    with open(indexPath, "r") as file:
+                        metadata = json.load(file)
+                    if metadata.get("version") != STORE_VERSION:
+                        raise ValueError(f"Unsupported store version {metadata.get('version')}")
+                    self.index = {phrase: row for row, phrase in enumerate(metadata["phrases"])}
+                    self.matrices = {
+                        modelKey: np.load(os.path.join(self.path, entry["file"]), mmap_mode='r')
+                        for modelKey, entry in metadata["models"].items()
+                    }
+                    self.weights = {modelKey: entry.get("weights") for modelKey, entry in metadata["models"].items()}
+                except Exception as e:
+                    print(f"⚠️ Failed to load embedding store at {self.path}: {e}")
+                    self.index = {}
+                    self.matrices = {}
+                    self.weights = {}
+            self._loaded = True
+            return self
+
+    def hasModel(self, modelKey, weightsHash=None):
+        self.load()
+        return modelKey in self.matrices and self.weights.get(modelKey) == weightsHash
+
+    def getMany(self, modelKey, phrases, weightsHash=None):
+        """Returns the stored vectors by phrase and the list of phrases not in the store."""
+        if not self.hasModel(modelKey, weightsHash):
+            return {}, list(phrases)
+        matrix = self.matrices[modelKey]
+        found = {}
+        missing = []
+        for phrase in phrases:
+            row = self.index.get(phrase)
+            if row is None:
+                missing.append(phrase)
+            else:
+                found[phrase] = np.asarray(matrix[row], dtype=np.float32)
+        return found, missing
+
+    def __len__(self):
+        self.load()
+        return len(self.index)
+
+
+def buildStore(path, models, phrases, dtype="float16", batchSize=256):
+    """
+    Encodes every phrase with every model and writes the store to `path`.
+
+    Args:
+        path (str): Output directory, replaced as a whole once the new store is complete
+        models (dict): modelKey -> model exposing encode() and optionally weightsHash
+        phrases (list): Unique, normalised phrases
+        dtype (str): 'float16' or 'float32' storage type
+    """
+    if dtype not in ("float16", "float32"):
+        raise ValueError("dtype must be 'float16' or 'float32'.")
+    if not phrases:
+        raise ValueError("No phrases to store.")
+    path = os.path.abspath(path)
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    buildPath = tempfile.mkdtemp(prefix=f".{os.path.basename(path)}.build-", dir=parent)
+    try:
+        metadata = {"version": STORE_VERSION, "dtype": dtype, "phrases": list(phrases), "models": {}}
+        for number, (modelKey, model) in enumerate(models.items(), start=1):
+            fileName = f"model{number}.npy"
+            matrix = None
+            for start in range(0, len(phrases), batchSize):
+                batch = phrases[start:start + batchSize]
+                encoded = np.asarray(model.encode(batch, batch_size=batchSize), dtype=np.float32).reshape(len(batch), -1)
+                norms = np.linalg.norm(encoded, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                if matrix is None:
+                    matrix = np.lib.format.open_memmap(
+                        os.path.join(buildPath, fileName), mode='w+', dtype=dtype, shape=(len(phrases), encoded.shape[1])
+                    )
+                matrix[start:start + len(batch)] = encoded / norms
+            matrix.flush()
+            del matrix
+            weightsHash = getattr(model, "weightsHash", None)
+            metadata["models"][modelKey] = {"file": fileName, "weights": weightsHash if isinstance(weightsHash, str) else None}
+        with open(os.path.join(buildPath, INDEX_FILE), "w") as file:
+            json.dump(metadata, file)
+        replaceDirectory(buildPath, path)
+    except BaseException:
+        shutil.rmtree(buildPath, ignore_errors=True)
+        raise
+    return path
+
+
+def replaceDirectory(source, destination):
+    """
+    Moves the complete directory source to destination. The old directory is renamed
+    away first and removed afterwards, workers that mapped its files keep valid pages.
+    """
+    oldPath = None
+    if os.path.exists(destination):
+        oldPath = tempfile.mkdtemp(prefix=f".{os.path.basename(destination)}.old-", dir=os.path.dirname(destination))
+        os.replace(destination, os.path.join(oldPath, "store"))
+    os.replace(source, destination)
+    if oldPath is not None:
+        shutil.rmtree(oldPath, ignore_errors=True)
+
+
+embeddingStore = EmbeddingStore(config.EMBEDDING_STORE_PATH)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute phrase embeddings for the bundled datasets.")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--output", default=str(config.EMBEDDING_STORE_PATH))
+    parser.add_argument("--dtype", default="float16", choices=["float16", "float32"])
+    args = parser.parse_args()
+
+    from src.utils.model_load import model1, model2
+
+    datasetPhrases = collectDatasetPhrases(args.data_dir)
+    print(f"⏳ Encoding {len(datasetPhrases)} phrases...")
+    buildStore(args.output, {model1.modelKey: model1, model2.modelKey: model2}, datasetPhrases, dtype=args.dtype)
+    print(f"✅ Embedding store written to {args.output}")
@@ -0,0 +1,63 @@
+# Schema of the entity JSON returned by the extraction agents.
+#
+# Both system prompts ask for a flat object of comma separated strings, with "" for an
+# absent entity. The seven matched entities are required, the other prompt entities
+# are optional. Lossless deviations (a list of strings, a number) are normalized here;
+# a missing key or a value that cannot be normalized is reported so the agent can ask
+# the model again for only those keys instead of re-running the whole extraction.
+
+REQUIRED_KEYS = ["EDUCATION", "EXPERIENCE", "TECHNICAL_SKILL", "SOFT_SKILL", "TOOL", "CERTIFICATION", "DESIGNATION"]
+OPTIONAL_KEYS = ["COMPANY_NAME", "LOCATION", "LANGUAGE", "PAY"]
+
+
+def normalizeValue(value):
+    """Returns (value, True) for a value that fits the schema, (None, False) otherwise."""
+    if isinstance(value, str):
+        return value.strip(), True
+    if isinstance(value, bool) or value is None:
+        return None, False
+    if isinstance(value, (int, float)):
+        return str(value), True
+    if isinstance(value, (list, tuple)):
+        items = []
+        for item in value:
+            item, ok = normalizeValue(item)
+            if not ok:
+                return None, False
+            if item:
+                items.append(item)
+        return ", ".join(items), True
+    return None, False
+
+
+def validateOutput(jsonOutput, requiredKeys=REQUIRED_KEYS, optionalKeys=OPTIONAL_KEYS):
+    """
+    Normalizes an extraction output against the schema.
+
+    Returns:
+        tuple: (normalized output, keys that are missing or invalid)
+    """
+    if not isinstance(jsonOutput, dict):
+        return {}, list(requiredKeys)
+    output = {}
+    problems = []
+    for key in list(requiredKeys) + [key for key in optionalKeys if key not in requiredKeys]:
+        if key not in jsonOutput:
+            if key in requiredKeys:
+                problems.append(key)
+            continue
+        value, ok = normalizeValue(jsonOutput[key])
+        if ok:
+            output[key] = value
+        else:
+            problems.append(key)
+    return output, problems
+
+
+def repairPrompt(userPrompt, keys):
+    """User prompt of the follow-up request for only the given keys."""
+    return (
+        f"Extract only these entities: {', '.join(keys)}.\n"
+        f"Return a JSON object with exactly these keys and a plain string value for each, \"\" when absent.\n\n"
+        f"{userPrompt}"
+    )
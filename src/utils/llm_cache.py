@@ -0,0 +1,72 @@
+# Persistent cache of LLM extraction outputs for the resume and JD agents.
+#
+# Entries are keyed by (sha256 of the sanitized user prompt, model name, sha256 of the
+# system prompt), so editing a system prompt or switching models misses instead of
+# serving an extraction made with the old one. The store is the same SQLite tier the
+# match report cache uses (LLM_CACHE_PATH), shared by every worker on the node, with
+# a TTL and a bound on the number of rows.
+
+import hashlib
+import sqlite3
+import threading
+from src.utils import config
+from src.utils.report_cache import DiskTier, canonicalHash
+
+config = config.Config()
+
+_cache = None
+_lock = threading.Lock()
+
+
+def _digest(text):
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path, ttlSeconds=604800, maxEntries=50000):
+        self.disk = DiskTier(path, maxEntries, ttlSeconds)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, userPrompt, modelName, systemPrompt):
+        return canonicalHash(_digest(userPrompt), modelName, _digest(systemPrompt))
+
+    def get(self, userPrompt, modelName, systemPrompt):
+        try:
+            entry = self.disk.get(self.key(userPrompt, modelName, systemPrompt))
+        except sqlite3.Error as e:
+            print(f"⚠️ LLM cache unavailable: {e}")
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry[0]
+
+    def put(self, userPrompt, modelName, systemPrompt, jsonOutput):
+        try:
+            self.disk.put(self.key(userPrompt, modelName, systemPrompt), jsonOutput)
+        except sqlite3.Error as e:
+            print(f"⚠️ LLM cache unavailable: {e}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_ratio": self.hits / lookups if lookups else 0.0}
+
+
+def getCache():
+    """Process-wide extraction cache, None when LLM_CACHE_ENABLED is off. Opened on first use."""
+    global _cache
+    if not config.LLM_CACHE_ENABLED:
+        return None
+    with _lock:
+        if _cache is None:
+            try:
+                _cache = LLMCache(config.LLM_CACHE_PATH, config.LLM_CACHE_TTL_SECONDS, config.LLM_CACHE_MAX_ENTRIES)
+            except (OSError, sqlite3.Error) as e:
+                print(f"⚠️ LLM cache disabled, failed to open {config.LLM_CACHE_PATH}: {e}")
+                return None
+        return _cache
@@ -0,0 +1,93 @@
+# Process-wide pool of OpenRouter clients shared by the resume and JD agents.
+#
+# Every agent used to build its own OpenAI client and close it after one call, so each
+# extraction paid DNS, TCP and TLS setup to openrouter.ai again. Clients are now kept
+# per (client class, base URL, API key hash, retries) on top of one httpx connection
+# pool with keep-alive, and agents only borrow them. Limits and timeouts come from the
+# LLM_* keys of src/utils/config.yml. A forked worker builds its own pool.
+
+import os
+import socket
+import hashlib
+import threading
+import httpx
+from openai import OpenAI
+from src.utils import config
+
+config = config.Config()
+
+_clients = {}
+_clientsPid = None
+_httpClient = None
+_lock = threading.Lock()
+
+
+def httpClient():
+    """New httpx client with the configured pool limits and timeouts."""
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=config.LLM_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=config.LLM_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=config.LLM_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(config.LLM_READ_TIMEOUT_SECONDS, connect=config.LLM_CONNECT_TIMEOUT_SECONDS),
+    )
+
+
+def getClient(apiKey, clientClass=OpenAI, baseUrl=None, maxRetries=None):
+    """
+    Returns the shared client for an API key, built on first use.
+
+    Args:
+        apiKey (str): OpenRouter API key, only its hash is kept as the pool key
+        clientClass (type): Client class, OpenAI unless a caller substitutes it
+        baseUrl (str): API base URL, LLM_BASE_URL by default
+        maxRetries (int): Retries of the client itself, LLM_MAX_RETRIES by default.
+            Callers that retry through src.utils.llm_policy pass 0.
+    """
+    global _clientsPid, _httpClient
+    baseUrl = baseUrl or config.LLM_BASE_URL
+    maxRetries = config.LLM_MAX_RETRIES if maxRetries is None else maxRetries
+    key = (clientClass, baseUrl, hashlib.sha256(apiKey.encode("utf-8")).hexdigest(), maxRetries)
+    with _lock:
+        if _clientsPid != os.getpid():
+            # Connections must not be shared with the parent after a fork
+            _clients.clear()
+            _httpClient = None
+            _clientsPid = os.getpid()
+        client = _clients.get(key)
+        if client is None:
+            if _httpClient is None:
+                _httpClient = httpClient()
+            # Clients that only differ in their retries share the connection pool
+            client = clientClass(base_url=baseUrl, api_key=apiKey, http_client=_httpClient, max_retries=maxRetries)
+            _clients[key] = client
+        return client
+
+
+def abortResponse(response):
+    """
+    Ends an in-flight streamed response from another thread. Closing the socket alone
+    leaves a blocked read waiting for the read timeout, shutting it down wakes it at once.
+    """
+    networkStream = response.extensions.get("network_stream")
+    sock = networkStream.get_extra_info("socket") if networkStream is not None else None
+    if sock is None:
+        response.close()
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+def closeAll():
+    global _httpClient
+    with _lock:
+        for client in _clients.values():
+            try:
+                client.close()
+            except Exception:
+                pass
+        _clients.clear()
+        _httpClient = None
@@ -0,0 +1,293 @@
+# Requests of the extraction agents.
+#
+# The resume and JD agents only differ in their prompt, so the request policy, the
+# schema repair and the streaming live here. Every request, streamed or not, goes
+# through llm_policy: attempts are timed, hedged to the next model of the failover
+# chain when they stall, and retried after the policy backoff. A streamed request
+# hands its entities downstream as soon as one attempt has produced the first of them;
+# that attempt owns the stream from then on and the others are cancelled, since
+# entities already sent cannot be taken back.
+
+import queue
+import functools
+import threading
+from openai import Stream
+from src.utils import config
+from src.utils import concurrency
+from src.utils import extraction_schema
+from src.utils import llm_client
+from src.utils import llm_policy
+from src.utils import stream_json
+
+config = config.Config()
+
+
+def closeStream(stream):
+    # Streams of other clients may be plain iterators
+    close = getattr(stream, "close", None)
+    if close is not None:
+        close()
+
+
+class StreamRace:
+    """Forwards the entities of the attempt that streams first, the other attempts are cancelled."""
+    def __init__(self):
+        self.items = queue.Queue()
+        self.owner = None
+        self.closed = False
+        self.cancelEvents = []
+        self._lock = threading.Lock()
+
+    def join(self, cancelEvent):
+        with self._lock:
+            if self.closed or self.owner is not None:
+                raise llm_policy.RequestCancelled("Another attempt already streams the response.")
+            self.cancelEvents.append(cancelEvent)
+
+    def claim(self, cancelEvent):
+        with self._lock:
+            if self.owner is None and not self.closed:
+                self.owner = cancelEvent
+                losers = [event for event in self.cancelEvents if event is not cancelEvent]
+            else:
+                losers = []
+        for event in losers:
+            event.set()
+        return self.owner is cancelEvent
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            cancelEvents = list(self.cancelEvents)
+        for event in cancelEvents:
+            event.set()
+
+
+class ExtractionMixin:
+    """
+    Request policy, schema repair and streaming of an extraction agent. The agent provides
+    modelName, systemPrompt, userPrompt, failoverModels, validateSchema, client, getClient
+    and parseRespone.
+    """
+    def openStream(self, client, modelName, userPrompt=None):
+        try:
+            return client.chat.completions.create(
+                    model=modelName,
+                    messages=[
+                        {"role": "system", "content": self.systemPrompt},
+                        {"role": "user", "content": userPrompt or self.userPrompt}
+                    ],
+                    stream=True
+                    )
+        except Exception as e:
+            raise ValueError(f"Failed to get response: {e}")
+
+    def getStreamResponse(self, modelName=None, cancelEvent=None):
+        """
+        One streamed attempt on modelName, yields every top-level (key, value) of the JSON as soon
+        as it is complete and returns (response text, JSON output).
+        """
+        modelName = modelName or self.modelName
+        if not modelName:
+            raise ValueError("Model name not set.")
+        if not self.systemPrompt:
+            raise ValueError("System prompt not set.")
+        if not self.userPrompt:
+            raise ValueError("User prompt not set.")
+        client = self.client
+        if not client:
+            raise ValueError("Client not initialized.")
+        stream = self.openStream(client, modelName)
+
+        parser = stream_json.IncrementalJSONParser()
+        chunks = []
+        try:
+            # A losing hedge closes its response, also while it still waits for the first chunk
+            if cancelEvent is not None and isinstance(stream, Stream):
+                cancelEvent.onCancel(lambda: llm_client.abortResponse(stream.response))
+            for chunk in stream:
+                if cancelEvent is not None and cancelEvent.is_set():
+                    raise llm_policy.RequestCancelled(f"Request to {modelName} cancelled.")
+                if not chunk.choices or not chunk.choices[0].delta or not chunk.choices[0].delta.content:
+                    continue
+                chunks.append(chunk.choices[0].delta.content)
+                yield from parser.feed(chunks[-1])
+        except (ValueError, llm_policy.RequestCancelled):
+            raise
+        except Exception as e:
+            if cancelEvent is not None and cancelEvent.is_set():
+                raise llm_policy.RequestCancelled(f"Request to {modelName} cancelled.")
+            raise ValueError(f"Failed to get response: {e}")
+        finally:
+            # Also runs when the consumer abandons the generator
+            closeStream(stream)
+        if not chunks:
+            raise ValueError("No content in response.")
+
+        response = "".join(chunks)
+        jsonOutput = self.parseRespone(response)
+        # Keys the incremental parser could not decode come from the full parse
+        yield from parser.remaining(jsonOutput)
+        return response, jsonOutput
+
+    def streamAttempt(self, race, modelName, cancelEvent):
+        """One attempt of the request policy that forwards its entities once it owns the race."""
+        race.join(cancelEvent)
+        stream = self.getStreamResponse(modelName, cancelEvent)
+        try:
+            while True:
+                try:
+                    key, value = next(stream)
+                except StopIteration as stop:
+                    result = stop.value
+                    break
+                if self.validateSchema:
+                    value, ok = extraction_schema.normalizeValue(value)
+                    # Invalid values are held back for the repair request
+                    if not ok:
+                        continue
+                if not race.claim(cancelEvent):
+                    raise llm_policy.RequestCancelled(f"Request to {modelName} lost the race.")
+                race.items.put(("item", (key, value)))
+        except Exception as e:
+            if race.owner is cancelEvent:
+                # Entities already sent downstream cannot be taken back, the request fails with this attempt
+                race.items.put(("error", e))
+            raise
+        finally:
+            stream.close()
+        if not race.claim(cancelEvent):
+            raise llm_policy.RequestCancelled(f"Request to {modelName} lost the race.")
+        return result
+
+    def streamJsonOutput(self, cache=None):
+        """Yields (entity, value) pairs while the model writes them, jsonOutput holds the whole dict afterwards."""
+        if not self.jsonOutput and cache is not None:
+            self.jsonOutput = cache.get(self.userPrompt, self.modelName, self.systemPrompt)
+        if self.jsonOutput:
+            yield from self.jsonOutput.items()
+            return
+        if not self.userPrompt:
+            raise ValueError("User prompt not set.")
+        emittedKeys = set()
+        race = StreamRace()
+        # Retries come from the policy, a retrying client would stack a second layer under it
+        self.getClient(maxRetries=0)
+        try:
+            # The policy waits on the attempts, this generator only waits on their entities
+            future = concurrency.getIOExecutor().submit(llm_policy.getPolicy().run, functools.partial(self.streamAttempt, race), self.failoverModels)
+            future.add_done_callback(lambda _: race.items.put(("done", None)))
+            while True:
+                kind, payload = race.items.get()
+                if kind == "error":
+                    raise payload
+                if kind == "done":
+                    break
+                emittedKeys.add(payload[0])
+                yield payload
+            try:
+                modelName, (self.response, self.jsonOutput) = future.result()
+                if modelName != self.modelName:
+                    print(f"⚠️ Extraction served by {modelName} instead of {self.modelName}")
+            except ValueError as e:
+                print(f"⚠️ {e}")
+        finally:
+            # Cancels whatever still runs, also when the consumer stops reading
+            race.close()
+            self.client = None
+        if not self.jsonOutput:
+            raise ValueError("No JSON output found.")
+        print(self.response)
+        self.jsonOutput = self.repairOutput(self.jsonOutput)
+        for key, value in self.jsonOutput.items():
+            if key not in emittedKeys:
+                yield key, value
+        if cache is not None:
+            cache.put(self.userPrompt, self.modelName, self.systemPrompt, self.jsonOutput)
+
+    def requestCompletion(self, modelName, cancelEvent=None, userPrompt=None):
+        """One attempt of the request policy on modelName, returns (response text, JSON output)."""
+        client = self.client
+        if not client:
+            raise ValueError("Client not initialized.")
+        completion = self.openStream(client, modelName, userPrompt)
+
+        if isinstance(completion, Stream):
+            # A losing hedge closes its response, also while it still waits for the first chunk
+            if cancelEvent is not None:
+                cancelEvent.onCancel(lambda: llm_client.abortResponse(completion.response))
+            chunks = []
+            try:
+                for chunk in completion:
+                    if cancelEvent is not None and cancelEvent.is_set():
+                        raise llm_policy.RequestCancelled(f"Request to {modelName} cancelled.")
+                    if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                        chunks.append(chunk.choices[0].delta.content)
+            except llm_policy.RequestCancelled:
+                raise
+            except Exception as e:
+                if cancelEvent is not None and cancelEvent.is_set():
+                    raise llm_policy.RequestCancelled(f"Request to {modelName} cancelled.")
+                raise ValueError(f"Failed to get response: {e}")
+            finally:
+                completion.close()
+            response = "".join(chunks)
+        else:
+            if not completion or not completion.choices or not completion.choices[0].message:
+                raise ValueError("No content in response.")
+            response = completion.choices[0].message.content
+        if not response:
+            raise ValueError("No content in response.")
+        return response, self.parseRespone(response)
+
+    def repairOutput(self, jsonOutput):
+        """Validates the output against the entity schema and asks again for only the missing or invalid keys."""
+        if not self.validateSchema:
+            return jsonOutput
+        jsonOutput, problems = extraction_schema.validateOutput(jsonOutput)
+        for _ in range(config.EXTRACTION_REPAIR_ATTEMPTS):
+            if not problems:
+                break
+            print(f"⚠️ Re-extracting {', '.join(problems)}")
+            self.getClient(maxRetries=0)
+            try:
+                call = functools.partial(self.requestCompletion, userPrompt=extraction_schema.repairPrompt(self.userPrompt, problems))
+                _, (_, partial) = llm_policy.getPolicy().run(call, self.failoverModels)
+            except ValueError as e:
+                print(f"⚠️ {e}")
+                break
+            finally:
+                self.client = None
+            partial, _ = extraction_schema.validateOutput(partial, requiredKeys=problems, optionalKeys=[])
+            jsonOutput.update(partial)
+            problems = [key for key in problems if key not in partial]
+        # Whatever is still missing is treated as absent, as the prompt asks
+        for key in problems:
+            jsonOutput[key] = ""
+        return jsonOutput
+
+    def getJsonOutput(self, cache=None):
+        if not self.jsonOutput and cache is not None:
+            self.jsonOutput = cache.get(self.userPrompt, self.modelName, self.systemPrompt)
+            if self.jsonOutput:
+                return self.jsonOutput
+        if not self.jsonOutput:
+            if not self.userPrompt:
+                raise ValueError("User prompt not set.")
+            # Retries come from the policy, a retrying client would stack a second layer under it
+            self.getClient(maxRetries=0)
+            try:
+                modelName, (self.response, self.jsonOutput) = llm_policy.getPolicy().run(self.requestCompletion, self.failoverModels)
+                if modelName != self.modelName:
+                    print(f"⚠️ Extraction served by {modelName} instead of {self.modelName}")
+            except ValueError as e:
+                print(f"⚠️ {e}")
+            finally:
+                # The pooled client is shared with other agents, only the reference is dropped
+                self.client = None
+            if not self.jsonOutput:
+                raise ValueError("No JSON output found.")
+            self.jsonOutput = self.repairOutput(self.jsonOutput)
+            if cache is not None:
+                cache.put(self.userPrompt, self.modelName, self.systemPrompt, self.jsonOutput)
+        return self.jsonOutput
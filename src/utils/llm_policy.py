@@ -0,0 +1,202 @@
+# Request policy of the extraction agents.
+#
+# Free OpenRouter tiers stall now and then, and a stall used to cost the full read
+# timeout before the same model was tried again. Each extraction now walks a failover
+# chain built from llm_model_config.yml: the selected model, then the paid tier of the
+# same model, then the other paid models. When an attempt has not answered within the
+# LLM_HEDGE_PERCENTILE latency of its model, a hedged duplicate goes to the next model
+# of the chain. The first valid answer wins and the losers are cancelled: their
+# in-flight responses are closed, so they give back their thread and connection at
+# once. Failed attempts are retried after an exponential backoff with full jitter, the
+# clients used here do not retry on their own.
+
+import os
+import time
+import random
+import threading
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from src.utils import config
+from src.utils import llm_config_loader
+
+config = config.Config()
+
+_policy = None
+_executor = None
+_executorPid = None
+_lock = threading.Lock()
+
+
+class RequestCancelled(Exception):
+    pass
+
+
+class CancelEvent(threading.Event):
+    """Event of one attempt, setting it also runs the cleanups the attempt registered."""
+    def __init__(self):
+        super().__init__()
+        self._callbacks = []
+        self._callbacksLock = threading.Lock()
+
+    def onCancel(self, callback):
+        # Runs at once when the attempt was cancelled before it registered
+        with self._callbacksLock:
+            if not self.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def set(self):
+        with self._callbacksLock:
+            super().set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"⚠️ Failed to close a cancelled request: {e}")
+
+
+def failoverChain(modelName, modelNames=None, toPaid=True):
+    """
+    Ordered model names to try for a request on modelName.
+
+    Args:
+        modelName (str): Model selected by the user, always tried first
+        modelNames (dict): MODEL_NAMES of llm_model_config.yml, loaded when None
+        toPaid (bool): Whether a free model may fail over to the paid tiers
+    """
+    if modelNames is None:
+        modelNames = llm_config_loader.Config().MODEL_NAMES or {}
+    entries = [modelNames[key] for key in sorted(modelNames)]
+    selected = next((entry for entry in entries if entry["MODEL_NAME"] == modelName), None)
+    chain = [modelName]
+    if selected is None or (selected["MODEL_TYPE"] == "free" and not toPaid):
+        return chain
+    paid = [entry for entry in entries if entry["MODEL_TYPE"] == "paid" and entry["MODEL_NAME"] != modelName]
+    # The paid tier of the same model first, then the other paid models
+    paid.sort(key=lambda entry: entry["NAME"] != selected["NAME"])
+    return chain + [entry["MODEL_NAME"] for entry in paid]
+
+
+class LatencyTracker:
+    def __init__(self, window=200, minSamples=20, defaultDelay=12.0):
+        self.window = window
+        self.minSamples = minSamples
+        self.defaultDelay = defaultDelay
+        self._latencies = {}
+        self._lock = threading.Lock()
+
+    def record(self, modelName, seconds):
+        with self._lock:
+            self._latencies.setdefault(modelName, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, modelName, percentile):
+        """Latency percentile of the model, the default delay until enough samples are recorded."""
+        with self._lock:
+            latencies = list(self._latencies.get(modelName, ()))
+        if len(latencies) < self.minSamples:
+            return self.defaultDelay
+        return float(np.percentile(latencies, percentile))
+
+
+def getExecutor():
+    # Attempts wait on the network, one thread per pooled connection
+    global _executor, _executorPid
+    with _lock:
+        if _executor is None or _executorPid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=config.LLM_POOL_MAX_CONNECTIONS, thread_name_prefix="llm")
+            _executorPid = os.getpid()
+        return _executor
+
+
+class RequestPolicy:
+    def __init__(self, maxAttempts=4, maxInFlight=2, hedgePercentile=90, backoffBase=0.5, backoffMax=8.0, tracker=None, executor=None):
+        if maxAttempts < 1 or maxInFlight < 1:
+            raise ValueError("Attempts and in-flight requests must be positive.")
+        self.maxAttempts = maxAttempts
+        self.maxInFlight = maxInFlight
+        self.hedgePercentile = hedgePercentile
+        self.backoffBase = backoffBase
+        self.backoffMax = backoffMax
+        self.tracker = tracker or LatencyTracker()
+        self.executor = executor
+
+    @classmethod
+    def fromConfig(cls):
+        tracker = LatencyTracker(config.LLM_LATENCY_WINDOW, config.LLM_HEDGE_MIN_SAMPLES, config.LLM_HEDGE_DELAY_SECONDS)
+        return cls(
+            config.LLM_MAX_ATTEMPTS, config.LLM_MAX_IN_FLIGHT, config.LLM_HEDGE_PERCENTILE,
+            config.LLM_BACKOFF_BASE_SECONDS, config.LLM_BACKOFF_MAX_SECONDS, tracker
+        )
+
+    def backoff(self, failures):
+        # Full jitter, concurrent requests that failed together do not retry together
+        return random.uniform(0, min(self.backoffMax, self.backoffBase * (2 ** (failures - 1))))
+
+    def _attempt(self, call, modelName, cancelEvent):
+        start = time.time()
+        result = call(modelName, cancelEvent)
+        self.tracker.record(modelName, time.time() - start)
+        return result
+
+    def run(self, call, models):
+        """
+        Runs call(modelName, cancelEvent) over the failover chain and returns (modelName, result)
+        of the first attempt that succeeds. call should register the cleanup of its in-flight
+        response with cancelEvent.onCancel and stop early once cancelEvent is set.
+        """
+        if not models:
+            raise ValueError("No models to request.")
+        executor = self.executor or getExecutor()
+        pending = {}
+        failures = []
+        attempts = 0
+
+        def launch():
+            nonlocal attempts
+            modelName = models[attempts % len(models)]
+            cancelEvent = CancelEvent()
+            future = executor.submit(self._attempt, call, modelName, cancelEvent)
+            pending[future] = (modelName, cancelEvent, time.time())
+            attempts += 1
+
+        launch()
+        try:
+            while pending:
+                canHedge = attempts < self.maxAttempts and len(pending) < self.maxInFlight
+                timeout = None
+                if canHedge:
+                    # Hedge once the newest attempt is slower than its model usually is
+                    modelName, _, started = max(pending.values(), key=lambda value: value[2])
+                    timeout = max(0.0, started + self.tracker.percentile(modelName, self.hedgePercentile) - time.time())
+                done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    print(f"⚠️ {modelName} is slow, hedging to {models[attempts % len(models)]}")
+                    launch()
+                    continue
+                for future in done:
+                    modelName, _, _ = pending.pop(future)
+                    try:
+                        return modelName, future.result()
+                    except Exception as e:
+                        failures.append(f"{modelName}: {e}")
+                if not pending and attempts < self.maxAttempts:
+                    time.sleep(self.backoff(len(failures)))
+                    launch()
+        finally:
+            # Losers have their responses closed, queued ones never start
+            for future, (_, cancelEvent, _) in pending.items():
+                cancelEvent.set()
+                future.cancel()
+        raise ValueError(f"All {attempts} attempts failed: {'; '.join(failures)}")
+
+
+def getPolicy():
+    """Process-wide policy, the latency percentiles are shared by every agent."""
+    global _policy
+    with _lock:
+        if _policy is None:
+            _policy = RequestPolicy.fromConfig()
+        return _policy
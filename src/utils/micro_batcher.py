@@ -0,0 +1,83 @@
+# Dynamic micro-batching in front of a model's encode().
+#
+# Concurrent callers submit their phrases and get a Future back. A single worker thread
+# waits up to `maxWaitMs` after the first submission for more requests (or until
+# `maxBatchSize` phrases are queued), encodes the unique phrases of all of them in one
+# forward pass and fans the rows back out to the callers.
+
+import os
+import queue
+import threading
+import time
+import numpy as np
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    def __init__(self, encodeFn, maxWaitMs=5, maxBatchSize=256):
+        if maxWaitMs is None or maxWaitMs < 0:
+            raise ValueError("maxWaitMs must be a non-negative number.")
+        if not maxBatchSize or maxBatchSize < 1:
+            raise ValueError("maxBatchSize must be a positive integer.")
+        self.encodeFn = encodeFn
+        self.maxWait = maxWaitMs / 1000
+        self.maxBatchSize = maxBatchSize
+        self.batches = 0
+        self.requests = 0
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensureWorker(self):
+        # Threads do not survive a fork, so a forked worker starts its own
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, args=(self._queue,), name="micro-batcher", daemon=True)
+                self._thread.start()
+            return self._queue
+
+    def submit(self, phrases):
+        future = Future()
+        if not phrases:
+            future.set_result(np.zeros((0, 0), dtype=np.float32))
+            return future
+        self._ensureWorker().put((list(phrases), future))
+        return future
+
+    def encode(self, phrases):
+        return self.submit(phrases).result()
+
+    def _collect(self, requestQueue):
+        batch = [requestQueue.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.maxWait
+        while size < self.maxBatchSize:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = requestQueue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request[0])
+        return batch
+
+    def _run(self, requestQueue):
+        while True:
+            batch = self._collect(requestQueue)
+            uniquePhrases = list(dict.fromkeys(phrase for phrases, _ in batch for phrase in phrases))
+            try:
+                encoded = np.asarray(self.encodeFn(uniquePhrases)).reshape(len(uniquePhrases), -1)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.requests += len(batch)
+            index = {phrase: row for row, phrase in enumerate(uniquePhrases)}
+            for phrases, future in batch:
+                future.set_result(encoded[[index[phrase] for phrase in phrases]])
@@ -1,9 +1,18 @@
 # model_store.py
-from sentence_transformers import SentenceTransformer
-from src.utils import config
-import torch
-from huggingface_hub import hf_hub_download
+# Importing this module is cheap: torch, sentence-transformers and the fine-tuned weights
+# are only touched when a model is first used or when warmup() is called.
+#
+# WARM UP (downloads missing weights and loads both models)
+#   PYTHONPATH=. python src/utils/model_load.py
+#
+# CONVERT the fine-tuned .pt weights to safetensors (loaded without unpickling)
+#   PYTHONPATH=. python src/utils/model_load.py --safetensors
 import os
+import hashlib
+import argparse
+import threading
+from src.utils import config
+from src.utils.micro_batcher import MicroBatcher
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
 
@@ -22,6 +31,7 @@ def download_from_huggingface(repo_id, filename, destination=None):
     Returns:
         str: Path to the downloaded file
     """
+    from huggingface_hub import hf_hub_download
 
     file_path = hf_hub_download(repo_id=repo_id, filename=filename)
     os.makedirs(os.path.dirname(destination), exist_ok=True)
@@ -34,8 +44,6 @@ def download_from_huggingface(repo_id, filename, destination=None):
 
     return file_path
 
-print("Downloading models from Hugging Face...")
-
 repo_id = "AmanJain2903/ScoreIt.AI"
 
 model_files = {
@@ -43,18 +51,211 @@ model_files = {
     config.MODEL_2_WEIGHTS: "model2.pt",
 }
 
-for filename, file_id in model_files.items():
-    if not os.path.exists(filename):
+_weightsHashes = {}
+_weightsHashLock = threading.Lock()
+
+def weights_hash(path):
+    """sha256 of a weights file, None when it does not exist. Memoized until the file changes."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (str(path), stat.st_size, stat.st_mtime_ns)
+    with _weightsHashLock:
+        if key not in _weightsHashes:
+            digest = hashlib.sha256()
+            with open(path, "rb") as file:
+                for block in iter(lambda: file.read(1 << 20), b""):
+                    digest.update(block)
+            _weightsHashes[key] = digest.hexdigest()
+        return _weightsHashes[key]
+
+def download_models():
+    missing = {filename: file_id for filename, file_id in model_files.items() if not os.path.exists(filename)}
+    if not missing:
+        return
+    print("Downloading models from Hugging Face...")
+    for filename, file_id in missing.items():
         download_from_huggingface(repo_id, file_id, filename)
+    print("Models downloaded successfully")
+
+
+class ModelRegistry:
+    # Builds each registered model once, on first use, behind a lock so concurrent
+    # requests never load the same model twice.
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader):
+        self._loaders[name] = loader
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._lock:
+            if name not in self._models:
+                if name not in self._loaders:
+                    raise ValueError(f"Unknown model: {name}")
+                self._models[name] = self._loaders[name]()
+            return self._models[name]
+
+    def isLoaded(self, name):
+        return name in self._models
+
+    def isReady(self):
+        return bool(self._loaders) and all(name in self._models for name in self._loaders)
+
+    def warmup(self):
+        for name in self._loaders:
+            self.get(name)
+        return self
+
+
+class LazyModel:
+    # Stands in for a SentenceTransformer, the real model is built on the first encode() call.
+    # With a batcher, list inputs of concurrent callers share one forward pass.
+    def __init__(self, registry, name, modelKey, batcher=None, weightsPaths=()):
+        self.registry = registry
+        self.name = name
+        # Identifies the fine-tuned model in the shared embedding cache without loading it
+        self.modelKey = modelKey
+        self.batcher = batcher
+        self.weightsPaths = weightsPaths
+
+    @property
+    def weightsHash(self):
+        """Hash of the fine-tuned weights (the .pt first, its safetensors conversion otherwise)."""
+        for path in self.weightsPaths:
+            digest = weights_hash(path)
+            if digest is not None:
+                return digest
+        return None
+
+    def load(self):
+        return self.registry.get(self.name)
+
+    def encode(self, sentences, **kwargs):
+        if self.batcher is not None and isinstance(sentences, list):
+            return self.batcher.encode(sentences)
+        return self.load().encode(sentences, **kwargs)
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        return getattr(self.load(), attr)
+
+
+def convert_to_safetensors(weightsPath, safetensorsPath):
+    import torch
+    from safetensors.torch import save_file
+    # The checkpoints are plain state dicts, the restricted unpickler loads them
+    stateDict = torch.load(weightsPath, map_location=torch.device('cpu'), weights_only=True)
+    # safetensors refuses tensors that share storage, every entry gets its own copy
+    save_file(
+        {name: tensor.detach().clone().contiguous() for name, tensor in stateDict.items()}, str(safetensorsPath),
+        metadata={"source_sha256": weights_hash(weightsPath)}
+    )
+    print(f"✅ Weights converted to {safetensorsPath}")
+    return safetensorsPath
+
+def is_converted_from(safetensorsPath, weightsPath):
+    """Whether the safetensors file exists and was converted from the current .pt (or the .pt is gone)."""
+    if not os.path.exists(safetensorsPath):
+        return False
+    if not os.path.exists(weightsPath):
+        return True
+    from safetensors import safe_open
+    with safe_open(str(safetensorsPath), framework="pt") as file:
+        sourceHash = (file.metadata() or {}).get("source_sha256")
+    return sourceHash == weights_hash(weightsPath)
+
+def _load_torch_model(modelName, weightsPath, safetensorsPath):
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from src.utils import concurrency
+    concurrency.configureTorch(torch)
+    model = SentenceTransformer(modelName)
+    if is_converted_from(safetensorsPath, weightsPath):
+        from safetensors.torch import load_file
+        # assign=True keeps the loaded tensors instead of copying them into the fresh parameters
+        model.load_state_dict(load_file(str(safetensorsPath), device="cpu"), assign=True)
+        return model
+    if os.path.exists(safetensorsPath):
+        print(f"⚠️ {safetensorsPath} was not converted from {weightsPath}, loading the .pt. Re-run model_load.py --safetensors")
+    download_models()
+    model.load_state_dict(torch.load(weightsPath, map_location=torch.device('cpu'), weights_only=True))
+    return model
+
+def load_local_model(number):
+    print(f"⏳ Loading model{number} ({config.MODEL_BACKEND} backend)...")
+    if config.MODEL_BACKEND == "onnx":
+        from src.utils import onnx_backend
+        model = onnx_backend.loadOnnxModel(onnx_backend.exportPath(number), config.ONNX_QUANTIZATION)
+    elif number == 1:
+        model = _load_torch_model(config.MODEL_NAME_1, config.MODEL_1_WEIGHTS, config.MODEL_1_SAFETENSORS)
+    else:
+        model = _load_torch_model(config.MODEL_NAME_2, config.MODEL_2_WEIGHTS, config.MODEL_2_SAFETENSORS)
+    print(f"✅ model{number} loaded and ready")
+    return model
+
+def _load_model(number):
+    # With a configured embedding server the models live in the sidecar process
+    if config.EMBEDDING_SERVER_SOCKET:
+        from src.utils.embedding_server import RemoteEncoder
+        return RemoteEncoder(config.EMBEDDING_SERVER_SOCKET, f"model{number}")
+    return load_local_model(number)
+
+def _make_batcher(registry, name):
+    if not config.MICRO_BATCH_ENABLED:
+        return None
+    return MicroBatcher(
+        lambda phrases: registry.get(name).encode(phrases, batch_size=config.MICRO_BATCH_MAX_SIZE),
+        maxWaitMs=config.MICRO_BATCH_MAX_WAIT_MS,
+        maxBatchSize=config.MICRO_BATCH_MAX_SIZE,
+    )
+
+def local_models():
+    # Models held by this process even when EMBEDDING_SERVER_SOCKET is set, used by the embedding server
+    localRegistry = ModelRegistry()
+    localRegistry.register("model1", lambda: load_local_model(1))
+    localRegistry.register("model2", lambda: load_local_model(2))
+    return {name: LazyModel(localRegistry, name, None, _make_batcher(localRegistry, name)) for name in ("model1", "model2")}
+
+# ONNX embeddings are kept apart from torch ones in the cache and the store
+backendKey = f":onnx-{config.ONNX_QUANTIZATION or 'fp32'}" if config.MODEL_BACKEND == "onnx" else ""
+
+registry = ModelRegistry()
+registry.register("model1", lambda: _load_model(1))
+registry.register("model2", lambda: _load_model(2))
 
-print("Models downloaded successfully")
+model1 = LazyModel(
+    registry, "model1", f"model1:{config.MODEL_NAME_1}{backendKey}", _make_batcher(registry, "model1"),
+    (config.MODEL_1_WEIGHTS, config.MODEL_1_SAFETENSORS)
+)
+model2 = LazyModel(
+    registry, "model2", f"model2:{config.MODEL_NAME_2}{backendKey}", _make_batcher(registry, "model2"),
+    (config.MODEL_2_WEIGHTS, config.MODEL_2_SAFETENSORS)
+)
 
+def warmup():
+    # The weights hashes key the embedding store and report cache, computed here instead of on the first request
+    model1.weightsHash
+    model2.weightsHash
+    return registry.warmup()
 
+def isReady():
+    return registry.isReady()
 
-print("⏳ Preloading SentenceTransformer models...")
 
-model1 = SentenceTransformer(config.MODEL_NAME_1)
-model1.load_state_dict(torch.load(config.MODEL_1_WEIGHTS, map_location=torch.device('cpu'), weights_only=False))    
-model2 = SentenceTransformer(config.MODEL_NAME_2)
-model2.load_state_dict(torch.load(config.MODEL_2_WEIGHTS, map_location=torch.device('cpu'), weights_only=False))
-print("✅ Models loaded and ready")
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download, convert and warm up the matching models.")
+    parser.add_argument("--safetensors", action="store_true", help="Convert model1.pt/model2.pt to safetensors")
+    args = parser.parse_args()
+    if args.safetensors:
+        download_models()
+        convert_to_safetensors(config.MODEL_1_WEIGHTS, config.MODEL_1_SAFETENSORS)
+        convert_to_safetensors(config.MODEL_2_WEIGHTS, config.MODEL_2_SAFETENSORS)
+    warmup()
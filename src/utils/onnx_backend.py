@@ -0,0 +1,95 @@
+# ONNX Runtime backend for the two fine-tuned sentence encoders.
+#
+# EXPORT (offline, once per model update)
+#   PYTHONPATH=. python -m src.utils.onnx_backend --quantization avx2
+#
+# Each fine-tuned model is saved in Hugging Face format under ONNX_DIR/model{n},
+# converted to onnx/model.onnx and, unless --quantization none is given, also
+# dynamically quantized to int8 (onnx/model_qint8_<config>.onnx). Set
+# MODEL_BACKEND : 'onnx' in src/utils/config.yml to encode through ONNX Runtime on CPU.
+
+import os
+import argparse
+import torch
+from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+from src.utils import config
+
+config = config.Config()
+
+QUANTIZATION_CONFIGS = ("arm64", "avx2", "avx512", "avx512_vnni")
+
+
+def exportPath(number):
+    return os.path.join(str(config.ONNX_DIR), f"model{number}")
+
+
+def onnxFileName(quantization=None):
+    if not quantization:
+        return "onnx/model.onnx"
+    if quantization not in QUANTIZATION_CONFIGS:
+        raise ValueError(f"Unknown quantization config: {quantization}")
+    return f"onnx/model_qint8_{quantization}.onnx"
+
+
+def loadFineTunedModel(modelName, weightsPath):
+    model = SentenceTransformer(modelName, device="cpu")
+    model.load_state_dict(torch.load(weightsPath, map_location=torch.device('cpu'), weights_only=True))
+    return model
+
+
+def exportModel(modelName, weightsPath, outputDir, quantization=None):
+    """
+    Exports a fine-tuned SentenceTransformer to ONNX, optionally with an int8 copy.
+
+    Args:
+        modelName (str): Base model name, e.g. 'sentence-transformers/all-mpnet-base-v2'
+        weightsPath (str): Fine-tuned state dict (.pt)
+        outputDir (str): Directory the exported model is written to
+        quantization (str): One of QUANTIZATION_CONFIGS, or None for fp32 only
+
+    Returns:
+        str: Path of the ONNX file the runtime should load
+    """
+    fileName = onnxFileName(quantization)
+    loadFineTunedModel(modelName, weightsPath).save(outputDir)
+    onnxModel = SentenceTransformer(outputDir, backend="onnx", device="cpu")
+    onnxModel.save(outputDir)
+    if quantization:
+        export_dynamic_quantized_onnx_model(onnxModel, quantization, outputDir)
+    return os.path.join(outputDir, fileName)
+
+
+def loadOnnxModel(exportDir, quantization=None):
+    fileName = onnxFileName(quantization)
+    if not os.path.exists(os.path.join(exportDir, fileName)):
+        raise RuntimeError(f"ONNX model not found at {os.path.join(exportDir, fileName)}, run python -m src.utils.onnx_backend first")
+    import onnxruntime
+    from src.utils import concurrency
+    # Same per-worker thread budget as the torch backend
+    sessionOptions = onnxruntime.SessionOptions()
+    sessionOptions.intra_op_num_threads = concurrency.torchThreads()
+    sessionOptions.inter_op_num_threads = int(config.TORCH_INTEROP_THREADS or 1)
+    return SentenceTransformer(
+        exportDir,
+        backend="onnx",
+        device="cpu",
+        model_kwargs={"file_name": fileName, "provider": "CPUExecutionProvider", "session_options": sessionOptions},
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the fine-tuned encoders to ONNX.")
+    parser.add_argument("--quantization", default=config.ONNX_QUANTIZATION or "none", choices=list(QUANTIZATION_CONFIGS) + ["none"])
+    args = parser.parse_args()
+    quantization = None if args.quantization == "none" else args.quantization
+
+    models = {
+        1: (config.MODEL_NAME_1, config.MODEL_1_WEIGHTS),
+        2: (config.MODEL_NAME_2, config.MODEL_2_WEIGHTS),
+    }
+    for number, (modelName, weightsPath) in models.items():
+        if not os.path.exists(weightsPath):
+            raise RuntimeError(f"Fine-tuned weights not found at {weightsPath}, run python src/utils/model_load.py to download them")
+        print(f"⏳ Exporting {modelName} to ONNX...")
+        path = exportModel(modelName, weightsPath, exportPath(number), quantization)
+        print(f"✅ Exported to {path}")
@@ -0,0 +1,223 @@
+# Token-budgeted compaction of the text sent to the extraction agents.
+#
+# Text from ResumeOCR and the JD scraper carries PDF and page artifacts: repeated
+# headers and footers, page numbers, separator rules and whitespace runs. None of it
+# holds an entity, but every token of it is paid for in latency and OpenRouter cost.
+# Lines are normalized and boilerplate lines dropped. Page headers and footers, short
+# lines repeated at the edges of several pages, and lines repeated REPEAT_MIN_COUNT
+# times are kept once; other repeats such as two jobs with the same title stay. The
+# text is then cut to the token budget of the models that may serve the request.
+# Tokens are counted with the tokenizer of the model that owns that budget (TOKENIZER
+# in llm_model_config.yml) when it is in the local Hugging Face cache, otherwise with a
+# word-piece estimate. The request path never downloads, run
+# python -m src.utils.prompt_compactor to fetch them. Tokenizers follow the main branch
+# of their repository unless TOKENIZER_REVISION is set to a commit SHA.
+
+import re
+import math
+import argparse
+import threading
+import unicodedata
+from src.utils import config
+
+config = config.Config()
+
+_counters = {}
+_lock = threading.Lock()
+
+_SPACES = re.compile(r"\s+")
+_PIECES = re.compile(r"\w+|[^\w\s]")
+BOILERPLATE = [
+    # Page numbers: "3", "- 3 -", "Page 3", "Page 3 of 5", "3/5"
+    re.compile(r"^[-–—(\[]?\s*(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?\s*[-–—)\]]?$", re.IGNORECASE),
+    # Rules, bullets and other lines without a letter or digit
+    re.compile(r"^[^\w]*$"),
+    re.compile(r"^(curriculum vitae|r[ée]sum[ée]|cv)$", re.IGNORECASE),
+    re.compile(r"^references (are )?available (up)?on request\.?$", re.IGNORECASE),
+]
+PAGE_NUMBER = BOILERPLATE[0]
+# Lines at either end of a page that may be a running header or footer
+EDGE_LINES = 1
+HEADER_MAX_CHARS = 80
+REPEAT_MIN_COUNT = 3
+
+
+def estimateTokens(text):
+    """Word-piece estimate of the token count, used when no tokenizer is available."""
+    return sum(max(1, math.ceil(len(piece) / 5)) for piece in _PIECES.findall(text))
+
+
+class TokenCounter:
+    def __init__(self, tokenizerName=None, revision=None):
+        self.tokenizerName = tokenizerName
+        self.revision = revision
+        self._tokenizer = None
+        self._loaded = False
+
+    def _load(self):
+        if not self._loaded:
+            self._loaded = True
+            if self.tokenizerName:
+                try:
+                    from huggingface_hub import hf_hub_download
+                    from tokenizers import Tokenizer
+                    path = hf_hub_download(repo_id=self.tokenizerName, filename="tokenizer.json", revision=self.revision, local_files_only=True)
+                    self._tokenizer = Tokenizer.from_file(path)
+                except Exception as e:
+                    print(f"⚠️ Tokenizer {self.tokenizerName} unavailable, estimating token counts: {e}")
+        return self._tokenizer
+
+    def count(self, text):
+        if not text:
+            return 0
+        tokenizer = self._load()
+        if tokenizer is None:
+            return estimateTokens(text)
+        return len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+def getCounter(tokenizerName, revision=None):
+    with _lock:
+        if (tokenizerName, revision) not in _counters:
+            _counters[(tokenizerName, revision)] = TokenCounter(tokenizerName, revision)
+        return _counters[(tokenizerName, revision)]
+
+
+def normalizeLine(line):
+    # NFKC folds the exotic spaces, tabs become spaces, then control and zero-width characters are dropped
+    line = _SPACES.sub(" ", unicodedata.normalize("NFKC", line))
+    return "".join(char for char in line if unicodedata.category(char)[0] != "C").strip()
+
+
+def isBoilerplate(line):
+    return any(pattern.match(line) for pattern in BOILERPLATE)
+
+
+def splitPages(text):
+    """Normalized lines without boilerplate, grouped by page. Form feeds and page numbers end a page."""
+    pages = []
+    for chunk in text.split("\f"):
+        pages.append([])
+        for line in chunk.splitlines():
+            line = normalizeLine(line)
+            if PAGE_NUMBER.match(line):
+                pages.append([])
+            elif line and not isBoilerplate(line):
+                pages[-1].append(line)
+    return [page for page in pages if page]
+
+
+def repeatedKeys(pages):
+    """Keys of the running headers and footers and of the lines seen REPEAT_MIN_COUNT times."""
+    edgePages = {}
+    counts = {}
+    for number, page in enumerate(pages):
+        for line in page[:EDGE_LINES] + page[-EDGE_LINES:]:
+            if len(line) <= HEADER_MAX_CHARS:
+                edgePages.setdefault(line.casefold(), set()).add(number)
+        for line in page:
+            counts[line.casefold()] = counts.get(line.casefold(), 0) + 1
+    headers = {key for key, numbers in edgePages.items() if len(numbers) > 1}
+    return headers | {key for key, count in counts.items() if count >= REPEAT_MIN_COUNT}
+
+
+def compactLines(text):
+    """Normalized lines of the text without boilerplate, repeated headers and footers kept once."""
+    pages = splitPages(text)
+    repeated = repeatedKeys(pages)
+    lines = []
+    seen = set()
+    for page in pages:
+        for line in page:
+            key = line.casefold()
+            if key in repeated:
+                if key in seen:
+                    continue
+                seen.add(key)
+            lines.append(line)
+    return lines
+
+
+def truncateLine(line, budget, counter):
+    """Longest run of leading words of the line that fits in the token budget."""
+    words = line.split(" ")
+    low, high = 0, len(words)
+    # Binary search on the word count, a single OCR line can hold a whole resume
+    while low < high:
+        middle = (low + high + 1) // 2
+        if counter.count(" ".join(words[:middle])) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return " ".join(words[:low])
+
+
+def trimToBudget(lines, budget, counter):
+    """Leading lines that fit in the token budget, and whether any were cut."""
+    kept = []
+    used = 0
+    for line in lines:
+        # The newline joining it to the previous line is one more token
+        separator = 1 if kept else 0
+        tokens = counter.count(line) + separator
+        if used + tokens > budget:
+            # The line that crosses the budget is cut, not dropped
+            partial = truncateLine(line, budget - used - separator, counter)
+            if partial:
+                kept.append(partial)
+            return kept, True
+        kept.append(line)
+        used += tokens
+    return kept, False
+
+
+def modelBudget(modelName, modelConfigs):
+    entry = next((entry for entry in (modelConfigs or {}).values() if entry.get("MODEL_NAME") == modelName), {})
+    return int(entry.get("TOKEN_BUDGET") or config.LLM_INPUT_TOKEN_BUDGET), entry.get("TOKENIZER"), entry.get("TOKENIZER_REVISION")
+
+
+def compactPrompt(text, modelNames, modelConfigs=None):
+    """
+    Compacts text for a request that may be served by any of modelNames.
+
+    Args:
+        text (str | bytes): Raw resume or job description text
+        modelNames (list): Failover chain, the tokenizer of the model with the smallest budget counts the tokens
+        modelConfigs (dict): MODEL_NAMES of llm_model_config.yml
+
+    Returns:
+        tuple: (compacted text, stats with tokens_before, tokens_after, tokens_saved and truncated)
+    """
+    if isinstance(text, bytes):
+        text = text.decode("utf-8", errors="replace")
+    budgets = [modelBudget(modelName, modelConfigs) for modelName in modelNames] or [(config.LLM_INPUT_TOKEN_BUDGET, None, None)]
+    # Hedged attempts may go to any model of the chain, so the smallest budget applies
+    budget, tokenizerName, revision = min(budgets, key=lambda entry: entry[0])
+    counter = getCounter(tokenizerName, revision)
+    tokensBefore = counter.count(text)
+    lines, truncated = trimToBudget(compactLines(text), budget, counter)
+    compacted = "\n".join(lines)
+    tokensAfter = counter.count(compacted)
+    stats = {
+        "tokens_before": tokensBefore,
+        "tokens_after": tokensAfter,
+        "tokens_saved": max(0, tokensBefore - tokensAfter),
+        "token_budget": budget,
+        "truncated": truncated,
+    }
+    return compacted, stats
+
+
+def downloadTokenizers(modelConfigs):
+    from huggingface_hub import hf_hub_download
+    tokenizers = {(entry["TOKENIZER"], entry.get("TOKENIZER_REVISION")) for entry in modelConfigs.values() if entry.get("TOKENIZER")}
+    for tokenizerName, revision in sorted(tokenizers, key=str):
+        hf_hub_download(repo_id=tokenizerName, filename="tokenizer.json", revision=revision)
+        print(f"✅ Tokenizer {tokenizerName} downloaded at {revision or 'main'}")
+
+
+if __name__ == "__main__":
+    from src.utils import llm_config_loader
+    parser = argparse.ArgumentParser(description="Download the tokenizers of the extraction models into the local cache.")
+    parser.parse_args()
+    downloadTokenizers(llm_config_loader.Config().MODEL_NAMES or {})
@@ -0,0 +1,200 @@
+# Content-addressed cache of match reports.
+#
+# A report is keyed by the sha256 of the canonical JSON of (resume_json, jd_json,
+# version), where the version covers the models and the matcher settings, so any
+# model or config change misses instead of serving stale scores.
+#
+# The memory tier is a per-process LRU with a TTL. The optional disk tier is a SQLite
+# file (MATCH_CACHE_DISK_PATH) shared by every worker on the node: a report computed
+# by one worker is served by the others, and it survives restarts. Both tiers are
+# bounded by entry count, the disk tier evicts the least recently used rows.
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from src.utils import config
+
+config = config.Config()
+
+
+def canonicalHash(*values):
+    payload = json.dumps(values, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryTier:
+    def __init__(self, maxEntries, ttlSeconds):
+        self.maxEntries = maxEntries
+        self.ttlSeconds = ttlSeconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value, expires=None):
+        with self._lock:
+            self._entries[key] = (expires or time.time() + self.ttlSeconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxEntries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskTier:
+    def __init__(self, path, maxEntries, ttlSeconds):
+        self.path = str(path)
+        self.maxEntries = maxEntries
+        self.ttlSeconds = ttlSeconds
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS reports (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS reports_accessed ON reports (accessed)")
+
+    def _connect(self):
+        # One connection per thread and process, SQLite connections must not cross a fork
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key):
+        """Returns (value, expires) or None."""
+        connection = self._connect()
+        now = time.time()
+        row = connection.execute("SELECT value, expires FROM reports WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] < now:
+            connection.execute("DELETE FROM reports WHERE key = ?", (key,))
+            return None
+        connection.execute("UPDATE reports SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(row[0]), row[1]
+
+    def put(self, key, value):
+        connection = self._connect()
+        now = time.time()
+        connection.execute(
+            "INSERT OR REPLACE INTO reports (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value), now + self.ttlSeconds, now),
+        )
+        connection.execute("DELETE FROM reports WHERE expires < ?", (now,))
+        connection.execute(
+            "DELETE FROM reports WHERE key IN (SELECT key FROM reports ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.maxEntries,),
+        )
+
+    def clear(self):
+        self._connect().execute("DELETE FROM reports")
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+
+class ReportCache:
+    def __init__(self, maxEntries=4096, ttlSeconds=86400, diskPath=None, diskMaxEntries=100000):
+        """
+        Args:
+            maxEntries (int): Reports kept in process memory
+            ttlSeconds (float): Lifetime of a report in both tiers
+            diskPath (str): SQLite file of the shared disk tier, None keeps the cache in memory only
+            diskMaxEntries (int): Reports kept on disk
+        """
+        if maxEntries < 1 or ttlSeconds <= 0:
+            raise ValueError("Cache size and TTL must be positive.")
+        self.memory = MemoryTier(maxEntries, ttlSeconds)
+        self.disk = DiskTier(diskPath, diskMaxEntries, ttlSeconds) if diskPath else None
+        self.hits = 0
+        self.diskHits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def fromConfig(cls):
+        if not config.MATCH_CACHE_ENABLED:
+            return None
+        return cls(config.MATCH_CACHE_MAX_ENTRIES, config.MATCH_CACHE_TTL_SECONDS, config.MATCH_CACHE_DISK_PATH, config.MATCH_CACHE_DISK_MAX_ENTRIES)
+
+    def key(self, resume_json, jd_json, version):
+        return canonicalHash(resume_json, jd_json, version)
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            try:
+                entry = self.disk.get(key)
+            except sqlite3.Error as e:
+                print(f"⚠️ Match cache disk tier unavailable: {e}")
+                entry = None
+            if entry is not None:
+                value, expires = entry
+                # Promoted with the disk expiry so the memory copy never outlives it
+                self.memory.put(key, value, expires)
+                with self._lock:
+                    self.diskHits += 1
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        # Callers get their own copy, the cached report is never mutated
+        return dict(value)
+
+    def put(self, key, value):
+        value = dict(value)
+        self.memory.put(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.put(key, value)
+            except sqlite3.Error as e:
+                print(f"⚠️ Match cache disk tier unavailable: {e}")
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self):
+        diskEntries = 0
+        if self.disk is not None:
+            try:
+                diskEntries = len(self.disk)
+            except sqlite3.Error as e:
+                print(f"⚠️ Match cache disk tier unavailable: {e}")
+                diskEntries = None
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.diskHits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self.memory),
+                "disk_entries": diskEntries,
+            }
@@ -0,0 +1,85 @@
+# Incremental parser for the entity JSON streamed by the extraction agents.
+#
+# The model answers with one flat JSON object, possibly wrapped in prose or a code
+# fence. Chunks are fed as they arrive and every top-level key is returned as soon as
+# its value is closed by the following ',' or the final '}', so callers can start on
+# EDUCATION while the model is still writing DESIGNATION. Nested values are tracked by
+# depth and strings by their quote and escape state, so braces inside values are safe.
+
+import json
+
+
+class IncrementalJSONParser:
+    def __init__(self):
+        self.buffer = []
+        self.position = 0
+        self.depth = 0
+        self.inString = False
+        self.escaped = False
+        self.done = False
+        self.keyStart = None
+        self.key = None
+        self.valueStart = None
+        self.emitted = {}
+
+    def _text(self, start, end):
+        return "".join(self.buffer[start:end])
+
+    def _emit(self, end, items):
+        key, valueStart = self.key, self.valueStart
+        self.key = None
+        self.valueStart = None
+        if key is None or valueStart is None:
+            return
+        try:
+            value = json.loads(self._text(valueStart, end))
+        except json.JSONDecodeError:
+            # Left to the final parse of the whole response
+            return
+        self.emitted[key] = value
+        items.append((key, value))
+
+    def feed(self, chunk):
+        """Consumes a chunk of the response, returns the (key, value) pairs it completed."""
+        items = []
+        if self.done or not chunk:
+            return items
+        self.buffer.extend(chunk)
+        while self.position < len(self.buffer) and not self.done:
+            char = self.buffer[self.position]
+            if self.depth == 0:
+                # Prose or a code fence before the object is skipped until its opening brace
+                if char == "{":
+                    self.depth = 1
+            elif self.inString:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.inString = False
+                    if self.depth == 1 and self.keyStart is not None:
+                        self.key = json.loads(self._text(self.keyStart, self.position + 1))
+                        self.keyStart = None
+            elif char == '"':
+                self.inString = True
+                if self.depth == 1 and self.key is None and self.valueStart is None:
+                    self.keyStart = self.position
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self._emit(self.position, items)
+                    self.done = True
+            elif self.depth == 1:
+                if char == ":" and self.key is not None and self.valueStart is None:
+                    self.valueStart = self.position + 1
+                elif char == ",":
+                    self._emit(self.position, items)
+            self.position += 1
+        return items
+
+    def remaining(self, jsonOutput):
+        """(key, value) pairs of the fully parsed output that were not emitted while streaming."""
+        return [(key, value) for key, value in jsonOutput.items() if key not in self.emitted]
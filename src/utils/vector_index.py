@@ -0,0 +1,238 @@
+# Approximate nearest-neighbour index over pooled resume embeddings (IVF, pure numpy).
+#
+# The vectors are split into NLIST inverted lists by a spherical k-means over the
+# corpus. A query only scores the vectors of the NPROBE lists whose centroids are
+# closest to it, so the cost per query is a fraction of a brute force scan.
+#
+# Inserts are assigned to the nearest existing centroid, deletes only clear a row in
+# the alive mask, and save() writes the live rows back compacted into a new directory
+# that replaces the old one, mapped files are never rewritten in place. load() memory-maps
+# the vector matrix read-only, every worker on a node shares its pages, and the first
+# insert after a load copies the rows into process memory.
+
+import os
+import json
+import shutil
+import tempfile
+import threading
+import numpy as np
+from src.utils.embedding_store import replaceDirectory
+
+INDEX_VERSION = 1
+META_FILE = "meta.json"
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _nearestCentroid(vectors, centroids, chunkSize=65536):
+    assign = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunkSize):
+        assign[start:start + chunkSize] = np.argmax(vectors[start:start + chunkSize] @ centroids.T, axis=1)
+    return assign
+
+
+def trainCentroids(vectors, nlist, iterations=20, seed=0):
+    """Spherical k-means, returns at most `nlist` unit-length centroids."""
+    vectors = _normalize(vectors)
+    if not len(vectors):
+        raise ValueError("Cannot train an index without vectors.")
+    rng = np.random.default_rng(seed)
+    nlist = min(nlist, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = _nearestCentroid(vectors, centroids)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=nlist)
+        filled = np.flatnonzero(counts)
+        sums = np.add.reduceat(vectors[order], np.concatenate(([0], np.cumsum(counts)[:-1]))[filled], axis=0)
+        updated = centroids.copy()
+        updated[filled] = _normalize(sums)
+        # Empty lists are reseeded with random vectors instead of staying unused
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            updated[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+        if np.allclose(updated, centroids, atol=1e-6):
+            break
+        centroids = updated
+    return centroids
+
+
+class IVFIndex:
+    def __init__(self, dim, nlist=256, nprobe=16):
+        """
+        Args:
+            dim (int): Vector dimension
+            nlist (int): Number of inverted lists (k-means centroids)
+            nprobe (int): Lists scanned per query by default
+        """
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.centroids = None
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.lists = np.zeros(0, dtype=np.int32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.ids = []
+        self.rows = {}
+        self.size = 0
+        self._inverted = None
+        self._lock = threading.Lock()
+
+    def isTrained(self):
+        return self.centroids is not None
+
+    def train(self, vectors, iterations=20, seed=0):
+        self.centroids = trainCentroids(vectors, self.nlist, iterations, seed)
+        self.nlist = len(self.centroids)
+        return self
+
+    @classmethod
+    def build(cls, ids, vectors, nlist=256, nprobe=16, iterations=20, seed=0):
+        """Trains the centroids on the given vectors and inserts them."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        index = cls(vectors.shape[1], nlist, nprobe).train(vectors, iterations, seed)
+        index.add(ids, vectors)
+        return index
+
+    def _reserve(self, extra):
+        needed = self.size + extra
+        if needed <= len(self.vectors):
+            return
+        capacity = max(needed, 2 * len(self.vectors), 1024)
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        lists = np.zeros(capacity, dtype=np.int32)
+        alive = np.zeros(capacity, dtype=bool)
+        vectors[:self.size] = self.vectors[:self.size]
+        lists[:self.size] = self.lists[:self.size]
+        alive[:self.size] = self.alive[:self.size]
+        self.vectors, self.lists, self.alive = vectors, lists, alive
+
+    def add(self, ids, vectors):
+        """Inserts vectors under the given ids, an existing id is replaced."""
+        if not self.isTrained():
+            raise RuntimeError("Index is not trained, call train() or build() first.")
+        ids = [str(documentId) for documentId in ids]
+        if not ids:
+            return
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1))
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dimension {self.dim}, got {vectors.shape[1]}.")
+        with self._lock:
+            self._remove(ids)
+            self._reserve(len(ids))
+            rows = slice(self.size, self.size + len(ids))
+            self.vectors[rows] = vectors
+            self.lists[rows] = _nearestCentroid(vectors, self.centroids)
+            self.alive[rows] = True
+            for offset, documentId in enumerate(ids):
+                self.rows[documentId] = self.size + offset
+            self.ids.extend(ids)
+            self.size += len(ids)
+            self._inverted = None
+
+    def _remove(self, ids):
+        removed = 0
+        for documentId in ids:
+            row = self.rows.pop(str(documentId), None)
+            if row is not None:
+                self.alive[row] = False
+                removed += 1
+        return removed
+
+    def remove(self, ids):
+        """Deletes the given ids, returns how many were in the index."""
+        with self._lock:
+            return self._remove(ids)
+
+    def _invertedLists(self):
+        # Rows grouped by list, rebuilt lazily after inserts
+        if self._inverted is None:
+            order = np.argsort(self.lists[:self.size], kind="stable")
+            bounds = np.concatenate(([0], np.cumsum(np.bincount(self.lists[:self.size], minlength=self.nlist))))
+            self._inverted = (order, bounds)
+        return self._inverted
+
+    def search(self, query, k=10, nprobe=None):
+        """Returns up to k (id, cosine score) pairs, best first."""
+        if not self.isTrained() or not len(self):
+            return []
+        query = _normalize(np.asarray(query, dtype=np.float32).reshape(-1))
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        with self._lock:
+            order, bounds = self._invertedLists()
+            probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+            rows = np.concatenate([order[bounds[probe]:bounds[probe + 1]] for probe in probes])
+            rows = rows[self.alive[rows]]
+            return self._topK(rows, self.vectors[rows] @ query, k)
+
+    def bruteForce(self, query, k=10):
+        """Exact top k over every live vector, the baseline of the recall benchmark."""
+        query = _normalize(np.asarray(query, dtype=np.float32).reshape(-1))
+        with self._lock:
+            rows = np.flatnonzero(self.alive[:self.size])
+            return self._topK(rows, (self.vectors[:self.size] @ query)[rows], k)
+
+    def _topK(self, rows, scores, k):
+        if not len(rows):
+            return []
+        if k < len(rows):
+            best = np.argpartition(-scores, k - 1)[:k]
+        else:
+            best = np.arange(len(rows))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(self.ids[rows[i]], float(scores[i])) for i in best]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, documentId):
+        return str(documentId) in self.rows
+
+    def save(self, path):
+        """Writes the live rows to a new directory that replaces `path` once it is complete."""
+        if not self.isTrained():
+            raise RuntimeError("Index is not trained, call train() or build() first.")
+        path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        buildPath = tempfile.mkdtemp(prefix=f".{os.path.basename(path)}.build-", dir=os.path.dirname(path))
+        try:
+            with self._lock:
+                rows = np.flatnonzero(self.alive[:self.size])
+                np.save(os.path.join(buildPath, "centroids.npy"), self.centroids)
+                np.save(os.path.join(buildPath, "vectors.npy"), self.vectors[rows])
+                np.save(os.path.join(buildPath, "lists.npy"), self.lists[rows])
+                metadata = {
+                    "version": INDEX_VERSION,
+                    "dim": self.dim,
+                    "nlist": self.nlist,
+                    "nprobe": self.nprobe,
+                    "ids": [self.ids[row] for row in rows],
+                }
+            with open(os.path.join(buildPath, META_FILE), "w") as file:
+                json.dump(metadata, file)
+            replaceDirectory(buildPath, path)
+        except BaseException:
+            shutil.rmtree(buildPath, ignore_errors=True)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(os.path.join(path, META_FILE), "r") as file:
+            metadata = json.load(file)
+        if metadata.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version {metadata.get('version')}")
+        index = cls(metadata["dim"], metadata["nlist"], metadata["nprobe"])
+        index.centroids = np.load(os.path.join(path, "centroids.npy"))
+        index.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode='r' if mmap else None)
+        index.lists = np.load(os.path.join(path, "lists.npy"))
+        index.ids = list(metadata["ids"])
+        index.size = len(index.ids)
+        index.alive = np.ones(index.size, dtype=bool)
+        index.rows = {documentId: row for row, documentId in enumerate(index.ids)}
+        return index
@@ -0,0 +1,42 @@
+import pytest
+from unittest.mock import patch
+from api.app import create_app
+
+pytestmark = pytest.mark.api
+
+@pytest.fixture
+def client():
+    app = create_app()
+    app.testing = True
+    return app.test_client()
+
+def test_extract_and_match_valid(client):
+    resume_json = {"TECHNICAL_SKILL": "Python, Java", "TOOL": "Git"}
+    jd_json = {"TECHNICAL_SKILL": "Python, SQL", "TOOL": "Git, Docker"}
+    with patch('api.routes_make_match.extractAndMatchPipeline.run', return_value=(resume_json, jd_json, {"TOOL": 0.5}, None, None)) as run:
+        response = client.post("/extract_and_match", json={"resume_text": "resume", "jd_text": "job", "model_id": 1})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["resume_entites"] == resume_json
+    assert data["jd_entites"] == jd_json
+    assert data["match_report"] == {"TOOL": 0.5}
+    assert "match_handle" not in data
+    run.assert_called_once_with("resume", "job", 1, None, None, False)
+
+def test_extract_and_match_rematch(client):
+    with patch('api.routes_make_match.extractAndMatchPipeline.run', return_value=({}, {}, {}, "handle", {})) as run:
+        response = client.post("/extract_and_match", json={"resume_text": "resume", "jd_text": "job", "model_id": 1, "match_handle": None})
+    assert response.status_code == 200
+    assert response.get_json()["match_handle"] == "handle"
+    assert run.call_args[0][5] is True
+
+def test_extract_and_match_invalid_input(client):
+    response = client.post("/extract_and_match", json={"resume_text": "", "jd_text": "job"})
+    assert response.status_code == 400
+    response = client.post("/extract_and_match", json={"resume_text": "resume", "jd_text": "job", "model_id": "x"})
+    assert response.status_code == 400
+
+def test_extract_and_match_internal_error(client):
+    with patch('api.routes_make_match.extractAndMatchPipeline.run', side_effect=RuntimeError("Failed")):
+        response = client.post("/extract_and_match", json={"resume_text": "resume", "jd_text": "job", "model_id": 1})
+    assert response.status_code == 500
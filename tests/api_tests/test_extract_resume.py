@@ -1,4 +1,5 @@
 import io
+import json
 import pytest
 from api.app import create_app
 
@@ -33,5 +34,17 @@ def test_extract_resume_internal_error(client, monkeypatch):
     assert response.status_code == 500
     assert response.json['error'] == "Internal error while processing the text"
 
+def test_extract_resume_stream(client, monkeypatch):
+    def mock_stream_json_output(self, cache=None):
+        self.jsonOutput = {"TOOL": "Git", "EDUCATION": "BSc"}
+        yield from self.jsonOutput.items()
 
-
+    monkeypatch.setenv('OPENROUTER_API_KEY', 'fake-api-key')
+    monkeypatch.setattr('src.resume_extractor_agent.resume_agent.ResumeAgent.streamJsonOutput', mock_stream_json_output)
+    response = client.post('/extract_resume', data={'resume_text': "Skills: Git", 'model_id': 1, 'stream': 'true'})
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[:2] == [{"entity": "TOOL", "value": "Git"}, {"entity": "EDUCATION", "value": "BSc"}]
+    assert lines[2]["resume_entites"] == {"TOOL": "Git", "EDUCATION": "BSc"}
+    assert lines[2]["prompt_stats"]["tokens_saved"] == 0
@@ -1,4 +1,5 @@
 import io
+import json
 import pytest
 from api.app import create_app
 from src.utils import model_load
@@ -53,10 +54,10 @@ def test_make_match_invalid_input(client):
     assert response.get_json() == {"error": "Invalid input or missing input"}
 
 def test_make_match_internal_error(client, monkeypatch):
-    def mock_getMatch():
+    def mock_match(*args, **kwargs):
         raise Exception("Internal error")
 
-    monkeypatch.setattr("src.matchmaker_engine.matching_engine.MatchingEngine.getMatch", mock_getMatch)
+    monkeypatch.setattr("src.matchmaker_engine.matching_engine.MatchingEngine.match", mock_match)
 
     resume_json = {
         "EDUCATION": ["Bachelor's in Computer Science"],
@@ -71,5 +72,68 @@ def test_make_match_internal_error(client, monkeypatch):
     assert response.status_code == 500
     assert response.get_json() == {"error": "Internal error while processing the input"}
 
+def test_ready(client, monkeypatch):
+    monkeypatch.setattr("src.utils.model_load.isReady", lambda: False)
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.get_json() == {"models_ready": False}
+    monkeypatch.setattr("src.utils.model_load.isReady", lambda: True)
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.get_json() == {"models_ready": True}
+
+def test_make_match_batch(client, monkeypatch):
+    def mock_iter_rank(self, resume_json, jd_jsons):
+        for index, jd_json in enumerate(jd_jsons):
+            yield index, {"TOOL": 1.0 if jd_json["TOOL"] == resume_json["TOOL"] else 0.5}
+
+    monkeypatch.setattr("src.matchmaker_engine.matching_engine.MatchingEngine.iterRank", mock_iter_rank)
+    resume_json = {"TOOL": "Git"}
+    jd_jsons = [{"TOOL": "Docker"}, {"TOOL": "Git"}, json.dumps({"TOOL": "Jira"})]
+
+    response = client.post("/make_match_batch", json={"resume_json": resume_json, "jd_jsons": jd_jsons, "top_k": 2})
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [result["index"] for result in results] == [1, 0]
+
+    response = client.post("/make_match_batch", json={"resume_json": resume_json, "jd_jsons": jd_jsons, "stream": True})
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line["index"] for line in lines[:-1]] == [0, 1, 2]
+    assert lines[-1] == {"ranking": [1, 0, 2]}
+
+def test_make_match_batch_invalid_input(client):
+    response = client.post("/make_match_batch", json={"resume_json": {"TOOL": "Git"}})
+    assert response.status_code == 400
+    response = client.post("/make_match_batch", json={"resume_json": {"TOOL": "Git"}, "jd_jsons": ["invalid"]})
+    assert response.status_code == 400
+    response = client.post("/make_match_batch", json={"resume_json": {"TOOL": "Git"}, "jd_jsons": [{"TOOL": "Git"}], "top_k": 0})
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "top_k must be a positive integer"}
+
+def test_make_match_batch_too_many_jds(client, monkeypatch):
+    monkeypatch.setattr("api.routes_make_match.config.MATCH_BATCH_MAX_JDS", 2)
+    response = client.post("/make_match_batch", json={"resume_json": {"TOOL": "Git"}, "jd_jsons": [{"TOOL": "Git"}] * 3})
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "At most 2 job descriptions per request"}
 
+def test_make_match_rematch_with_handle(client):
+    resume_json = {"TOOL": "Git, Docker", "TECHNICAL_SKILL": "Python"}
+    jd_json = {"TOOL": "Git", "TECHNICAL_SKILL": "Python"}
+    response = client.post("/make_match", json={"resume_json": resume_json, "jd_json": jd_json, "match_handle": None})
+    assert response.status_code == 200
+    first = response.get_json()
+    assert first["match_handle"]
+    assert set(first["entity_state"]) == {"EDUCATION", "EXPERIENCE", "TECHNICAL_SKILL", "SOFT_SKILL", "TOOL", "CERTIFICATION", "DESIGNATION"}
+    resume_json["TOOL"] = "Git"
+    response = client.post("/make_match", json={"resume_json": resume_json, "jd_json": jd_json, "match_handle": first["match_handle"], "previous_report": first})
+    assert response.status_code == 200
+    second = response.get_json()
+    assert second["entity_state"]["TECHNICAL_SKILL"] == first["entity_state"]["TECHNICAL_SKILL"]
+    assert second["entity_state"]["TOOL"]["fingerprint"] != first["entity_state"]["TOOL"]["fingerprint"]
 
+def test_make_match_cache_stats(client):
+    response = client.get("/make_match/cache_stats")
+    assert response.status_code == 200
+    assert "enabled" in response.get_json()
@@ -142,10 +142,9 @@ def test_make_match_success(certification_matchmaker):
     certification_matchmaker.jobCertification = ["AWS Certified Solutions Architect",
                                                         "Google Professional Data Engineer",
                                                         "Certified Kubernetes Administrator"]
-    model1Mock.encode.return_value = [np.array([[0.1]])]
-    model2Mock.encode.return_value = [np.array([[0.1]])]
-    with patch('src.certification_matchmaker.certification_matching.cosine_similarity', return_value=np.array([[1.0]])):
-            score = certification_matchmaker.makeMatch()
+    model1Mock.encode.side_effect = lambda phrases: np.tile([1.0, 0.0, 0.0], (len(phrases), 1))
+    model2Mock.encode.side_effect = lambda phrases: np.tile([1.0, 0.0, 0.0], (len(phrases), 1))
+    score = certification_matchmaker.makeMatch()
     assert score == 1.0
 
 
@@ -225,4 +224,9 @@ def test_reset_success(certification_matchmaker):
     assert certification_matchmaker.similarity.ensembleScore is not None
     assert isinstance(certification_matchmaker.similarity.ensembleScore, list)
     assert certification_matchmaker.resumeCertification is None
-    assert certification_matchmaker.jobCertification is None
\ No newline at end of file
+    assert certification_matchmaker.jobCertification is None
+
+def test_unknown_assignment_strategy_fails_at_init():
+    with patch('src.certification_matchmaker.certification_matching.config.ASSIGNMENT_STRATEGY', 'random'):
+        with pytest.raises(ValueError, match="Unknown assignment strategy: random"):
+            CertificationMatching()
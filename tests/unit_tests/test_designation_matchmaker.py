@@ -138,10 +138,9 @@ def test_make_match_success(designation_matchmaker):
     designation_matchmaker.model2 = model2Mock
     designation_matchmaker.resumeDesignation = ["Senior Software Engineer", "Full Stack Engineer", "Backend Developer"]
     designation_matchmaker.jobDesignation = ["Software Engineer", "Backend Developer", "Full Stack Developer"]
-    model1Mock.encode.return_value = [np.array([[0.1]])]
-    model2Mock.encode.return_value = [np.array([[0.1]])]
-    with patch('src.designation_matchmaker.designation_matching.cosine_similarity', return_value=np.array([[1.0]])):
-            score = designation_matchmaker.makeMatch()
+    model1Mock.encode.side_effect = lambda phrases: np.tile([1.0, 0.0, 0.0], (len(phrases), 1))
+    model2Mock.encode.side_effect = lambda phrases: np.tile([1.0, 0.0, 0.0], (len(phrases), 1))
+    score = designation_matchmaker.makeMatch()
     assert score == 1.0
 
 
@@ -221,4 +220,9 @@ def test_reset_success(designation_matchmaker):
     assert designation_matchmaker.similarity.ensembleScore is not None
     assert isinstance(designation_matchmaker.similarity.ensembleScore, list)
     assert designation_matchmaker.resumeDesignation is None
-    assert designation_matchmaker.jobDesignation is None
\ No newline at end of file
+    assert designation_matchmaker.jobDesignation is None
+
+def test_unknown_assignment_strategy_fails_at_init():
+    with patch('src.designation_matchmaker.designation_matching.config.ASSIGNMENT_STRATEGY', 'random'):
+        with pytest.raises(ValueError, match="Unknown assignment strategy: random"):
+            DesignationMatching()
@@ -126,10 +126,9 @@ def test_make_match_success(education_matchmaker):
     education_matchmaker.model2 = model2Mock
     education_matchmaker.resumeEducation = "Bachelor of Science in Computer Science"
     education_matchmaker.jobEducation = "Master of Science in Computer Science"
-    model1Mock.encode.return_value = [np.array([[0.1, 0.2, 0.3]]), np.array([[0.1, 0.2, 0.3]])]
-    model2Mock.encode.return_value = [np.array([[0.4, 0.5, 0.6]]), np.array([[0.4, 0.5, 0.6]])]
-    with patch('src.education_matchmaker.education_matching.cosine_similarity', return_value=np.array([[1.0]])):
-        score = education_matchmaker.makeMatch()
+    model1Mock.encode.side_effect = lambda phrases: np.tile([1.0, 0.0, 0.0], (len(phrases), 1))
+    model2Mock.encode.side_effect = lambda phrases: np.tile([1.0, 0.0, 0.0], (len(phrases), 1))
+    score = education_matchmaker.makeMatch()
     assert score == 1.0
 
 
@@ -191,4 +190,9 @@ def test_reset_success(education_matchmaker):
     assert education_matchmaker.similarity.model2Score is None
     assert education_matchmaker.similarity.ensembleScore == []
     assert education_matchmaker.resumeEducation is None
-    assert education_matchmaker.jobEducation is None
\ No newline at end of file
+    assert education_matchmaker.jobEducation is None
+
+def test_unknown_assignment_strategy_fails_at_init():
+    with patch('src.education_matchmaker.education_matching.config.ASSIGNMENT_STRATEGY', 'random'):
+        with pytest.raises(ValueError, match="Unknown assignment strategy: random"):
+            EducationMatching()
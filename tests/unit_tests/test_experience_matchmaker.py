@@ -184,12 +184,11 @@ def test_make_match_success(experience_matchmaker):
     experience_matchmaker.model2 = model2Mock
     experience_matchmaker.resumeExperience = "Bachelor of Science in Computer Science"
     experience_matchmaker.jobExperience = "Master of Science in Computer Science"
-    model1Mock.encode.return_value = [np.array([[0.1, 0.2, 0.3]]), np.array([[0.1, 0.2, 0.3]])]
-    model2Mock.encode.return_value = [np.array([[0.4, 0.5, 0.6]]), np.array([[0.4, 0.5, 0.6]])]
+    model1Mock.encode.side_effect = lambda phrases: np.tile([1.0, 0.0, 0.0], (len(phrases), 1))
+    model2Mock.encode.side_effect = lambda phrases: np.tile([1.0, 0.0, 0.0], (len(phrases), 1))
     experience_matchmaker.resumeNumeralizer.extractYears = MagicMock(return_value=2.0)
     experience_matchmaker.jobNumeralizer.extractYears = MagicMock(return_value=4.0)
-    with patch('src.experience_matchmaker.experience_matching.cosine_similarity', return_value=np.array([[1.0]])):
-        score = experience_matchmaker.makeMatch()
+    score = experience_matchmaker.makeMatch()
     assert score == 0.5
 
 
@@ -253,4 +252,9 @@ def test_reset_success(experience_matchmaker):
     assert experience_matchmaker.similarity.model2Score is None
     assert experience_matchmaker.similarity.ensembleScore == []
     assert experience_matchmaker.resumeExperience is None
-    assert experience_matchmaker.jobExperience is None
\ No newline at end of file
+    assert experience_matchmaker.jobExperience is None
+
+def test_unknown_assignment_strategy_fails_at_init():
+    with patch('src.experience_matchmaker.experience_matching.config.ASSIGNMENT_STRATEGY', 'random'):
+        with pytest.raises(ValueError, match="Unknown assignment strategy: random"):
+            ExperienceMatching()
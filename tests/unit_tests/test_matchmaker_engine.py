@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import patch, MagicMock
-from src.matchmaker_engine.matching_engine import MatchingEngine
+from src.matchmaker_engine.matching_engine import MatchingEngine, MatchStateStore, entityFingerprint
 from src.education_matchmaker.education_matching import EducationMatching
 from src.experience_matchmaker.experience_matching import ExperienceMatching
 from src.skill_matchmaker.technical_skill_matching import TechnicalSkillMatching
@@ -9,6 +9,7 @@ from src.tools_matchmaker.tools_matching import ToolMatching
 from src.certification_matchmaker.certification_matching import CertificationMatching
 from src.designation_matchmaker.designation_matching import DesignationMatching
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
 pytestmark = pytest.mark.unit
 
@@ -71,8 +72,239 @@ def test_getMatch_no_json(matching_engine):
     result = matching_engine.getMatch()
     assert all(score == 0.0 for score in result.values())
 
+def test_getMatch_single_encode_pass():
+    engine = MatchingEngine()
+    encoder = lambda phrases, **kwargs: np.tile([1.0, 0.0, 0.0], (len(phrases), 1))
+    model1Mock = MagicMock()
+    model2Mock = MagicMock()
+    model1Mock.encode.side_effect = encoder
+    model2Mock.encode.side_effect = encoder
+    for matcher in engine.matcher_map.values():
+        matcher.model1 = MagicMock()
+        matcher.model2 = MagicMock()
+        matcher.model1.encode.side_effect = Exception("Matchers should not encode")
+        matcher.model2.encode.side_effect = Exception("Matchers should not encode")
+    engine.resume_json = {
+        "EDUCATION": "BSc CS", "EXPERIENCE": "3 yrs", "TECHNICAL_SKILL": "Python, Java",
+        "SOFT_SKILL": "Leadership", "TOOL": "Git, Docker", "CERTIFICATION": "AWS",
+        "DESIGNATION": "Engineer"
+    }
+    engine.jd_json = {
+        "EDUCATION": "BSc CS", "EXPERIENCE": "3 yrs", "TECHNICAL_SKILL": "Python",
+        "SOFT_SKILL": "Leadership", "TOOL": "Git", "CERTIFICATION": "AWS",
+        "DESIGNATION": "Engineer"
+    }
+    with patch('src.matchmaker_engine.matching_engine.model1', model1Mock), \
+            patch('src.matchmaker_engine.matching_engine.model2', model2Mock):
+        result = engine.getMatch()
+    assert model1Mock.encode.call_count == 1
+    assert model2Mock.encode.call_count == 1
+    assert len(model1Mock.encode.call_args[0][0]) == len(set(model1Mock.encode.call_args[0][0]))
+    assert all(score == 1.0 for score in result.values())
 
+def test_match_is_stateless():
+    engine = MatchingEngine()
+    encoder = lambda phrases, **kwargs: np.tile([1.0, 0.0, 0.0], (len(phrases), 1))
+    model1Mock = MagicMock()
+    model2Mock = MagicMock()
+    model1Mock.encode.side_effect = encoder
+    model2Mock.encode.side_effect = encoder
+    resume_json = {"TECHNICAL_SKILL": "Python, Java", "TOOL": "Git"}
+    jd_json = {"TECHNICAL_SKILL": "Python", "TOOL": "Git"}
+    with patch('src.matchmaker_engine.matching_engine.model1', model1Mock), \
+            patch('src.matchmaker_engine.matching_engine.model2', model2Mock):
+        first = engine.match(resume_json, jd_json)
+        second = engine.match(resume_json, jd_json)
+    assert first == second
+    assert first is not second
+    assert all(score == 1.0 for score in first.values())
+    assert engine.technical_skill_matcher.resumeSkill is None
+    assert engine.resume_json is None
 
+def test_match_no_scored_entities():
+    engine = MatchingEngine()
+    result = engine.match({"EDUCATION": "BSc CS"}, {"TOOL": "Git"})
+    assert all(score == 0.0 for score in result.values())
+
+def test_match_concurrent_requests():
+    engine = MatchingEngine()
+    for matcher in engine.matcher_map.values():
+        matcher.matchItems = MagicMock(side_effect=lambda resumeItems, jobItems, *args: 1.0 if resumeItems == jobItems else 0.5)
+    requests = [({"TOOL": "Git", "DESIGNATION": name}, {"TOOL": "Git" if i % 2 else "Docker", "DESIGNATION": name}) for i, name in enumerate(["A", "B", "C", "D", "E", "F"])]
+    with patch('src.utils.embedding.buildTable', return_value=None):
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            results = list(executor.map(lambda args: engine.match(*args), requests))
+    for i, result in enumerate(results):
+        assert result["DESIGNATION"] == 1.0
+        assert result["TOOL"] == (1.0 if i % 2 else 0.5)
+
+def test_match_cascade_skips_model1_table():
+    engine = MatchingEngine()
+    engine.tool_matcher.cascade = {"ENABLED": True, "LOW": 0.3, "HIGH": 0.85}
+    with patch('src.utils.embedding.buildTable', return_value=None) as buildTable:
+        engine.match({"TOOL": "Git", "DESIGNATION": "Engineer"}, {"TOOL": "Docker", "DESIGNATION": "Engineer"})
+    phrases1 = buildTable.call_args_list[0][0][1]
+    phrases2 = buildTable.call_args_list[1][0][1]
+    assert phrases1 == {"engineer"}
+    assert phrases2 == {"engineer", "git", "docker"}
 
+def test_rank_sorts_and_truncates():
+    engine = MatchingEngine()
+    encoder = lambda phrases, **kwargs: np.array([[1.0, 0.0] if "python" in phrase else [0.0, 1.0] for phrase in phrases])
+    model1Mock = MagicMock()
+    model2Mock = MagicMock()
+    model1Mock.encode.side_effect = encoder
+    model2Mock.encode.side_effect = encoder
+    resume_json = {"TECHNICAL_SKILL": "Python", "TOOL": "Git"}
+    jd_jsons = [
+        {"TECHNICAL_SKILL": "Java", "TOOL": "Git"},
+        {"TECHNICAL_SKILL": "Python", "TOOL": "Git"},
+        {},
+    ]
+    with patch('src.matchmaker_engine.matching_engine.model1', model1Mock), \
+            patch('src.matchmaker_engine.matching_engine.model2', model2Mock):
+        results = engine.rank(resume_json, jd_jsons)
+        top = engine.rank(resume_json, jd_jsons, topK=1)
+    assert [result["index"] for result in results] == [1, 0, 2]
+    assert results[0]["overall_score"] == 1.0
+    assert results[2]["overall_score"] == 0.0
+    assert [result["index"] for result in top] == [1]
+    # Resume and job phrases of all pairs are encoded in one pass per model and call
+    assert model1Mock.encode.call_count == 2
+    assert len(model1Mock.encode.call_args_list[0][0][0]) == 3
 
+def test_iter_rank_yields_every_jd():
+    engine = MatchingEngine()
+    for matcher in engine.matcher_map.values():
+        matcher.matchItems = MagicMock(return_value=0.5)
+    with patch('src.utils.embedding.buildTable', return_value=None):
+        results = dict(engine.iterRank({"TOOL": "Git"}, [{"TOOL": "Git"}, "invalid", {"TOOL": "Docker"}]))
+    assert sorted(results) == [0, 1, 2]
+    assert all(score == 0.5 for score in results[0].values())
+    assert all(score == 0.0 for score in results[1].values())
 
+def test_rematch_reuses_unchanged_entities():
+    engine = MatchingEngine()
+    for matcher in engine.matcher_map.values():
+        matcher.matchItems = MagicMock(return_value=0.5)
+    resume_json = {"TOOL": "Git", "TECHNICAL_SKILL": "Python"}
+    jd_json = {"TOOL": "Docker", "TECHNICAL_SKILL": "Python"}
+    with patch('src.utils.embedding.buildTable', return_value=None):
+        report, handle, state = engine.rematch(resume_json, jd_json, None)
+        assert engine.tool_matcher.matchItems.call_count == 1
+        assert state["TOOL"]["score"] == 0.5
+        assert state["EDUCATION"]["score"] is None
+        engine.tool_matcher.matchItems.return_value = 0.9
+        report, newHandle, _ = engine.rematch({"TOOL": "Git, Docker", "TECHNICAL_SKILL": "Python"}, jd_json, handle)
+    # Only the edited entity is recomputed
+    assert engine.tool_matcher.matchItems.call_count == 2
+    assert engine.technical_skill_matcher.matchItems.call_count == 1
+    assert report["TOOL"] == 0.9
+    assert report["TECHNICAL_SKILL"] == 0.5
+    assert newHandle != handle
+
+def test_rematch_previous_state_and_invalid_entries():
+    engine = MatchingEngine()
+    for matcher in engine.matcher_map.values():
+        matcher.matchItems = MagicMock(return_value=0.5)
+    resume_json = {"TOOL": "Git", "DESIGNATION": "Engineer"}
+    jd_json = {"TOOL": "Git", "DESIGNATION": "Engineer"}
+    with patch('src.utils.embedding.buildTable', return_value=None):
+        _, _, state = engine.rematch(resume_json, jd_json)
+        state["TOOL"]["score"] = 0.7
+        state["DESIGNATION"]["score"] = 5.0
+        report, _, _ = engine.rematch(resume_json, jd_json, "unknown-handle", state)
+    assert engine.tool_matcher.matchItems.call_count == 1
+    assert report["TOOL"] == 0.7
+    # An out of range score is dropped and the entity recomputed
+    assert engine.designation_matcher.matchItems.call_count == 2
+    assert report["DESIGNATION"] == 0.5
+
+def test_rematch_recomputes_failed_entities():
+    engine = MatchingEngine()
+    for matcher in engine.matcher_map.values():
+        matcher.matchItems = MagicMock(return_value=0.5)
+    engine.tool_matcher.matchItems.side_effect = RuntimeError("Encoder unavailable")
+    resume_json = {"TOOL": "Git", "DESIGNATION": "Engineer"}
+    jd_json = {"TOOL": "Docker", "DESIGNATION": "Engineer"}
+    with patch('src.utils.embedding.buildTable', return_value=None):
+        _, handle, state = engine.rematch(resume_json, jd_json)
+        assert "TOOL" not in state
+        assert state["DESIGNATION"]["score"] == 0.5
+        engine.tool_matcher.matchItems.side_effect = None
+        report, _, state = engine.rematch(resume_json, jd_json, handle)
+        assert state["TOOL"]["score"] == 0.5
+        # A client supplied state with no score for an entity that has inputs is not trusted either
+        state["TOOL"]["score"] = None
+        engine.rematch(resume_json, jd_json, "unknown-handle", state)
+    assert engine.tool_matcher.matchItems.call_count == 3
+    assert engine.designation_matcher.matchItems.call_count == 1
+    assert report["TOOL"] == 0.5
+
+def test_entity_fingerprint_tracks_inputs_and_settings():
+    engine = MatchingEngine()
+    matcher = engine.tool_matcher
+    fingerprint = entityFingerprint("TOOL", (["git "], ["docker"]), matcher)
+    assert fingerprint == entityFingerprint("TOOL", (["git"], ["docker"]), matcher)
+    assert fingerprint != entityFingerprint("TOOL", (["git"], ["kubernetes"]), matcher)
+    assert fingerprint != entityFingerprint("TECHNICAL_SKILL", (["git"], ["docker"]), matcher)
+    matcher.assignmentStrategy = "greedy" if matcher.assignmentStrategy == "hungarian" else "hungarian"
+    assert fingerprint != entityFingerprint("TOOL", (["git"], ["docker"]), matcher)
+
+def test_match_state_store_is_bounded():
+    store = MatchStateStore(2)
+    first = store.put({"TOOL": {}})
+    second = store.put({})
+    store.get(first)
+    store.put({})
+    assert store.get(first) == {"TOOL": {}}
+    assert store.get(second) is None
+
+def test_match_serves_cached_reports():
+    engine = MatchingEngine()
+    for matcher in engine.matcher_map.values():
+        matcher.matchItems = MagicMock(return_value=0.5)
+    with patch('src.utils.embedding.buildTable', return_value=None):
+        first = engine.match({"TOOL": "Git"}, {"TOOL": "Docker"})
+        second = engine.match({"TOOL": "Git"}, {"TOOL": "Docker"})
+        engine.tool_matcher.assignmentStrategy = "hungarian"
+        engine.match({"TOOL": "Git"}, {"TOOL": "Docker"})
+    assert first == second
+    # A changed matcher setting is a new cache key
+    assert engine.tool_matcher.matchItems.call_count == 2
+    stats = engine.cacheStats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+def test_config_version_tracks_the_weights():
+    engine = MatchingEngine()
+    with patch('src.utils.embedding._weightsHash', return_value="old-weights"):
+        version = engine.configVersion()
+        fingerprint = entityFingerprint("TOOL", (["git"], ["docker"]), engine.tool_matcher)
+        assert engine.configVersion() == version
+    with patch('src.utils.embedding._weightsHash', return_value="new-weights"):
+        assert engine.configVersion() != version
+        assert entityFingerprint("TOOL", (["git"], ["docker"]), engine.tool_matcher) != fingerprint
+
+def test_match_does_not_cache_failed_reports():
+    engine = MatchingEngine()
+    for matcher in engine.matcher_map.values():
+        matcher.matchItems = MagicMock(return_value=0.5)
+    engine.tool_matcher.matchItems.side_effect = RuntimeError("Encoder unavailable")
+    with patch('src.utils.embedding.buildTable', return_value=None):
+        engine.match({"TOOL": "Git"}, {"TOOL": "Docker"})
+        engine.tool_matcher.matchItems.side_effect = None
+        report = engine.match({"TOOL": "Git"}, {"TOOL": "Docker"})
+        cached = engine.match({"TOOL": "Git"}, {"TOOL": "Docker"})
+    assert engine.tool_matcher.matchItems.call_count == 2
+    assert report == cached and report["TOOL"] == 0.5
+    assert engine.cacheStats()["hits"] == 1
+
+def test_prewarm_encodes_one_side():
+    engine = MatchingEngine()
+    engine.tool_matcher.cascade = {"ENABLED": True, "LOW": 0.3, "HIGH": 0.85}
+    with patch('src.utils.embedding.buildTable', return_value=None) as buildTable:
+        count = engine.prewarm({"TOOL": "Git, Docker", "DESIGNATION": "Engineer", "SOFT_SKILL": ""})
+        assert engine.prewarm(None) == 0
+    assert count == 3
+    assert buildTable.call_args_list[0][0][1] == {"engineer"}
+    assert buildTable.call_args_list[1][0][1] == {"engineer", "git", "docker"}
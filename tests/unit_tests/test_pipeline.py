@@ -0,0 +1,97 @@
+import time
+import threading
+import pytest
+from unittest.mock import patch, MagicMock
+from concurrent.futures import ThreadPoolExecutor
+from src.matchmaker_engine.pipeline import ExtractAndMatchPipeline
+
+pytestmark = pytest.mark.unit
+
+RESUME = {"TECHNICAL_SKILL": "Python"}
+JD = {"TECHNICAL_SKILL": "Python, SQL"}
+
+def agentClass(output, delay=0.0, barrier=None, error=None):
+    def build(**kwargs):
+        agent = MagicMock()
+        def getJsonOutput(cache=None):
+            if barrier is not None:
+                # Both extractions must be in flight at the same time to pass the barrier
+                barrier.wait(timeout=5)
+            time.sleep(delay)
+            if error is not None:
+                raise error
+            return output
+        agent.getJsonOutput.side_effect = getJsonOutput
+        return agent
+    return MagicMock(side_effect=build)
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        yield executor
+
+def test_run_extracts_concurrently_and_matches(executor):
+    barrier = threading.Barrier(2)
+    engine = MagicMock()
+    engine.match.return_value = {"TECHNICAL_SKILL": 0.9}
+    with patch('src.matchmaker_engine.pipeline.ResumeAgent', agentClass(RESUME, barrier=barrier)), \
+            patch('src.matchmaker_engine.pipeline.JobDescriptionAgent', agentClass(JD, barrier=barrier)), \
+            patch('src.matchmaker_engine.pipeline.llm_cache.getCache', return_value=None):
+        result = ExtractAndMatchPipeline(engine, executor).run("resume text", "jd text", 1)
+    assert result == (RESUME, JD, {"TECHNICAL_SKILL": 0.9}, None, None)
+    engine.match.assert_called_once_with(RESUME, JD)
+    engine.rematch.assert_not_called()
+
+def test_run_prewarms_each_side_as_it_arrives(executor):
+    order = []
+    engine = MagicMock()
+    engine.prewarm.side_effect = lambda entity_json: order.append(entity_json)
+    engine.match.side_effect = lambda resume_json, jd_json: order.append("match") or {}
+    with patch('src.matchmaker_engine.pipeline.ResumeAgent', agentClass(RESUME, delay=0.3)), \
+            patch('src.matchmaker_engine.pipeline.JobDescriptionAgent', agentClass(JD)), \
+            patch('src.matchmaker_engine.pipeline.llm_cache.getCache', return_value=None):
+        ExtractAndMatchPipeline(engine, executor).run("resume text", "jd text", 1)
+    # The JD finishes first, its embeddings are warmed before the resume arrives
+    assert order == [JD, RESUME, "match"]
+
+def test_run_prewarms_on_the_cpu_executor(executor):
+    threads = []
+    engine = MagicMock()
+    engine.prewarm.side_effect = lambda entity_json: threads.append(threading.current_thread().name)
+    engine.match.return_value = {}
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="cpu") as cpuExecutor, \
+            patch('src.matchmaker_engine.pipeline.ResumeAgent', agentClass(RESUME)), \
+            patch('src.matchmaker_engine.pipeline.JobDescriptionAgent', agentClass(JD)), \
+            patch('src.matchmaker_engine.pipeline.llm_cache.getCache', return_value=None):
+        ExtractAndMatchPipeline(engine, executor, cpuExecutor).run("resume text", "jd text", 1)
+    assert len(threads) == 2 and all(name.startswith("cpu") for name in threads)
+
+def test_run_rematch_returns_handle(executor):
+    engine = MagicMock()
+    engine.rematch.return_value = ({"TOOL": 0.5}, "handle", {"TOOL": {}})
+    with patch('src.matchmaker_engine.pipeline.ResumeAgent', agentClass(RESUME)), \
+            patch('src.matchmaker_engine.pipeline.JobDescriptionAgent', agentClass(JD)), \
+            patch('src.matchmaker_engine.pipeline.llm_cache.getCache', return_value=None):
+        result = ExtractAndMatchPipeline(engine, executor).run("resume text", "jd text", 1, "previous", None, rematch=True)
+    assert result == (RESUME, JD, {"TOOL": 0.5}, "handle", {"TOOL": {}})
+    engine.rematch.assert_called_once_with(RESUME, JD, "previous", None)
+
+def test_run_failed_extraction_and_prewarm(executor):
+    engine = MagicMock()
+    with patch('src.matchmaker_engine.pipeline.ResumeAgent', agentClass(None, error=ValueError("bad output"))), \
+            patch('src.matchmaker_engine.pipeline.JobDescriptionAgent', agentClass(JD)), \
+            patch('src.matchmaker_engine.pipeline.llm_cache.getCache', return_value=None):
+        with pytest.raises(RuntimeError, match="Failed to extract the resume entities"):
+            ExtractAndMatchPipeline(engine, executor).run("resume text", "jd text", 1)
+    engine.match.assert_not_called()
+
+    engine.prewarm.side_effect = RuntimeError("encoder down")
+    engine.match.return_value = {}
+    with patch('src.matchmaker_engine.pipeline.ResumeAgent', agentClass(RESUME)), \
+            patch('src.matchmaker_engine.pipeline.JobDescriptionAgent', agentClass(JD)), \
+            patch('src.matchmaker_engine.pipeline.llm_cache.getCache', return_value=None):
+        assert ExtractAndMatchPipeline(engine, executor).run("resume text", "jd text", 1)[2] == {}
+
+def test_run_invalid_inputs():
+    with pytest.raises(ValueError, match="Resume text and job description text cannot be empty."):
+        ExtractAndMatchPipeline(MagicMock()).run("", "jd text", 1)
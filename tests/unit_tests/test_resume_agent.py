@@ -1,5 +1,10 @@
+import json
 import pytest
+import time
+import threading
 from unittest.mock import patch, MagicMock
+from openai import Stream
+from src.utils import llm_policy
 from src.resume_extractor_agent.resume_agent import ResumeAgent
 
 pytestmark = pytest.mark.unit
@@ -339,4 +344,185 @@ def test_deleteAgent_success(resume_agent):
     assert resume_agent.client is None
     assert resume_agent.modelName is None
     assert resume_agent.systemPrompt is None
-    assert resume_agent.jsonOutput is None
\ No newline at end of file
+    assert resume_agent.jsonOutput is None
+
+def test_getJsonOutput_uses_cache(resume_agent):
+    resume_agent.userPrompt = "Test prompt"
+    resume_agent.client = MagicMock()
+    resume_agent.client.chat.completions.create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content='{"key": "value"}'))]
+    )
+    cache = MagicMock()
+    cache.get.return_value = None
+    assert resume_agent.getJsonOutput(cache=cache) == {"key": "value"}
+    cache.put.assert_called_once_with("Test prompt", "test-model", "You are a helpful assistant.", {"key": "value"})
+
+def test_getJsonOutput_cache_hit_skips_llm(resume_agent):
+    resume_agent.userPrompt = "Test prompt"
+    resume_agent.client = MagicMock()
+    cache = MagicMock()
+    cache.get.return_value = {"key": "cached"}
+    assert resume_agent.getJsonOutput(cache=cache) == {"key": "cached"}
+    resume_agent.client.chat.completions.create.assert_not_called()
+    cache.put.assert_not_called()
+
+def streamChunks(*contents):
+    return [MagicMock(choices=[MagicMock(delta=MagicMock(content=content))]) for content in contents]
+
+def test_streamJsonOutput_emits_entities_as_they_complete(resume_agent):
+    resume_agent.userPrompt = "Test prompt"
+    resume_agent.client = MagicMock()
+    resume_agent.client.chat.completions.create.return_value = iter(streamChunks('{"TOOL": "Git",', ' "EDUCATION"', ': "BSc"}'))
+    cache = MagicMock()
+    cache.get.return_value = None
+    stream = resume_agent.streamJsonOutput(cache=cache)
+    assert next(stream) == ("TOOL", "Git")
+    assert resume_agent.jsonOutput is None
+    assert list(stream) == [("EDUCATION", "BSc")]
+    assert resume_agent.jsonOutput == {"TOOL": "Git", "EDUCATION": "BSc"}
+    assert resume_agent.client is None
+    assert resume_agent.response == '{"TOOL": "Git", "EDUCATION": "BSc"}'
+    cache.put.assert_called_once_with("Test prompt", "test-model", "You are a helpful assistant.", {"TOOL": "Git", "EDUCATION": "BSc"})
+
+def test_streamJsonOutput_cache_hit_and_retry(resume_agent):
+    resume_agent.userPrompt = "Test prompt"
+    resume_agent.client = MagicMock()
+    cache = MagicMock()
+    cache.get.return_value = {"TOOL": "cached"}
+    assert list(resume_agent.streamJsonOutput(cache=cache)) == [("TOOL", "cached")]
+    resume_agent.client.chat.completions.create.assert_not_called()
+
+    resume_agent.jsonOutput = None
+    client = MagicMock()
+    client.chat.completions.create.side_effect = [iter(streamChunks("no json")), iter(streamChunks('{"TOOL": "Git"}'))]
+    resume_agent.getClient = MagicMock(side_effect=lambda **kwargs: setattr(resume_agent, "client", client))
+    resume_agent.failoverModels = ["test-model", "paid-model"]
+    with patch('src.utils.llm_policy.RequestPolicy.backoff', return_value=0.25) as backoff, patch('time.sleep') as sleep:
+        assert list(resume_agent.streamJsonOutput()) == [("TOOL", "Git")]
+    assert client.chat.completions.create.call_count == 2
+    # The retry waits out the jittered backoff and goes to the next model of the chain
+    backoff.assert_called_once_with(1)
+    sleep.assert_called_once_with(0.25)
+    assert client.chat.completions.create.call_args.kwargs["model"] == "paid-model"
+    resume_agent.getClient.assert_called_with(maxRetries=0)
+
+def test_streamJsonOutput_fails_after_partial_output(resume_agent):
+    resume_agent.userPrompt = "Test prompt"
+    resume_agent.client = MagicMock()
+    resume_agent.getClient = MagicMock()
+    def brokenStream():
+        yield from streamChunks('{"TOOL": "Git", ')
+        raise ConnectionError("stream dropped")
+    resume_agent.client.chat.completions.create.return_value = brokenStream()
+    stream = resume_agent.streamJsonOutput()
+    assert next(stream) == ("TOOL", "Git")
+    with pytest.raises(ValueError, match="Failed to get response: stream dropped"):
+        next(stream)
+
+def test_streamJsonOutput_closes_an_abandoned_stream(resume_agent):
+    resume_agent.userPrompt = "Test prompt"
+    resume_agent.client = MagicMock()
+    aborted = threading.Event()
+    def chunks():
+        yield from streamChunks('{"TOOL": "Git",')
+        aborted.wait(timeout=5)
+        yield from streamChunks(' "EDUCATION": "BSc"}')
+    stream = MagicMock(spec=Stream)
+    stream.__iter__.return_value = chunks()
+    stream.response = MagicMock()
+    resume_agent.client.chat.completions.create.return_value = stream
+    with patch('src.utils.llm_client.abortResponse', side_effect=lambda response: aborted.set()) as abortResponse:
+        output = resume_agent.streamJsonOutput()
+        assert next(output) == ("TOOL", "Git")
+        output.close()
+        assert aborted.wait(timeout=1)
+    abortResponse.assert_called_once_with(stream.response)
+    for _ in range(100):
+        if stream.close.called:
+            break
+        time.sleep(0.01)
+    stream.close.assert_called_once()
+    assert resume_agent.client is None
+
+def test_requestCompletion_stops_when_cancelled(resume_agent):
+    resume_agent.userPrompt = "Test prompt"
+    resume_agent.client = MagicMock()
+    stream = MagicMock(spec=Stream)
+    stream.__iter__.return_value = iter(streamChunks('{"TOOL": ', '"Git"}'))
+    stream.response = MagicMock()
+    resume_agent.client.chat.completions.create.return_value = stream
+    cancelEvent = llm_policy.CancelEvent()
+    cancelEvent.set()
+    with patch('src.utils.llm_client.abortResponse') as abortResponse:
+        with pytest.raises(llm_policy.RequestCancelled):
+            resume_agent.requestCompletion("test-model", cancelEvent)
+    # The response of an attempt cancelled before it started streaming is closed at once
+    abortResponse.assert_called_once_with(stream.response)
+    stream.close.assert_called_once()
+
+    stream.__iter__.return_value = iter(streamChunks('{"TOOL": ', '"Git"}'))
+    assert resume_agent.requestCompletion("other-model") == ('{"TOOL": "Git"}', {"TOOL": "Git"})
+    assert resume_agent.client.chat.completions.create.call_args.kwargs["model"] == "other-model"
+
+def test_getJsonOutput_fails_over_to_next_model(resume_agent):
+    resume_agent.userPrompt = "Test prompt"
+    resume_agent.failoverModels = ["test-model", "paid-model"]
+    resume_agent.client = MagicMock()
+    def create(model, **kwargs):
+        content = '{"TOOL": "Git"}' if model == "paid-model" else None
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=content))])
+    resume_agent.client.chat.completions.create.side_effect = create
+    with patch('src.utils.llm_policy.time.sleep'):
+        assert resume_agent.getJsonOutput() == {"TOOL": "Git"}
+    assert resume_agent.response == '{"TOOL": "Git"}'
+    assert resume_agent.client is None
+
+COMPLETE = {"EDUCATION": "BSc", "EXPERIENCE": "5 years", "TECHNICAL_SKILL": "Python", "SOFT_SKILL": "",
+            "TOOL": "Git", "CERTIFICATION": "", "DESIGNATION": "Engineer"}
+
+def test_getJsonOutput_repairs_only_missing_keys(resume_agent):
+    resume_agent.userPrompt = "Test prompt"
+    resume_agent.validateSchema = True
+    resume_agent.client = MagicMock()
+    first = {key: value for key, value in COMPLETE.items() if key not in ("TOOL", "DESIGNATION")}
+    first["TECHNICAL_SKILL"] = ["Python"]
+    first["CERTIFICATION"] = {"name": "AWS"}
+    responses = [json.dumps(first), '{"TOOL": "Git", "DESIGNATION": "Engineer", "CERTIFICATION": ""}']
+    resume_agent.client.chat.completions.create.side_effect = lambda **kwargs: MagicMock(choices=[MagicMock(message=MagicMock(content=responses.pop(0)))])
+    client = resume_agent.client
+    resume_agent.getClient = MagicMock(side_effect=lambda **kwargs: setattr(resume_agent, "client", client))
+    assert resume_agent.getJsonOutput() == COMPLETE
+    repairPrompt = client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+    assert repairPrompt.startswith("Extract only these entities: TOOL, CERTIFICATION, DESIGNATION.")
+
+def test_getJsonOutput_fills_keys_the_repair_missed(resume_agent):
+    resume_agent.userPrompt = "Test prompt"
+    resume_agent.validateSchema = True
+    client = MagicMock()
+    client.chat.completions.create.return_value = MagicMock(choices=[MagicMock(message=MagicMock(content='{"TOOL": "Git"}'))])
+    resume_agent.getClient = MagicMock(side_effect=lambda **kwargs: setattr(resume_agent, "client", client))
+    output = resume_agent.getJsonOutput()
+    assert output == {key: "Git" if key == "TOOL" else "" for key in COMPLETE}
+    assert client.chat.completions.create.call_count == 2
+
+def test_streamJsonOutput_holds_back_invalid_values(resume_agent):
+    resume_agent.userPrompt = "Test prompt"
+    resume_agent.validateSchema = True
+    client = MagicMock()
+    resume_agent.getClient = MagicMock(side_effect=lambda **kwargs: setattr(resume_agent, "client", client))
+    first = dict(COMPLETE, TOOL=None)
+    client.chat.completions.create.side_effect = [
+        iter(streamChunks(json.dumps(first))),
+        MagicMock(choices=[MagicMock(message=MagicMock(content='{"TOOL": "Git"}'))]),
+    ]
+    items = list(resume_agent.streamJsonOutput())
+    assert [key for key, _ in items].count("TOOL") == 1
+    assert dict(items) == COMPLETE
+    assert items[-1] == ("TOOL", "Git")
+
+def test_setUserPrompt_compacts_input(resume_agent):
+    resume_agent.setUserPrompt("Python Developer\nPage 1 of 2\nPython  Developer\n   \nSkills: Git")
+    assert resume_agent.userPrompt == "python developer skills: git"
+    assert resume_agent.promptStats["tokens_saved"] > 0
+    with pytest.raises(ValueError, match="User prompt cannot be empty."):
+        resume_agent.setUserPrompt("Page 2\n------")
@@ -0,0 +1,110 @@
+import pytest
+import mongomock
+import numpy as np
+from unittest.mock import patch, MagicMock
+from src.matchmaker_engine.matching_engine import MatchingEngine
+from src.matchmaker_engine.screening import ScreeningPipeline
+
+pytestmark = pytest.mark.unit
+
+VOCABULARY = ["python", "java", "git", "docker", "years", "engineer", "bachelor"]
+
+def encoder(phrases, **kwargs):
+    return np.array([[1.0 + (word in phrase) for word in VOCABULARY] for phrase in phrases])
+
+@pytest.fixture
+def models():
+    model1Mock = MagicMock()
+    model2Mock = MagicMock()
+    model1Mock.encode.side_effect = encoder
+    model2Mock.encode.side_effect = encoder
+    with patch('src.matchmaker_engine.screening.model1', model1Mock), \
+            patch('src.matchmaker_engine.screening.model2', model2Mock), \
+            patch('src.matchmaker_engine.matching_engine.model1', model1Mock), \
+            patch('src.matchmaker_engine.matching_engine.model2', model2Mock):
+        yield model1Mock, model2Mock
+
+@pytest.fixture
+def collection():
+    collection = mongomock.MongoClient().db["match_history"]
+    collection.insert_many([
+        {"resume_json": {"TECHNICAL_SKILL": "Java", "TOOL": "Docker", "EXPERIENCE": "1 years"}},
+        {"resume_json": {"TECHNICAL_SKILL": "Python, Java", "TOOL": "Git", "EXPERIENCE": "5 years"}},
+        {"resume_text": "No JSON stored"},
+        {"resume_json": {"TECHNICAL_SKILL": "Python", "TOOL": "Git, Docker", "DESIGNATION": "Engineer"}},
+        {"resume_json": {}},
+        {"resume_json": {"EDUCATION": "Bachelor"}},
+    ])
+    return collection
+
+JD = {"TECHNICAL_SKILL": "Python", "TOOL": "Git", "EXPERIENCE": "3 years", "DESIGNATION": "Engineer"}
+
+def test_iter_resumes_batches_and_skips_documents_without_json(collection):
+    pipeline = ScreeningPipeline(engine=MatchingEngine(), batchSize=2, processes=0)
+    batches = list(pipeline.iterResumes(collection))
+    assert [len(batch) for batch in batches] == [2, 2]
+    assert all(isinstance(resume_json, dict) for batch in batches for _, resume_json in batch)
+
+def test_screen_matches_engine_scores(models, collection):
+    engine = MatchingEngine()
+    pipeline = ScreeningPipeline(engine=engine, batchSize=3, topK=10, processes=0)
+    results = pipeline.screen(JD, collection)
+    assert len(results) == 4
+    scores = [result["overall_score"] for result in results]
+    assert scores == sorted(scores, reverse=True)
+    documents = {str(document["_id"]): document["resume_json"] for document in collection.find({"resume_json": {"$ne": {}}, "resume_text": {"$exists": False}})}
+    for result in results:
+        expected = engine.match(documents[result["id"]], JD)
+        for entity, score in expected.items():
+            assert result["match_report"][entity] == pytest.approx(score, abs=1e-5)
+
+def test_screen_keeps_top_k(models, collection):
+    pipeline = ScreeningPipeline(engine=MatchingEngine(), batchSize=1, topK=2, processes=0)
+    everything = pipeline.screen(JD, collection, topK=10)
+    top = pipeline.screen(JD, collection)
+    assert [result["id"] for result in top] == [result["id"] for result in everything[:2]]
+
+def test_screen_encodes_each_batch_once(models, collection):
+    model1Mock, _ = models
+    pipeline = ScreeningPipeline(engine=MatchingEngine(), batchSize=10, processes=0)
+    pipeline.screen(JD, collection)
+    # Four job entities plus one call for the unique phrases of the whole batch
+    assert model1Mock.encode.call_count == 5
+
+def test_screen_process_pool_agrees_with_in_process(models, collection):
+    engine = MatchingEngine()
+    inProcess = ScreeningPipeline(engine=engine, batchSize=2, processes=0).screen(JD, collection)
+    pooled = ScreeningPipeline(engine=engine, batchSize=2, processes=2).screen(JD, collection)
+    assert [result["id"] for result in pooled] == [result["id"] for result in inProcess]
+    assert [result["overall_score"] for result in pooled] == pytest.approx([result["overall_score"] for result in inProcess])
+
+def test_screen_invalid_inputs(collection):
+    pipeline = ScreeningPipeline(engine=MatchingEngine(), processes=0)
+    with pytest.raises(ValueError, match="Job description JSON cannot be empty."):
+        pipeline.screen({}, collection)
+    with pytest.raises(ValueError, match="Batch size must be a positive integer."):
+        ScreeningPipeline(engine=MatchingEngine(), batchSize=0)
+    for topK in (0, -1):
+        with pytest.raises(ValueError, match="Top K must be a positive integer."):
+            pipeline.screen({"TOOL": "Git"}, collection, topK=topK)
+        with pytest.raises(ValueError, match="Top K must be a positive integer."):
+            ScreeningPipeline(engine=MatchingEngine(), topK=topK)
+
+def test_build_index_and_screen_candidates(models, collection):
+    pipeline = ScreeningPipeline(engine=MatchingEngine(), batchSize=2, processes=0)
+    index = pipeline.buildIndex(collection, nlist=2)
+    assert len(index) == 4
+    everything = pipeline.screen(JD, collection)
+    candidates = pipeline.retrieve(JD, index, candidates=2)
+    assert len(candidates) == 2
+    results = pipeline.screen(JD, collection, index=index, candidates=2)
+    assert sorted(result["id"] for result in results) == sorted(candidates)
+    assert {result["id"]: result["overall_score"] for result in results} == {
+        result["id"]: result["overall_score"] for result in everything if result["id"] in candidates
+    }
+
+def test_index_resumes_refreshes_entries(models, collection):
+    pipeline = ScreeningPipeline(engine=MatchingEngine(), processes=0)
+    index = pipeline.buildIndex(collection, nlist=2)
+    assert pipeline.indexResumes(index, [("fresh", {"TOOL": "Docker"}), ("empty", {"TOOL": ""})]) == 1
+    assert "fresh" in index and "empty" not in index
@@ -138,10 +138,9 @@ def test_make_match_success(skill_matchmaker):
     skill_matchmaker.model2 = model2Mock
     skill_matchmaker.resumeSkill = ['python', 'java']
     skill_matchmaker.jobSkill = ['python', 'machine learning', 'data science']
-    model1Mock.encode.return_value = [np.array([[0.1]]) * 6]
-    model2Mock.encode.return_value = [np.array([[0.1]]) * 6]
-    with patch('src.skill_matchmaker.skill_matching.cosine_similarity', return_value=np.array([[1.0]])):
-            score = skill_matchmaker.makeMatch()
+    model1Mock.encode.side_effect = lambda phrases: np.tile([1.0, 0.0, 0.0], (len(phrases), 1))
+    model2Mock.encode.side_effect = lambda phrases: np.tile([1.0, 0.0, 0.0], (len(phrases), 1))
+    score = skill_matchmaker.makeMatch()
     assert score == 1.0
 
 
@@ -223,4 +222,8 @@ def test_reset_success(skill_matchmaker):
     assert skill_matchmaker.similarity.ensembleScore is not None
     assert isinstance(skill_matchmaker.similarity.ensembleScore, list)
     assert skill_matchmaker.resumeSkill is None
-    assert skill_matchmaker.jobSkill is None
\ No newline at end of file
+    assert skill_matchmaker.jobSkill is None
+
+def test_unknown_assignment_strategy_fails_at_init():
+    with pytest.raises(ValueError, match="Unknown assignment strategy: random"):
+        SkillMatching(assignmentStrategy="random")
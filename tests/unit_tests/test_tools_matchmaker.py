@@ -138,10 +138,9 @@ def test_make_match_success(tools_matchmaker):
     tools_matchmaker.model2 = model2Mock
     tools_matchmaker.resumeTool = ['Docker', 'Kubernetes', 'Git', 'Jenkins', 'VS Code', 'Postman', 'Jira', 'MongoDB']
     tools_matchmaker.jobTool = ['Docker', 'GitHub', 'Jenkins', 'Azure DevOps', 'Jira', 'MySQL', 'Postman']
-    model1Mock.encode.return_value = [np.array([[0.1]])]
-    model2Mock.encode.return_value = [np.array([[0.1]])]
-    with patch('src.tools_matchmaker.tools_matching.cosine_similarity', return_value=np.array([[1.0]])):
-            score = tools_matchmaker.makeMatch()
+    model1Mock.encode.side_effect = lambda phrases: np.tile([1.0, 0.0, 0.0], (len(phrases), 1))
+    model2Mock.encode.side_effect = lambda phrases: np.tile([1.0, 0.0, 0.0], (len(phrases), 1))
+    score = tools_matchmaker.makeMatch()
     assert score == 1.0
 
 
@@ -221,4 +220,9 @@ def test_reset_success(tools_matchmaker):
     assert tools_matchmaker.similarity.ensembleScore is not None
     assert isinstance(tools_matchmaker.similarity.ensembleScore, list)
     assert tools_matchmaker.resumeTool is None
-    assert tools_matchmaker.jobTool is None
\ No newline at end of file
+    assert tools_matchmaker.jobTool is None
+
+def test_unknown_assignment_strategy_fails_at_init():
+    with patch('src.tools_matchmaker.tools_matching.config.ASSIGNMENT_STRATEGY', 'random'):
+        with pytest.raises(ValueError, match="Unknown assignment strategy: random"):
+            ToolMatching()
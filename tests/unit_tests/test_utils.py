@@ -1,8 +1,34 @@
 import pytest
 from src.utils import security
 from src.utils import model_load
+from src.utils import embedding
+from src.utils.embedding_cache import EmbeddingCache
+from src.utils import embedding_store
+from src.utils import onnx_backend
+from src.utils import concurrency
+from src.utils.micro_batcher import MicroBatcher
+from src.utils.embedding_server import EmbeddingServer, RemoteEncoder
+from src.utils.vector_index import IVFIndex
+from src.utils import report_cache
+from src.utils.report_cache import ReportCache
+from src.utils import llm_cache
+from src.utils.llm_cache import LLMCache
+from src.utils import llm_client
+from src.utils.stream_json import IncrementalJSONParser
+from src.utils import llm_policy
+from src.utils.llm_policy import RequestPolicy, LatencyTracker, failoverChain
+from src.utils import extraction_schema
+from src.utils import prompt_compactor
+import os
+import json
+import time
+import threading
+import http.server
+import numpy as np
+from pathlib import Path
 import src.utils.send_email as email_utils
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
+from concurrent.futures import ThreadPoolExecutor
 
 
 pytestmark = pytest.mark.unit
@@ -51,6 +77,28 @@ def test_model_load(model_load_fixture):
     assert model1 is not None
     assert model2 is not None
 
+def test_model_registry_loads_on_first_use():
+    registry = model_load.ModelRegistry()
+    loader = MagicMock(return_value=MagicMock())
+    registry.register("model", loader)
+    model = model_load.LazyModel(registry, "model", "model:test")
+    assert model.modelKey == "model:test"
+    assert not registry.isReady()
+    loader.assert_not_called()
+    model.encode(["python"])
+    model.encode(["java"])
+    loader.assert_called_once()
+    assert registry.isLoaded("model")
+    assert registry.isReady()
+
+def test_model_registry_warmup():
+    registry = model_load.ModelRegistry()
+    registry.register("model1", MagicMock(return_value=MagicMock()))
+    registry.register("model2", MagicMock(return_value=MagicMock()))
+    assert registry.warmup().isReady()
+    with pytest.raises(ValueError, match="Unknown model: model3"):
+        registry.get("model3")
+
 @patch('src.utils.send_email.send_email')
 def test_send_email(mock_send):
     email = "test@example.com"
@@ -63,5 +111,795 @@ def test_send_email(mock_send):
     email_utils.send_email(email, subject, html_content)
     mock_send.assert_called_once_with(email, subject, html_content)
 
+def test_encode_phrases_batched():
+    model = MagicMock()
+    model.encode.side_effect = lambda phrases: np.array([[3.0, 4.0]] * len(phrases))
+    embeddings = embedding.encodePhrases(model, ["python", "", "java"])
+    model.encode.assert_called_once_with(["python", "java"])
+    assert embeddings.dtype == np.float32
+    assert embeddings.shape == (3, 2)
+    assert np.allclose(embeddings[0], [0.6, 0.8])
+    assert np.allclose(embeddings[1], [0.0, 0.0])
+
+def test_encode_phrases_all_empty():
+    model = MagicMock()
+    embeddings = embedding.encodePhrases(model, ["", ""])
+    model.encode.assert_not_called()
+    assert embeddings.shape == (2, 0)
+    assert not embedding.similarityMatrix(embeddings, embeddings).any()
+
+def test_similarity_matrix():
+    jobEmbeddings = np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+    resumeEmbeddings = np.array([[1.0, 0.0], [-1.0, 0.0], [0.6, 0.8]], dtype=np.float32)
+    matrix = embedding.similarityMatrix(jobEmbeddings, resumeEmbeddings)
+    assert matrix.shape == (2, 3)
+    assert np.allclose(matrix, [[1.0, 0.0, 0.6], [0.0, 0.0, 0.8]])
+
+def test_greedy_match():
+    model1Matrix = np.array([[0.9, 0.8], [0.95, 0.7], [0.5, 0.4]])
+    model2Matrix = np.array([[0.7, 0.6], [0.9, 0.5], [0.3, 0.2]])
+    model1Scores, model2Scores = embedding.greedyMatch(model1Matrix, model2Matrix)
+    assert model1Scores == [0.9, 0.7, 0.0]
+    assert model2Scores == [0.7, 0.5, 0.0]
+
+def test_hungarian_match():
+    model1Matrix = np.array([[0.9, 0.8], [0.95, 0.7], [0.5, 0.4]])
+    model2Matrix = np.array([[0.7, 0.6], [0.9, 0.5], [0.3, 0.2]])
+    model1Scores, model2Scores = embedding.hungarianMatch(model1Matrix, model2Matrix)
+    assert model1Scores == [0.8, 0.95, 0.0]
+    assert model2Scores == [0.6, 0.9, 0.0]
+
+def test_hungarian_match_order_independent():
+    rng = np.random.default_rng(0)
+    model1Matrix = rng.random((6, 8))
+    order = rng.permutation(6)
+    scores, _ = embedding.hungarianMatch(model1Matrix, model1Matrix)
+    shuffled, _ = embedding.hungarianMatch(model1Matrix[order], model1Matrix[order])
+    assert np.allclose(np.array(scores)[order], shuffled)
+
+def test_hungarian_match_skips_zero_scores():
+    model1Matrix = np.array([[0.0, 0.0], [0.0, 0.5]])
+    model1Scores, model2Scores = embedding.hungarianMatch(model1Matrix, model1Matrix)
+    assert model1Scores == [0.0, 0.5]
+    assert embedding.hungarianMatch(np.zeros((2, 0)), np.zeros((2, 0))) == ([0.0, 0.0], [0.0, 0.0])
+
+def test_assign_match_unknown_strategy():
+    with pytest.raises(ValueError, match="Unknown assignment strategy: random"):
+        embedding.assignMatch(np.ones((1, 1)), np.ones((1, 1)), "random")
+
+def test_cascade_matrix_encodes_ambiguous_pairs_only():
+    vectors = {"python": [1.0, 0.0], "java": [0.0, 1.0], "py": [0.6, 0.8], "c": [0.0, 1.0]}
+    model1 = MagicMock()
+    model1.encode.side_effect = lambda phrases, **kwargs: np.array([vectors[phrase] for phrase in phrases])
+    model2Matrix = np.array([[0.95, 0.5], [0.1, 0.2]])
+    model1Matrix = embedding.cascadeMatrix(model1, ["python", "java"], ["py", "c"], model2Matrix, 0.3, 0.9)
+    encoded = [phrase for call in model1.encode.call_args_list for phrase in call[0][0]]
+    assert sorted(encoded) == ["c", "python"]
+    assert np.allclose(model1Matrix, [[0.95, 0.0], [0.1, 0.2]])
+
+def test_cascade_matrix_invalid_thresholds():
+    with pytest.raises(ValueError, match="Cascade LOW threshold must not exceed HIGH."):
+        embedding.cascadeMatrix(MagicMock(), ["a"], ["b"], np.ones((1, 1)), 0.9, 0.3)
+
+def test_score_matrices_cascade_disabled():
+    model = MagicMock()
+    model.encode.side_effect = lambda phrases, **kwargs: np.tile([1.0, 0.0], (len(phrases), 1))
+    cascade = {"ENABLED": False, "LOW": 0.3, "HIGH": 0.85}
+    model1Matrix, model2Matrix = embedding.scoreMatrices(model, model, ["python"], ["python", "java"], cascade=cascade)
+    assert model.encode.call_count == 4
+    assert np.allclose(model1Matrix, model2Matrix)
+
+def test_build_table_deduplicates():
+    model = MagicMock()
+    model.encode.side_effect = lambda phrases, **kwargs: np.array([[3.0, 4.0]] * len(phrases))
+    table = embedding.buildTable(model, ["python", "aws", "python", ""])
+    model.encode.assert_called_once()
+    assert model.encode.call_args[0][0] == ["aws", "python"]
+    assert len(table) == 2
+    assert "python" in table
+    assert np.allclose(table.lookup(["python"]), [[0.6, 0.8]])
+
+def test_encode_phrases_uses_table():
+    model = MagicMock()
+    model.encode.side_effect = lambda phrases, **kwargs: np.array([[1.0, 0.0]] * len(phrases))
+    table = embedding.buildTable(model, ["python"])
+    model.encode.reset_mock()
+    embeddings = embedding.encodePhrases(model, ["python", "java"], table)
+    model.encode.assert_called_once_with(["java"])
+    assert embeddings.shape == (2, 2)
+
+def test_embedding_cache_hits_and_misses():
+    cache = EmbeddingCache(maxBytes=1024 * 1024)
+    assert cache.get("model1", "python") is None
+    cache.put("model1", "python", np.ones(4, dtype=np.float32))
+    assert np.allclose(cache.get("model1", "python"), np.ones(4))
+    assert cache.get("model2", "python") is None
+    stats = cache.getStats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["entries"] == 1
+    with pytest.raises(ValueError, match="Cache budget must be a non-negative number of bytes."):
+        EmbeddingCache(maxBytes=None)
+
+def test_embedding_cache_lru_eviction():
+    vector = np.ones(64, dtype=np.float32)
+    entrySize = EmbeddingCache._entrySize(("model1", "aaaa"), vector)
+    cache = EmbeddingCache(maxBytes=entrySize * 2)
+    cache.put("model1", "aaaa", vector)
+    cache.put("model1", "bbbb", vector)
+    cache.get("model1", "aaaa")
+    cache.put("model1", "cccc", vector)
+    assert cache.get("model1", "bbbb") is None
+    assert cache.get("model1", "aaaa") is not None
+    assert cache.get("model1", "cccc") is not None
+    assert cache.getStats()["evictions"] == 1
+    assert cache.currentBytes <= cache.maxBytes
+
+def test_encode_phrases_uses_cache():
+    cache = EmbeddingCache(maxBytes=1024 * 1024)
+    model = MagicMock()
+    model.modelKey = "test-model"
+    model.encode.side_effect = lambda phrases, **kwargs: np.array([[3.0, 4.0]] * len(phrases))
+    with patch('src.utils.embedding.embeddingCache', cache):
+        embedding.encodePhrases(model, ["python", "aws"])
+        embeddings = embedding.encodePhrases(model, ["python", "docker", "python"])
+    assert model.encode.call_count == 2
+    assert model.encode.call_args[0][0] == ["docker"]
+    assert np.allclose(embeddings[2], [0.6, 0.8])
+    assert cache.getStats()["hits"] == 1
+
+def test_collect_dataset_phrases():
+    phrases = embedding_store.collectDatasetPhrases("data")
+    assert "python" in phrases
+    assert "docker" in phrases
+    assert len(phrases) == len(set(phrases))
+    assert all(phrase == phrase.strip().lower() for phrase in phrases)
+
+def test_embedding_store_build_and_load(tmp_path):
+    model = MagicMock()
+    model.encode.side_effect = lambda phrases, **kwargs: np.array([[3.0, 4.0]] * len(phrases))
+    embedding_store.buildStore(str(tmp_path), {"test-model": model}, ["python", "aws"], dtype="float16")
+    store = embedding_store.EmbeddingStore(str(tmp_path)).load()
+    assert len(store) == 2
+    assert store.hasModel("test-model")
+    assert not store.hasModel("other-model")
+    found, missing = store.getMany("test-model", ["python", "docker"])
+    assert missing == ["docker"]
+    assert found["python"].dtype == np.float32
+    assert np.allclose(found["python"], [0.6, 0.8], atol=1e-3)
+    assert isinstance(store.matrices["test-model"], np.memmap)
+    with pytest.raises(ValueError, match="dtype must be 'float16' or 'float32'."):
+        embedding_store.buildStore(str(tmp_path), {"test-model": model}, ["python"], dtype="int8")
+
+def test_embedding_store_rebuild_is_atomic(tmp_path):
+    path = str(tmp_path / "store")
+    model = MagicMock()
+    model.weightsHash = "old-weights"
+    model.encode.side_effect = lambda phrases, **kwargs: np.array([[3.0, 4.0]] * len(phrases))
+    embedding_store.buildStore(path, {"test-model": model}, ["python", "aws"], dtype="float32")
+    mapped = embedding_store.EmbeddingStore(path).load()
+    # A rebuild that fails halfway leaves the previous store untouched
+    model.encode.side_effect = [np.array([[1.0, 0.0]]), RuntimeError("encoder crashed")]
+    with pytest.raises(RuntimeError, match="encoder crashed"):
+        embedding_store.buildStore(path, {"test-model": model}, ["python", "aws"], dtype="float32", batchSize=1)
+    assert sorted(os.listdir(tmp_path)) == ["store"]
+    assert np.allclose(embedding_store.EmbeddingStore(path).getMany("test-model", ["aws"], "old-weights")[0]["aws"], [0.6, 0.8])
+    model.weightsHash = "new-weights"
+    model.encode.side_effect = lambda phrases, **kwargs: np.array([[0.0, 2.0]] * len(phrases))
+    embedding_store.buildStore(path, {"test-model": model}, ["python", "aws"], dtype="float32")
+    assert sorted(os.listdir(tmp_path)) == ["store"]
+    # Workers that mapped the old matrices keep reading them intact
+    assert np.allclose(mapped.getMany("test-model", ["python"], "old-weights")[0]["python"], [0.6, 0.8])
+    store = embedding_store.EmbeddingStore(path)
+    assert np.allclose(store.getMany("test-model", ["python"], "new-weights")[0]["python"], [0.0, 1.0])
+    # Vectors of other weights are never served
+    assert store.getMany("test-model", ["python"], "old-weights") == ({}, ["python"])
+    assert not store.hasModel("test-model")
+
+def test_weights_hash_follows_file_changes(tmp_path):
+    path = tmp_path / "model.pt"
+    assert model_load.weights_hash(path) is None
+    path.write_bytes(b"weights")
+    first = model_load.weights_hash(path)
+    assert first == model_load.weights_hash(str(path))
+    path.write_bytes(b"retrained weights")
+    assert model_load.weights_hash(path) != first
+    model = model_load.LazyModel(model_load.ModelRegistry(), "model", "model:test", weightsPaths=(tmp_path / "missing.pt", path))
+    assert model.weightsHash == model_load.weights_hash(path)
+
+def test_encode_phrases_uses_store(tmp_path):
+    model = MagicMock()
+    model.modelKey = "test-model"
+    model.encode.side_effect = lambda phrases, **kwargs: np.array([[3.0, 4.0]] * len(phrases))
+    embedding_store.buildStore(str(tmp_path), {"test-model": model}, ["python"], dtype="float32")
+    model.encode.reset_mock()
+    store = embedding_store.EmbeddingStore(str(tmp_path))
+    with patch('src.utils.embedding.embeddingStore', store), \
+            patch('src.utils.embedding.embeddingCache', EmbeddingCache(maxBytes=1024 * 1024)):
+        embeddings = embedding.encodePhrases(model, ["python", "java"])
+    model.encode.assert_called_once_with(["java"])
+    assert np.allclose(embeddings[0], [0.6, 0.8])
+
+def test_onnx_file_name():
+    assert onnx_backend.onnxFileName(None) == "onnx/model.onnx"
+    assert onnx_backend.onnxFileName("avx2") == "onnx/model_qint8_avx2.onnx"
+    with pytest.raises(ValueError, match="Unknown quantization config: int4"):
+        onnx_backend.onnxFileName("int4")
+
+def test_load_onnx_model_missing_export(tmp_path):
+    with pytest.raises(RuntimeError, match="ONNX model not found"):
+        onnx_backend.loadOnnxModel(str(tmp_path), "avx2")
+
+def test_micro_batcher_coalesces_concurrent_requests():
+    calls = []
+    def encode(phrases):
+        calls.append(list(phrases))
+        return np.array([[float(len(phrase)), 1.0] for phrase in phrases])
+    batcher = MicroBatcher(encode, maxWaitMs=200, maxBatchSize=100)
+    requests = [["python", "java"], ["java", "go"], ["rust"]]
+    futures = [batcher.submit(phrases) for phrases in requests]
+    results = [future.result(timeout=5) for future in futures]
+    assert len(calls) == 1
+    assert sorted(calls[0]) == ["go", "java", "python", "rust"]
+    assert np.allclose(results[1], [[4.0, 1.0], [2.0, 1.0]])
+    assert batcher.batches == 1
+    assert batcher.requests == 3
+
+def test_micro_batcher_max_batch_size():
+    calls = []
+    def encode(phrases):
+        calls.append(list(phrases))
+        return np.ones((len(phrases), 2))
+    batcher = MicroBatcher(encode, maxWaitMs=1000, maxBatchSize=2)
+    futures = [batcher.submit(["a", "b"]), batcher.submit(["c"])]
+    for future in futures:
+        future.result(timeout=5)
+    assert calls[0] == ["a", "b"]
+
+def test_micro_batcher_propagates_errors():
+    batcher = MicroBatcher(MagicMock(side_effect=Exception("Encoding failed")), maxWaitMs=0)
+    with pytest.raises(Exception, match="Encoding failed"):
+        batcher.encode(["python"])
+    with pytest.raises(ValueError, match="maxBatchSize must be a positive integer."):
+        MicroBatcher(MagicMock(), maxBatchSize=0)
+
+def test_lazy_model_uses_batcher():
+    registry = model_load.ModelRegistry()
+    loaded = MagicMock()
+    registry.register("model", MagicMock(return_value=loaded))
+    batcher = MagicMock()
+    batcher.encode.return_value = np.ones((1, 2))
+    model = model_load.LazyModel(registry, "model", "model:test", batcher)
+    model.encode(["python"])
+    batcher.encode.assert_called_once_with(["python"])
+    model.encode("python")
+    loaded.encode.assert_called_once_with("python")
+
+def test_embedding_server_round_trip(tmp_path):
+    model = MagicMock()
+    model.encode.side_effect = lambda phrases, **kwargs: np.array([[float(len(phrase))] * 4 for phrase in phrases])
+    socketPath = str(tmp_path / "embed.sock")
+    server = EmbeddingServer(socketPath, {"model1": model})
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    encoder = RemoteEncoder(socketPath, "model1", bufferBytes=32)
+    try:
+        assert np.allclose(encoder.encode(["go"]), [[2.0] * 4])
+        # Larger than the 32 byte buffer, the server hands over a bigger block
+        encoded = encoder.encode(["python", "java", "rust"])
+        assert encoded.shape == (3, 4)
+        assert np.allclose(encoded[:, 0], [6.0, 4.0, 4.0])
+        assert encoder._block.size >= encoded.nbytes
+        unknown = RemoteEncoder(socketPath, "model3")
+        with pytest.raises(RuntimeError, match="Embedding server error: Unknown model: model3"):
+            unknown.encode(["python"])
+        unknown.close()
+    finally:
+        encoder.close()
+        server.shutdown()
+        server.server_close()
+
+def test_remote_encoder_server_unavailable(tmp_path):
+    encoder = RemoteEncoder(str(tmp_path / "missing.sock"), "model1")
+    with pytest.raises(RuntimeError, match="Embedding server unavailable"):
+        encoder.encode(["python"])
+
+def test_convert_to_safetensors(tmp_path):
+    import torch
+    from safetensors.torch import load_file
+    weight = torch.arange(6, dtype=torch.float32).reshape(2, 3)
+    stateDict = {"encoder.weight": weight, "decoder.weight": weight}
+    torch.save(stateDict, tmp_path / "model.pt")
+    model_load.convert_to_safetensors(tmp_path / "model.pt", tmp_path / "model.safetensors")
+    loaded = load_file(str(tmp_path / "model.safetensors"))
+    assert set(loaded) == {"encoder.weight", "decoder.weight"}
+    assert torch.equal(loaded["decoder.weight"], weight)
+    assert model_load.is_converted_from(tmp_path / "model.safetensors", tmp_path / "model.pt")
+    # Replacing the .pt makes the conversion stale until it is converted again
+    torch.save({"encoder.weight": weight * 2}, tmp_path / "model.pt")
+    assert not model_load.is_converted_from(tmp_path / "model.safetensors", tmp_path / "model.pt")
+    assert not model_load.is_converted_from(tmp_path / "missing.safetensors", tmp_path / "model.pt")
+    (tmp_path / "model.pt").unlink()
+    assert model_load.is_converted_from(tmp_path / "model.safetensors", tmp_path / "model.pt")
+
+def test_concurrency_budget(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    monkeypatch.setattr(concurrency.os, "cpu_count", lambda: 16)
+    monkeypatch.setattr(concurrency.config, "TORCH_THREADS", None)
+    monkeypatch.setattr(concurrency.config, "MATCH_EXECUTOR_WORKERS", None)
+    assert concurrency.workerCount() == 4
+    assert concurrency.torchThreads() == 4
+    assert concurrency.executorWorkers() == 4
+    monkeypatch.setattr(concurrency.config, "TORCH_THREADS", 2)
+    monkeypatch.setattr(concurrency.config, "MATCH_EXECUTOR_WORKERS", 8)
+    assert concurrency.torchThreads() == 2
+    assert concurrency.executorWorkers() == 8
+
+def test_gunicorn_conf_exports_worker_count(monkeypatch):
+    import runpy
+    confPath = str(Path(__file__).resolve().parents[2] / "gunicorn.conf.py")
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.setattr(concurrency.os, "cpu_count", lambda: 16)
+    settings = runpy.run_path(confPath)
+    assert settings["workers"] == 8
+    assert concurrency.workerCount() == 8
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    assert runpy.run_path(confPath)["workers"] == 3
+
+def test_concurrency_shared_executor():
+    assert concurrency.getExecutor() is concurrency.getExecutor()
+
+def test_configure_torch_once(monkeypatch):
+    monkeypatch.setattr(concurrency, "_torchConfigured", False)
+    torchMock = MagicMock()
+    torchMock.set_num_interop_threads.side_effect = RuntimeError("already started")
+    concurrency.configureTorch(torchMock)
+    concurrency.configureTorch(torchMock)
+    torchMock.set_num_threads.assert_called_once_with(concurrency.torchThreads())
+
+def test_pooled_embedding():
+    model = MagicMock()
+    model.encode.return_value = np.array([[1.0, 0.0], [0.0, 1.0]])
+    pooled = embedding.pooledEmbedding(model, ["python", "", "git"])
+    assert np.allclose(pooled, [np.sqrt(0.5), np.sqrt(0.5)])
+    assert embedding.pooledEmbedding(model, ["", ""]) is None
+
+def vector_corpus(size=2000, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((20, dim))
+    return centres[rng.integers(0, 20, size)] + 0.1 * rng.standard_normal((size, dim))
+
+def test_vector_index_search_matches_brute_force():
+    vectors = vector_corpus()
+    index = IVFIndex.build(range(len(vectors)), vectors, nlist=16, nprobe=16)
+    query = vectors[7]
+    assert index.search(query, k=5) == index.bruteForce(query, k=5)
+    assert index.search(query, k=1)[0][0] == "7"
+    recall = np.mean([
+        len({i for i, _ in index.search(q, k=20, nprobe=4)} & {i for i, _ in index.bruteForce(q, k=20)}) / 20
+        for q in vectors[:50]
+    ])
+    assert recall > 0.8
+
+def test_vector_index_insert_and_delete():
+    vectors = vector_corpus()
+    index = IVFIndex.build(range(100), vectors[:100], nlist=8)
+    index.add(["new"], vectors[500:501])
+    assert "new" in index
+    assert index.search(vectors[500], k=1)[0][0] == "new"
+    assert index.remove(["new", "missing"]) == 1
+    assert "new" not in index
+    assert index.search(vectors[500], k=1)[0][0] != "new"
+    # Re-inserting an id replaces its vector
+    index.add(["3"], vectors[600:601])
+    assert len(index) == 100
+    assert index.search(vectors[600], k=1)[0][0] == "3"
+
+def test_vector_index_requires_training():
+    index = IVFIndex(dim=4)
+    with pytest.raises(RuntimeError, match="Index is not trained"):
+        index.add(["a"], np.ones((1, 4)))
+    assert index.search(np.ones(4)) == []
+
+def test_vector_index_save_and_load(tmp_path):
+    vectors = vector_corpus()
+    index = IVFIndex.build(range(len(vectors)), vectors, nlist=16)
+    index.remove(["0"])
+    index.save(tmp_path / "index")
+    loaded = IVFIndex.load(tmp_path / "index")
+    assert isinstance(loaded.vectors, np.memmap)
+    assert len(loaded) == len(vectors) - 1
+    assert loaded.search(vectors[5], k=3) == index.search(vectors[5], k=3)
+    # The first insert after a load moves the rows off the read-only map
+    loaded.add(["new"], vectors[:1])
+    assert loaded.search(vectors[0], k=1)[0][0] in ("new", "0")
+    assert "0" not in loaded
+
+def test_vector_index_save_replaces_the_old_index(tmp_path):
+    vectors = vector_corpus()
+    index = IVFIndex.build(range(len(vectors)), vectors, nlist=16)
+    index.save(tmp_path / "index")
+    mapped = IVFIndex.load(tmp_path / "index")
+    expected = mapped.search(vectors[5], k=3)
+    # A save that fails halfway leaves the previous index untouched
+    with patch('src.utils.vector_index.np.save', side_effect=[None, OSError("disk full")]):
+        with pytest.raises(OSError, match="disk full"):
+            index.save(tmp_path / "index")
+    assert os.listdir(tmp_path) == ["index"]
+    assert IVFIndex.load(tmp_path / "index").search(vectors[5], k=3) == expected
+    index.remove([str(documentId) for documentId in range(10)])
+    index.save(tmp_path / "index")
+    assert os.listdir(tmp_path) == ["index"]
+    assert len(IVFIndex.load(tmp_path / "index")) == len(vectors) - 10
+    # Workers that mapped the old vectors keep ids and rows paired
+    assert mapped.search(vectors[5], k=3) == expected
+
+
+def test_report_cache_memory_lru_and_ttl(monkeypatch):
+    cache = ReportCache(maxEntries=2, ttlSeconds=10)
+    cache.put("a", {"TOOL": 0.5})
+    cache.put("b", {"TOOL": 0.6})
+    assert cache.get("a") == {"TOOL": 0.5}
+    cache.put("c", {"TOOL": 0.7})
+    assert cache.get("b") is None
+    now = report_cache.time.time()
+    monkeypatch.setattr(report_cache.time, "time", lambda: now + 60)
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+    assert stats["hit_ratio"] == pytest.approx(1 / 3)
+
+def test_report_cache_returns_copies():
+    cache = ReportCache()
+    cache.put("a", {"TOOL": 0.5})
+    cache.get("a")["TOOL"] = 1.0
+    assert cache.get("a") == {"TOOL": 0.5}
+
+def test_report_cache_disk_tier_is_shared(tmp_path):
+    path = tmp_path / "cache" / "reports.sqlite"
+    first = ReportCache(diskPath=path, diskMaxEntries=2)
+    second = ReportCache(diskPath=path, diskMaxEntries=2)
+    first.put("a", {"TOOL": 0.5})
+    assert second.get("a") == {"TOOL": 0.5}
+    assert second.stats()["disk_hits"] == 1
+    first.put("b", {"TOOL": 0.6})
+    first.put("c", {"TOOL": 0.7})
+    assert len(first.disk) == 2
+
+def test_report_cache_stats_survive_a_broken_disk_tier(tmp_path):
+    cache = ReportCache(maxEntries=2, ttlSeconds=10, diskPath=str(tmp_path / "reports.sqlite"))
+    cache.put("a", {"TOOL": 0.5})
+    assert cache.stats()["disk_entries"] == 1
+    cache.disk = MagicMock()
+    cache.disk.__len__.side_effect = report_cache.sqlite3.OperationalError("database is locked")
+    stats = cache.stats()
+    assert stats["disk_entries"] is None
+    assert stats["memory_entries"] == 1
+
+def test_report_cache_key_is_canonical():
+    cache = ReportCache()
+    key = cache.key({"TOOL": "Git", "EDUCATION": "BS"}, {"TOOL": "Git"}, "v1")
+    assert key == cache.key({"EDUCATION": "BS", "TOOL": "Git"}, {"TOOL": "Git"}, "v1")
+    assert key != cache.key({"TOOL": "Git", "EDUCATION": "BS"}, {"TOOL": "Git"}, "v2")
+
+def test_llm_cache_keys_on_text_model_and_prompt(tmp_path):
+    cache = LLMCache(tmp_path / "llm.sqlite")
+    cache.put("resume text", "model-a", "system prompt", {"TOOL": "Git"})
+    assert cache.get("resume text", "model-a", "system prompt") == {"TOOL": "Git"}
+    assert cache.get("resume text", "model-b", "system prompt") is None
+    assert cache.get("resume text", "model-a", "edited system prompt") is None
+    assert cache.get("other text", "model-a", "system prompt") is None
+    assert cache.stats()["hits"] == 1
+    # Another worker opening the same file sees the entry
+    assert LLMCache(tmp_path / "llm.sqlite").get("resume text", "model-a", "system prompt") == {"TOOL": "Git"}
+
+def test_llm_cache_disabled(monkeypatch):
+    monkeypatch.setattr(llm_cache.config, "LLM_CACHE_ENABLED", False)
+    assert llm_cache.getCache() is None
+
+class StubOpenRouter(http.server.BaseHTTPRequestHandler):
+    # Answers every chat completion with a fixed JSON and counts TCP connections
+    protocol_version = "HTTP/1.1"
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if request.get("model") == "stalled-model":
+            # Headers, then nothing until the client goes away
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self.wfile.flush()
+            self.connection.settimeout(10)
+            try:
+                self.rfile.read(1)
+            except OSError:
+                pass
+            self.close_connection = True
+            return
+        if request.get("stream"):
+            chunks = [
+                {"id": "stub", "object": "chat.completion.chunk", "created": 0, "model": "stub-model",
+                 "choices": [{"index": 0, "finish_reason": None, "delta": {"role": "assistant", "content": content}}]}
+                for content in ('{"TOOL": ', '"Git"}')
+            ]
+            body = "".join(f"data: {json.dumps(chunk)}\n\n" for chunk in chunks) + "data: [DONE]\n\n"
+            body = body.encode("utf-8")
+            contentType = "text/event-stream"
+        else:
+            body = json.dumps({
+                "id": "stub", "object": "chat.completion", "created": 0, "model": "stub-model",
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": '{"TOOL": "Git"}'}}],
+            }).encode("utf-8")
+            contentType = "application/json"
+        self.send_response(200)
+        self.send_header("Content-Type", contentType)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub_openrouter(monkeypatch):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StubOpenRouter)
+    StubOpenRouter.connections = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(llm_client.config, "LLM_BASE_URL", f"http://127.0.0.1:{server.server_address[1]}/api/v1")
+    llm_client.closeAll()
+    yield server
+    llm_client.closeAll()
+    server.shutdown()
+    server.server_close()
+
+def test_llm_client_pool_is_shared_and_keeps_connections(stub_openrouter):
+    from src.resume_extractor_agent.resume_agent import ResumeAgent
+    from src.jd_extractor_agent.jd_agent import JobDescriptionAgent
+    outputs = []
+    clients = set()
+    for agentClass in (ResumeAgent, JobDescriptionAgent, ResumeAgent):
+        agent = agentClass(apiKey="stub-key", modelName="stub-model", systemPrompt="Extract.")
+        agent.setUserPrompt("Git")
+        agent.getClient()
+        clients.add(id(agent.client))
+        outputs.append(agent.getJsonOutput())
+        agent.deleteAgent()
+    assert outputs == [{"TOOL": "Git"}] * 3
+    assert len(clients) == 1
+    # Three completions over one keep-alive connection
+    assert StubOpenRouter.connections == 1
+
+def test_llm_client_pool_per_key(stub_openrouter):
+    assert llm_client.getClient("key-a") is llm_client.getClient("key-a")
+    assert llm_client.getClient("key-a") is not llm_client.getClient("key-b")
+    client = llm_client.getClient("key-a", maxRetries=0)
+    assert client.max_retries == 0
+    assert llm_client.getClient("key-a").max_retries == llm_client.config.LLM_MAX_RETRIES
+    # Clients without retries still share the connection pool
+    assert client._client is llm_client.getClient("key-a")._client
+
+def test_request_policy_closes_a_stalled_loser(stub_openrouter, monkeypatch):
+    from src.resume_extractor_agent.resume_agent import ResumeAgent
+    executor = ThreadPoolExecutor(max_workers=2)
+    policy = RequestPolicy(maxAttempts=2, maxInFlight=2, tracker=LatencyTracker(defaultDelay=0.2), executor=executor)
+    monkeypatch.setattr(llm_policy, "_policy", policy)
+    agent = ResumeAgent(apiKey="stub-key", modelName="stalled-model", systemPrompt="Extract.")
+    agent.failoverModels = ["stalled-model", "stub-model"]
+    agent.setUserPrompt("Git")
+    assert agent.getJsonOutput() == {"TOOL": "Git"}
+    agent.deleteAgent()
+    start = time.time()
+    # The stalled attempt gives its thread back instead of waiting for the read timeout
+    executor.shutdown(wait=True)
+    assert time.time() - start < 2
+
+def test_stream_json_output_hedges_a_stalled_stream(stub_openrouter, monkeypatch):
+    from src.resume_extractor_agent.resume_agent import ResumeAgent
+    executor = ThreadPoolExecutor(max_workers=2)
+    policy = RequestPolicy(maxAttempts=2, maxInFlight=2, tracker=LatencyTracker(defaultDelay=0.2), executor=executor)
+    monkeypatch.setattr(llm_policy, "_policy", policy)
+    agent = ResumeAgent(apiKey="stub-key", modelName="stalled-model", systemPrompt="Extract.")
+    agent.failoverModels = ["stalled-model", "stub-model"]
+    agent.setUserPrompt("Git")
+    assert list(agent.streamJsonOutput()) == [("TOOL", "Git")]
+    agent.deleteAgent()
+    start = time.time()
+    executor.shutdown(wait=True)
+    assert time.time() - start < 2
+    # The streamed winner is a latency sample like any other request
+    assert len(policy.tracker._latencies["stub-model"]) == 1
+
+def test_incremental_json_parser_emits_keys_as_they_close():
+    parser = IncrementalJSONParser()
+    assert parser.feed('Here is the output:\n```json\n{"EDUCATION": "B.Sc {CS}, \\"hons\\""') == []
+    assert parser.feed(', "TOOL": ["Git", {"a": 1}],') == [("EDUCATION", 'B.Sc {CS}, "hons"'), ("TOOL", ["Git", {"a": 1}])]
+    assert parser.feed(' "YEARS": 3, "CERTIFICATION": null}\n```') == [("YEARS", 3), ("CERTIFICATION", None)]
+    assert parser.done
+    assert parser.feed('{"LATE": 1}') == []
+
+def test_incremental_json_parser_character_stream_and_remaining():
+    text = '{"SOFT_SKILL": "Teamwork", "BROKEN": nope, "TOOL": "Git"}'
+    parser = IncrementalJSONParser()
+    items = []
+    for char in text:
+        items.extend(parser.feed(char))
+    assert items == [("SOFT_SKILL", "Teamwork"), ("TOOL", "Git")]
+    assert parser.remaining({"SOFT_SKILL": "Teamwork", "BROKEN": "nope", "TOOL": "Git"}) == [("BROKEN", "nope")]
+
+MODEL_NAMES = {
+    1: {"MODEL_NAME": "deepseek:free", "MODEL_TYPE": "free", "NAME": "DeepSeek"},
+    2: {"MODEL_NAME": "deepseek", "MODEL_TYPE": "paid", "NAME": "DeepSeek"},
+    3: {"MODEL_NAME": "mistral:free", "MODEL_TYPE": "free", "NAME": "Mistral"},
+    4: {"MODEL_NAME": "mistral", "MODEL_TYPE": "paid", "NAME": "Mistral"},
+}
+
+def test_failover_chain_goes_from_free_to_paid():
+    assert failoverChain("mistral:free", MODEL_NAMES) == ["mistral:free", "mistral", "deepseek"]
+    assert failoverChain("deepseek", MODEL_NAMES) == ["deepseek", "mistral"]
+    assert failoverChain("mistral:free", MODEL_NAMES, toPaid=False) == ["mistral:free"]
+    assert failoverChain("unknown-model", MODEL_NAMES) == ["unknown-model"]
+
+def test_latency_tracker_percentile():
+    tracker = LatencyTracker(window=10, minSamples=3, defaultDelay=7.0)
+    tracker.record("model", 1.0)
+    assert tracker.percentile("model", 90) == 7.0
+    for seconds in (2.0, 3.0, 4.0):
+        tracker.record("model", seconds)
+    assert tracker.percentile("model", 50) == pytest.approx(2.5)
+
+@pytest.fixture
+def policy_executor():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        yield executor
+
+def test_request_policy_hedges_and_cancels_the_loser(policy_executor):
+    events = {}
+    def call(modelName, cancelEvent):
+        events[modelName] = cancelEvent
+        if modelName == "stalled":
+            if cancelEvent.wait(timeout=5):
+                raise llm_policy.RequestCancelled("cancelled")
+            return "late"
+        return "fast"
+    policy = RequestPolicy(maxAttempts=3, maxInFlight=2, tracker=LatencyTracker(defaultDelay=0.05), executor=policy_executor)
+    start = time.time()
+    assert policy.run(call, ["stalled", "backup"]) == ("backup", "fast")
+    assert time.time() - start < 2
+    assert events["stalled"].wait(timeout=1)
+    # Only the winner counts as a latency sample
+    assert policy.tracker.percentile("backup", 50) == policy.tracker.defaultDelay
+
+def test_request_policy_fails_over_with_backoff(policy_executor):
+    calls = []
+    def call(modelName, cancelEvent):
+        calls.append(modelName)
+        if modelName == "free":
+            raise ValueError("rate limited")
+        return {"TOOL": "Git"}
+    policy = RequestPolicy(maxAttempts=3, tracker=LatencyTracker(defaultDelay=5), executor=policy_executor)
+    with patch('src.utils.llm_policy.time.sleep') as sleep, patch('src.utils.llm_policy.random.uniform', return_value=0.25) as uniform:
+        assert policy.run(call, ["free", "paid"]) == ("paid", {"TOOL": "Git"})
+    assert calls == ["free", "paid"]
+    sleep.assert_called_once_with(0.25)
+    uniform.assert_called_once_with(0, 0.5)
+    assert policy.backoff(10) <= policy.backoffMax
+
+def test_request_policy_all_attempts_fail(policy_executor):
+    def call(modelName, cancelEvent):
+        raise ValueError("down")
+    policy = RequestPolicy(maxAttempts=3, backoffBase=0.001, executor=policy_executor)
+    with pytest.raises(ValueError, match="All 3 attempts failed: a: down; b: down; a: down"):
+        policy.run(call, ["a", "b"])
+    with pytest.raises(ValueError, match="Attempts and in-flight requests must be positive."):
+        RequestPolicy(maxAttempts=0)
+
+def test_extraction_schema_normalizes_and_reports_problems():
+    assert extraction_schema.normalizeValue(" Python ") == ("Python", True)
+    assert extraction_schema.normalizeValue(["Python", "", 3]) == ("Python, 3", True)
+    assert extraction_schema.normalizeValue({"name": "Python"}) == (None, False)
+    assert extraction_schema.normalizeValue(None) == (None, False)
+    assert extraction_schema.normalizeValue(True) == (None, False)
+    output, problems = extraction_schema.validateOutput({
+        "EDUCATION": "BSc", "EXPERIENCE": 5, "TECHNICAL_SKILL": ["Python", "Java"], "SOFT_SKILL": None,
+        "TOOL": "", "CERTIFICATION": "", "PAY": {"min": 1}, "EXTRA": "dropped",
+    })
+    assert output == {"EDUCATION": "BSc", "EXPERIENCE": "5", "TECHNICAL_SKILL": "Python, Java", "TOOL": "", "CERTIFICATION": ""}
+    assert problems == ["SOFT_SKILL", "DESIGNATION", "PAY"]
+    assert extraction_schema.validateOutput("not a dict") == ({}, extraction_schema.REQUIRED_KEYS)
+
+def test_extraction_schema_repair_prompt():
+    prompt = extraction_schema.repairPrompt("Resume text", ["TOOL", "PAY"])
+    assert prompt.startswith("Extract only these entities: TOOL, PAY.")
+    assert prompt.endswith("Resume text")
+
+OCR_TEXT = (
+    "John  Doe \u2013 Resume\n"
+    "Senior\u00a0Data Engineer\u200b\n"
+    "Skills:\tPython,   SQL\n"
+    "Page 1 of 2\n"
+    "----------\n"
+    "JOHN DOE \u2013 RESUME\n"
+    "- 2 -\n"
+    "\n\n"
+    "Tools: Git, Docker\n"
+    "Skills: Python, SQL\n"
+    "References available upon request\n"
+)
+
+def test_compact_lines_normalizes_and_drops_boilerplate():
+    assert prompt_compactor.compactLines(OCR_TEXT) == [
+        "John Doe \u2013 Resume",
+        "Senior Data Engineer",
+        "Skills: Python, SQL",
+        "Tools: Git, Docker",
+    ]
+
+def test_compact_lines_keeps_repeats_inside_the_text():
+    text = (
+        "Acme Corp | Jane Roe\nSoftware Engineer\nJan 2020 - Dec 2021\nBuilt APIs\nPage 1\n"
+        "Acme Corp | Jane Roe\nSoftware Engineer\nJan 2020 - Dec 2021\nLed a team\f"
+        "Acme Corp | Jane Roe\nPython\nPython\nPython\n"
+    )
+    # Jobs that share a title or dates keep both entries, the running header and a line repeated three times are kept once
+    assert prompt_compactor.compactLines(text) == [
+        "Acme Corp | Jane Roe", "Software Engineer", "Jan 2020 - Dec 2021", "Built APIs",
+        "Software Engineer", "Jan 2020 - Dec 2021", "Led a team", "Python",
+    ]
+
+def test_compact_prompt_counts_with_the_tokenizer_of_the_smallest_budget():
+    configs = {
+        1: {"MODEL_NAME": "big", "TOKEN_BUDGET": 1000, "TOKENIZER": "org/big"},
+        2: {"MODEL_NAME": "small", "TOKEN_BUDGET": 4, "TOKENIZER": "org/small", "TOKENIZER_REVISION": "abc1234"},
+    }
+    with patch('src.utils.prompt_compactor.getCounter', return_value=prompt_compactor.TokenCounter()) as getCounter:
+        prompt_compactor.compactPrompt("Python, SQL", ["big", "small"], configs)
+    getCounter.assert_called_once_with("org/small", "abc1234")
+
+def test_trim_to_budget_keeps_whole_leading_lines():
+    counter = prompt_compactor.TokenCounter()
+    lines = ["Python SQL", "Git Docker", "Kubernetes"]
+    assert prompt_compactor.trimToBudget(lines, 7, counter) == (["Python SQL", "Git Docker"], True)
+    assert prompt_compactor.trimToBudget(lines, 100, counter) == (lines, False)
+
+def test_trim_to_budget_cuts_inside_an_oversized_line():
+    counter = prompt_compactor.TokenCounter()
+    # OCR of a whole resume without line breaks
+    line = " ".join(f"Skill{index}" for index in range(4000))
+    kept, truncated = prompt_compactor.trimToBudget([line], 100, counter)
+    assert truncated
+    assert kept == [" ".join(f"Skill{index}" for index in range(len(kept[0].split(" "))))]
+    assert 95 <= counter.count(kept[0]) <= 100
+    kept, truncated = prompt_compactor.trimToBudget(["Python SQL", line], 6, counter)
+    assert kept == ["Python SQL", "Skill0"] and truncated
 
+def test_compact_prompt_uses_smallest_budget_and_reports_savings():
+    configs = {1: {"MODEL_NAME": "big", "TOKEN_BUDGET": 1000}, 2: {"MODEL_NAME": "small", "TOKEN_BUDGET": 4}}
+    compacted, stats = prompt_compactor.compactPrompt(OCR_TEXT.encode("utf-8"), ["big"], configs)
+    assert compacted == "John Doe \u2013 Resume\nSenior Data Engineer\nSkills: Python, SQL\nTools: Git, Docker"
+    assert stats["tokens_saved"] == stats["tokens_before"] - stats["tokens_after"] > 0
+    assert stats["token_budget"] == 1000 and not stats["truncated"]
+    compacted, stats = prompt_compactor.compactPrompt(OCR_TEXT, ["big", "small"], configs)
+    assert stats["token_budget"] == 4 and stats["truncated"]
+    assert stats["tokens_after"] <= 4
+    # Unknown models fall back to the default budget
+    assert prompt_compactor.modelBudget("unknown", configs) == (prompt_compactor.config.LLM_INPUT_TOKEN_BUDGET, None, None)
 
+def test_token_counter_uses_local_tokenizer():
+    tokenizer = MagicMock()
+    tokenizer.encode.return_value = MagicMock(ids=[1, 2, 3])
+    with patch('huggingface_hub.hf_hub_download', return_value="tokenizer.json") as download, \
+            patch('tokenizers.Tokenizer.from_file', return_value=tokenizer):
+        counter = prompt_compactor.TokenCounter("org/model")
+        assert counter.count("any text") == 3
+        assert counter.count("more text") == 3
+    download.assert_called_once_with(repo_id="org/model", filename="tokenizer.json", revision=None, local_files_only=True)
+    missing = prompt_compactor.TokenCounter("org/missing")
+    with patch('huggingface_hub.hf_hub_download', side_effect=OSError("not cached")):
+        assert missing.count("Python, SQL") == prompt_compactor.estimateTokens("Python, SQL") == 4